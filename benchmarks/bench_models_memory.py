@@ -0,0 +1,66 @@
+"""
+Memory benchmark: plain dataclass messages vs slotted Message vs MessageStore.
+
+Run from the repo root:
+
+    python -m benchmarks.bench_models_memory [N]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass
+
+from src.core.models import Message, MessageStore, Role
+
+
+@dataclass
+class LegacyMessage:
+    """The pre-slots Message model, kept here for comparison."""
+    role: Role
+    content: str
+
+
+ROLES = (Role.USER, Role.ASSISTANT)
+
+
+def _contents(n: int) -> list[str]:
+    # Built up front so string storage is shared by every variant.
+    return [f"message number {i}" for i in range(n)]
+
+
+def _measure(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del obj
+    return size
+
+
+def run(n: int = 100_000) -> dict:
+    contents = _contents(n)
+    results = {
+        "legacy_dataclass": _measure(
+            lambda: [LegacyMessage(ROLES[i % 2], c) for i, c in enumerate(contents)]
+        ),
+        "slotted_message": _measure(
+            lambda: [Message(ROLES[i % 2], c) for i, c in enumerate(contents)]
+        ),
+        "message_store": _measure(
+            lambda: MessageStore.from_columns((ROLES[i % 2] for i in range(n)), contents)
+        ),
+    }
+    return {
+        "messages": n,
+        "bytes": results,
+        "bytes_per_message": {k: round(v / n, 1) for k, v in results.items()},
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000), indent=2))
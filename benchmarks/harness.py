@@ -0,0 +1,119 @@
+"""
+Tiny benchmark harness: timing, peak memory and JSON result comparison.
+
+Kept dependency-free so the suite runs anywhere the app runs.
+"""
+
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+def measure(fn: Callable[[], object], repeat: int = 20, warmup: int = 2) -> List[float]:
+    """Call ``fn`` repeatedly and return per-call wall times in seconds."""
+    for _ in range(warmup):
+        fn()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        samples = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return samples
+
+
+def peak_memory(fn: Callable[[], object]) -> int:
+    """Peak bytes allocated (tracemalloc) while ``fn`` runs."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(name: str, params: Dict[str, object], samples: List[float], **extra) -> dict:
+    """One result record; times are in seconds."""
+    return {
+        "name": name,
+        "params": params,
+        "samples": len(samples),
+        "mean": statistics.fmean(samples) if samples else 0.0,
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "min": min(samples) if samples else 0.0,
+        "max": max(samples) if samples else 0.0,
+        **extra,
+    }
+
+
+def result_key(record: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(record["params"].items()))
+    return f"{record['name']}[{params}]"
+
+
+def environment() -> dict:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+    }
+
+
+def write_results(path: str | Path, results: List[dict]) -> None:
+    data = {"environment": environment(), "results": results}
+    Path(path).write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def load_results(path: str | Path) -> List[dict]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))["results"]
+
+
+def compare(
+    current: List[dict],
+    baseline: List[dict],
+    tolerance: float = 0.25,
+    metrics: tuple = ("p50", "peak_bytes"),
+) -> List[str]:
+    """Describe every metric that got worse than ``baseline`` by more than ``tolerance``."""
+    base = {result_key(r): r for r in baseline}
+    regressions = []
+    for record in current:
+        old = base.get(result_key(record))
+        if old is None:
+            continue
+        for metric in metrics:
+            new_value, old_value = record.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            if new_value > old_value * (1 + tolerance):
+                regressions.append(
+                    f"{result_key(record)} {metric}: {old_value:.6g} -> {new_value:.6g} "
+                    f"(+{(new_value / old_value - 1) * 100:.0f}%)"
+                )
+    return regressions
@@ -0,0 +1,242 @@
+"""
+Load-test client for server.py.
+
+Each virtual user keeps one connection and session and sends ``--turns``
+messages back to back, over plain HTTP, SSE or WebSocket. Without
+``--url`` an in-process server backed by FakeAIProvider (and a temporary
+history file) is started, so throughput and tail latency can be measured
+on one machine:
+
+    python3 -m benchmarks.load_test --users 200 --turns 20 --transport sse
+    python3 -m benchmarks.load_test --url http://127.0.0.1:8080 --transport ws
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.harness import percentile, summarize, write_results
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.sessions import SessionManager
+from src.server.app import AssistantServer
+from src.server.protocol import (
+    TEXT,
+    encode_frame,
+    parse_headers,
+    read_message,
+    websocket_key,
+)
+from src.storage.history import FileHistoryStorage
+from src.storage.write_behind import WriteBehindHistory
+
+
+TRANSPORTS = ("http", "sse", "ws")
+
+
+class Client:
+    """One keep-alive connection speaking just enough HTTP for the server."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: asyncio.StreamReader | None = None
+        self.writer: asyncio.StreamWriter | None = None
+
+    async def connect(self) -> None:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def request(self, method: str, path: str, body: dict | None = None, accept: str = "") -> Tuple[int, dict, bytes]:
+        """Send a request; returns ``(status, headers, body)`` (chunked bodies joined)."""
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(data)}"]
+        if accept:
+            head.append(f"Accept: {accept}")
+        self.writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + data)
+        status, headers = await self._read_head()
+        if headers.get("transfer-encoding") == "chunked":
+            parts = []
+            async for part in self._chunks():
+                parts.append(part)
+            return status, headers, b"".join(parts)
+        length = int(headers.get("content-length", "0"))
+        return status, headers, await self.reader.readexactly(length)
+
+    async def stream(self, path: str, body: dict) -> Tuple[int, float | None]:
+        """POST with ``Accept: text/event-stream``; returns status and time to first chunk."""
+        data = json.dumps(body).encode("utf-8")
+        self.writer.write((
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\nAccept: text/event-stream\r\n"
+            f"Content-Length: {len(data)}\r\n\r\n"
+        ).encode("latin-1") + data)
+        started = time.perf_counter()
+        status, headers = await self._read_head()
+        if headers.get("transfer-encoding") != "chunked":
+            await self.reader.readexactly(int(headers.get("content-length", "0")))
+            return status, None
+        first = None
+        async for part in self._chunks():
+            if first is None and part.startswith(b"data:"):
+                first = time.perf_counter() - started
+        return status, first
+
+    async def websocket(self, path: str) -> None:
+        self.writer.write((
+            f"GET {path} HTTP/1.1\r\nHost: {self.host}\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {websocket_key()}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        ).encode("latin-1"))
+        status, _ = await self._read_head()
+        if status != 101:
+            raise ConnectionError(f"WebSocket upgrade failed with {status}")
+
+    async def ws_turn(self, text: str) -> Tuple[bool, float | None]:
+        """Send one message; returns success and time to first chunk."""
+        self.writer.write(encode_frame(TEXT, text.encode("utf-8"), mask=True))
+        started = time.perf_counter()
+        first = None
+        while True:
+            _, payload = await read_message(self.reader, self.writer, 1 << 24, mask=True)
+            event = json.loads(payload)
+            if event["type"] == "chunk" and first is None:
+                first = time.perf_counter() - started
+            elif event["type"] == "done":
+                return True, first
+            elif event["type"] == "error":
+                return False, first
+
+    async def _read_head(self) -> Tuple[int, dict]:
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        return int(lines[0].split(" ", 2)[1]), parse_headers(lines[1:])
+
+    async def _chunks(self):
+        while True:
+            size = int((await self.reader.readline()).strip(), 16)
+            data = await self.reader.readexactly(size + 2)
+            if size == 0:
+                return
+            yield data[:-2]
+
+
+async def virtual_user(
+    host: str, port: int, user: int, turns: int, transport: str,
+    latencies: List[float], first_chunks: List[float], errors: List[str],
+) -> None:
+    client = Client(host, port)
+    key = f"load-{user}"
+    try:
+        await client.connect()
+        if transport == "ws":
+            await client.websocket(f"/sessions/{key}/ws")
+        for turn in range(turns):
+            text = f"user {user} turn {turn}"
+            started = time.perf_counter()
+            if transport == "http":
+                status, _, _ = await client.request("POST", f"/sessions/{key}/messages", {"text": text})
+                ok, first = status == 200, None
+            elif transport == "sse":
+                status, first = await client.stream(f"/sessions/{key}/messages", {"text": text})
+                ok = status == 200
+            else:
+                ok, first = await client.ws_turn(text)
+            if not ok:
+                errors.append(f"user {user} turn {turn} failed")
+                continue
+            latencies.append(time.perf_counter() - started)
+            if first is not None:
+                first_chunks.append(first)
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError) as exc:
+        errors.append(f"user {user}: {exc}")
+    finally:
+        await client.close()
+
+
+async def run_load(host: str, port: int, users: int, turns: int, transport: str) -> dict:
+    latencies: List[float] = []
+    first_chunks: List[float] = []
+    errors: List[str] = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        virtual_user(host, port, user, turns, transport, latencies, first_chunks, errors)
+        for user in range(users)
+    ))
+    elapsed = time.perf_counter() - started
+    params = {"transport": transport, "users": users, "turns": turns}
+    return summarize(
+        "server_turn", params, latencies,
+        p99=percentile(latencies, 99),
+        ttfb_p50=percentile(first_chunks, 50) if first_chunks else None,
+        ttfb_p99=percentile(first_chunks, 99) if first_chunks else None,
+        turns_per_second=len(latencies) / elapsed if elapsed else None,
+        errors=len(errors),
+        error_samples=errors[:5],
+    )
+
+
+async def run_local(users: int, turns: int, transport: str, delay: float, workers: int) -> dict:
+    """Start a throwaway server on a free port and load it."""
+    with tempfile.TemporaryDirectory(prefix="ai-assistant-load-") as tmp:
+        history = WriteBehindHistory(FileHistoryStorage(Path(tmp) / "history.jsonl", delta=True))
+        sessions = SessionManager(AICore(FakeAIProvider(delay=delay)), history, max_sessions=users)
+        server = await AssistantServer(
+            sessions, port=0, workers=workers, max_inflight=max(users, 1), queue_timeout=30.0
+        ).start()
+        try:
+            return await run_load(server.host, server.port, users, turns, transport)
+        finally:
+            await server.shutdown()
+            history.close()
+
+
+# ──────────────────────────────────────────────────────────────
+# CLI
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the assistant server.")
+    parser.add_argument("--url", help="server to load (default: start one in-process)")
+    parser.add_argument("--users", type=int, default=50, help="concurrent virtual users")
+    parser.add_argument("--turns", type=int, default=20, help="messages per user")
+    parser.add_argument("--transport", choices=TRANSPORTS, default="http")
+    parser.add_argument("--delay", type=float, default=0.0, help="in-process FakeAIProvider latency (s)")
+    parser.add_argument("--workers", type=int, default=32, help="in-process server turn threads")
+    parser.add_argument("--out", help="write the result as benchmark JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    if args.url:
+        parts = urlsplit(args.url)
+        result = asyncio.run(run_load(parts.hostname, parts.port or 80, args.users, args.turns, args.transport))
+    else:
+        result = asyncio.run(run_local(args.users, args.turns, args.transport, args.delay, args.workers))
+
+    print(
+        f"{args.transport}: {result['samples']} turns, {result['turns_per_second']:.0f} turns/s, "
+        f"p50 {result['p50'] * 1000:.2f} ms, p99 {result['p99'] * 1000:.2f} ms, "
+        f"errors {result['errors']}"
+    )
+    if result["ttfb_p50"] is not None:
+        print(f"first chunk: p50 {result['ttfb_p50'] * 1000:.2f} ms, p99 {result['ttfb_p99'] * 1000:.2f} ms")
+    if args.out:
+        write_results(args.out, [result])
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Startup benchmark: import time of the entry points, which heavy modules
+they load up front, and how long the CLI takes to show its prompt.
+
+Run from the repo root:
+
+    python -m benchmarks.startup [--repeat 10] [--out results.json]
+
+Import time is the module's cumulative figure from ``python -X importtime``
+in a fresh interpreter, so interpreter start-up and ``site`` are left out.
+The command exits non-zero when an entry point's median import time is
+over its budget in ``BUDGETS`` or it imports one of ``DEFERRED`` eagerly;
+``tests/test_startup.py`` enforces the same limits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from benchmarks.harness import summarize, write_results
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Median cumulative import time allowed per entry point, in milliseconds.
+BUDGETS: Dict[str, float] = {
+    "main": 75.0,
+    "gui": 150.0,   # tkinter itself is needed to open the window
+}
+
+# Modules an entry point must not import before it needs them.
+HEAVY = (
+    "sqlite3", "gzip", "zstandard", "orjson", "msgspec", "msgpack",
+    "httpx", "cProfile", "pstats", "concurrent.futures", "src.storage.history",
+)
+DEFERRED: Dict[str, Tuple[str, ...]] = {
+    "main": HEAVY + ("tkinter", "src.core.app"),
+    "gui": HEAVY,
+}
+
+
+def _python(*args: str, **kwargs) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args], cwd=ROOT, capture_output=True, text=True, check=True, **kwargs
+    )
+
+
+def import_time(module: str) -> float:
+    """Cumulative import time of ``module`` in a fresh interpreter, in seconds."""
+    stderr = _python("-X", "importtime", "-c", f"import {module}").stderr
+    for line in stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1e6
+    raise RuntimeError(f"no import time reported for {module!r}")
+
+
+def eager_imports(module: str, candidates: Sequence[str]) -> List[str]:
+    """Which of ``candidates`` are loaded once ``module`` is imported."""
+    code = f"import sys, {module}; print(' '.join(m for m in {tuple(candidates)!r} if m in sys.modules))"
+    return _python("-c", code).stdout.split()
+
+
+def time_to_prompt(timeout: float = 30.0) -> float:
+    """Seconds from launching ``main.py`` until it asks for input, in a fresh directory."""
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, str(ROOT / "main.py")],
+            cwd=workdir, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+        try:
+            seen = b""
+            while not seen.endswith(b"You: "):
+                chunk = os.read(proc.stdout.fileno(), 4096)
+                if not chunk:
+                    raise RuntimeError("main.py exited before showing a prompt")
+                seen += chunk
+            elapsed = time.perf_counter() - started
+            proc.communicate(b"/exit\n", timeout=timeout)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+    return elapsed
+
+
+def check(results: List[dict]) -> List[str]:
+    """Budget and eager-import violations in ``results``."""
+    problems = []
+    for record in results:
+        budget = record.get("budget_ms")
+        if budget is not None and record["p50"] * 1000 > budget:
+            problems.append(
+                f"{record['params']['module']}: import takes {record['p50'] * 1000:.1f} ms, budget {budget:.0f} ms"
+            )
+        for name in record.get("eager", []):
+            problems.append(f"{record['params']['module']}: imports {name} at startup")
+    return problems
+
+
+def run(repeat: int = 5, modules: Sequence[str] = tuple(BUDGETS), prompt: bool = True) -> List[dict]:
+    results = []
+    for module in modules:
+        samples = [import_time(module) for _ in range(repeat)]
+        results.append(summarize(
+            "import_time", {"module": module}, samples,
+            budget_ms=BUDGETS.get(module),
+            eager=eager_imports(module, DEFERRED.get(module, HEAVY)),
+        ))
+    if prompt:
+        samples = [time_to_prompt() for _ in range(repeat)]
+        results.append(summarize("time_to_prompt", {"entry": "main.py"}, samples))
+    return results
+
+
+def available_modules() -> List[str]:
+    """Entry points that can be imported here (gui needs tkinter)."""
+    modules = ["main"]
+    try:
+        _python("-c", "import tkinter")
+    except subprocess.CalledProcessError:
+        return modules
+    return modules + ["gui"]
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure entry point startup.")
+    parser.add_argument("--repeat", type=int, default=10, help="fresh interpreters per measurement")
+    parser.add_argument("--out", help="where to write JSON results")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    results = run(repeat=args.repeat, modules=available_modules())
+    if args.out:
+        write_results(args.out, results)
+
+    for record in results:
+        params = " ".join(f"{k}={v}" for k, v in record["params"].items())
+        budget = f"  (budget {record['budget_ms']:.0f} ms)" if record.get("budget_ms") else ""
+        print(f"{record['name']:<16} {params:<16} p50 {record['p50'] * 1000:>8.1f} ms{budget}")
+    problems = check(results)
+    for line in problems:
+        print(f"OVER BUDGET {line}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
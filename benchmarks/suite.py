@@ -0,0 +1,207 @@
+"""
+Offline performance suite: session turn latency, history IO, payload cost
+and peak memory. Everything runs against FakeAIProvider and temp files.
+
+Run from the repo root:
+
+    python -m benchmarks.suite [--quick] [--out results.json] [--compare baseline.json]
+
+``--compare`` exits non-zero when a p50 time or peak memory figure is
+more than ``--tolerance`` worse than the baseline run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Sequence
+
+from benchmarks.harness import (
+    compare, load_results, measure, peak_memory, percentile, summarize, write_results,
+)
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.app import AssistantSession
+from src.core.models import Conversation
+from src.storage.codecs import available
+from src.storage.history import FileHistoryStorage
+
+
+FULL = {
+    "lengths": (10, 100, 1_000, 10_000),
+    "conversations": (100, 1_000, 5_000),
+    "messages_per_conversation": 20,
+    "repeat": 20,
+}
+
+QUICK = {
+    "lengths": (10, 100),
+    "conversations": (10, 50),
+    "messages_per_conversation": 4,
+    "repeat": 3,
+}
+
+
+class NullHistory:
+    """HistoryPort that stores nothing, to time the session on its own."""
+
+    def save(self, conversation: Conversation) -> None:
+        pass
+
+    def load_all(self) -> List[Conversation]:
+        return []
+
+
+def make_conversation(length: int, mode: str = "chat") -> Conversation:
+    conv = Conversation(mode=mode)
+    for i in range(length):
+        if i % 2 == 0:
+            conv.add_user_message(f"user message number {i} with a little padding text")
+        else:
+            conv.add_assistant_message(f"assistant reply number {i} with a little padding text")
+    return conv
+
+
+# ──────────────────────────────────────────────────────────────
+# Benchmarks
+def bench_session_latency(lengths: Sequence[int], repeat: int, workdir: Path) -> List[dict]:
+    """``handle_user_input`` latency vs conversation length.
+
+    Each timed turn adds two messages, so the conversation grows by
+    ``2 * repeat`` during the run; that is small next to ``length``.
+    """
+    results = []
+    core = AICore(FakeAIProvider())
+    for length in lengths:
+        for backend in ("null", "file"):
+            if backend == "null":
+                history = NullHistory()
+            else:
+                history = FileHistoryStorage(workdir / f"session-{length}.jsonl", delta=True)
+            session = AssistantSession(core=core, history=history, conversation=make_conversation(length))
+            samples = measure(lambda: session.handle_user_input("how is it going?"), repeat=repeat)
+            results.append(summarize("session_turn", {"length": length, "history": backend}, samples))
+    return results
+
+
+def bench_history_io(
+    counts: Sequence[int], per_conversation: int, repeat: int, workdir: Path
+) -> List[dict]:
+    """``FileHistoryStorage.save``/``load_all`` throughput vs file size and codec."""
+    results = []
+    runs = [(False, "auto")] + [(True, name) for name in ["auto"] + available()]
+    for count in counts:
+        for delta, codec in runs:
+            kind = "delta" if delta else "snapshot"
+            path = workdir / f"io-{kind}-{codec}-{count}.jsonl"
+            storage = FileHistoryStorage(path, delta=delta, codec=codec)
+            params = {"conversations": count, "format": kind, "codec": codec}
+            convs = [make_conversation(per_conversation) for _ in range(count)]
+
+            save_samples = measure(lambda: [storage.save(c) for c in convs], repeat=1, warmup=0)
+            size = path.stat().st_size
+            results.append(summarize(
+                "history_save", params, save_samples,
+                bytes=size,
+                saves_per_second=count / save_samples[0] if save_samples[0] else None,
+            ))
+
+            load_samples = measure(
+                lambda: FileHistoryStorage(path, delta=delta, codec=codec).load_all(), repeat=repeat
+            )
+            p50 = percentile(load_samples, 50)
+            results.append(summarize(
+                "history_load_all", params, load_samples,
+                bytes=size,
+                megabytes_per_second=size / p50 / 1e6 if p50 else None,
+            ))
+    return results
+
+
+def bench_payload(lengths: Sequence[int], repeat: int) -> List[dict]:
+    """``Conversation.to_ai_payload`` cost vs conversation length."""
+    results = []
+    for length in lengths:
+        conv = make_conversation(length)
+        samples = measure(conv.to_ai_payload, repeat=repeat)
+        results.append(summarize("to_ai_payload", {"length": length}, samples))
+    return results
+
+
+def bench_memory(lengths: Sequence[int], counts: Sequence[int], per_conversation: int, workdir: Path) -> List[dict]:
+    """Peak traced memory for building conversations and loading history."""
+    results = []
+    for length in lengths:
+        peak = peak_memory(lambda: make_conversation(length))
+        results.append(summarize("memory_conversation", {"length": length}, [], peak_bytes=peak))
+
+    for count in counts:
+        path = workdir / f"mem-{count}.jsonl"
+        storage = FileHistoryStorage(path, delta=True, index=False)
+        for _ in range(count):
+            storage.save(make_conversation(per_conversation))
+        peak = peak_memory(lambda: FileHistoryStorage(path, index=False).load_all())
+        results.append(summarize(
+            "memory_load_all", {"conversations": count}, [],
+            peak_bytes=peak, bytes=path.stat().st_size,
+        ))
+
+    # Payload building copies every message into a dict.
+    for length in lengths:
+        conv = make_conversation(length)
+        peak = peak_memory(conv.to_ai_payload)
+        results.append(summarize("memory_to_ai_payload", {"length": length}, [], peak_bytes=peak))
+    return results
+
+
+def run(quick: bool = False) -> List[dict]:
+    config = QUICK if quick else FULL
+    with tempfile.TemporaryDirectory(prefix="ai-assistant-bench-") as tmp:
+        workdir = Path(tmp)
+        results: List[dict] = []
+        results += bench_session_latency(config["lengths"], config["repeat"], workdir)
+        results += bench_history_io(
+            config["conversations"], config["messages_per_conversation"], config["repeat"], workdir
+        )
+        results += bench_payload(config["lengths"], config["repeat"])
+        results += bench_memory(
+            config["lengths"], config["conversations"], config["messages_per_conversation"], workdir
+        )
+    return results
+
+
+# ──────────────────────────────────────────────────────────────
+# CLI
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--quick", action="store_true", help="small sizes, for smoke runs")
+    parser.add_argument("--out", default="benchmarks/results.json", help="where to write JSON results")
+    parser.add_argument("--compare", metavar="BASELINE", help="results JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = parse_args(argv)
+    results = run(quick=args.quick)
+    write_results(args.out, results)
+
+    for record in results:
+        params = " ".join(f"{k}={v}" for k, v in record["params"].items())
+        if "peak_bytes" in record:
+            print(f"{record['name']:<22} {params:<32} peak {record['peak_bytes'] / 1024:>10.1f} KiB")
+        else:
+            print(f"{record['name']:<22} {params:<32} p50 {record['p50'] * 1000:>10.3f} ms")
+    print(f"results written to {args.out}")
+
+    if args.compare:
+        regressions = compare(results, load_results(args.compare), tolerance=args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
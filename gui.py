@@ -6,19 +6,30 @@ Visual chat UI for the AI Assistant.
 - Input box at the bottom
 
 Only standard library: tkinter.
+
+The window comes up first; history storage and the search index open on
+a background thread (``src.core.prewarm``) and the first turn that saves
+or searches waits for them.
 """
 
 from __future__ import annotations
 
 import os
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk
 
 from src.ai.provider import FakeAIProvider, AICore
 from src.core.app import AssistantSession
-from src.storage.history import FileHistoryStorage
+from src.core.background import BackgroundSession
+from src.core.prewarm import Prewarm
 
 HISTORY_FILE = "history.jsonl"
+SEARCH_FILE = "history.search.db"
+# Rotate history.jsonl into gzip-compressed segments past this size
+HISTORY_SEGMENT_BYTES = 16 * 1024 * 1024
+POLL_MS = 40 # how often the UI drains worker events (and flushes text)
 
 # --- Simple design tokens -----------------------------------------------------
 
@@ -43,17 +54,26 @@ class ChatApp(tk.Tk):
         self.minsize(820, 520)
         self.configure(bg=BG_DARK)
 
-        # Core domain pieces
+        # Core domain pieces; history and its indexes open in the background
         core = AICore(FakeAIProvider())
-        history = FileHistoryStorage(HISTORY_FILE)
+        self.prewarm = Prewarm()
+        self.history = self.prewarm.add("history", open_history)
+        self.prewarm.add("indexes", lambda: load_indexes(self.prewarm.get("history")))
+        self.prewarm.start()
         self.session = AssistantSession.start(
             core=core,
-            history=history,
+            history=self.history,
             mode="chat",
         )
+        # Replies and history writes run on a worker thread
+        self.worker = BackgroundSession(self.session)
+        self._reply_open = False # an "AI:" line is being streamed
+        self._closing = False
 
         self._build_layout()
         self._load_initial_history()
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after(POLL_MS, self._poll_worker)
 
     # ------------------------------------------------------------------ UI setup
     def _build_layout(self) -> None:
@@ -167,6 +187,14 @@ class ChatApp(tk.Tk):
         self.text.grid(row=0, column=0, sticky="nsew")
         scrollbar.grid(row=0, column=1, sticky="ns")
 
+        # Typing indicator
+        self.status_var = tk.StringVar(value="")
+        ttk.Label(
+            frame,
+            textvariable=self.status_var,
+            style="Muted.TLabel",
+        ).grid(row=2, column=0, sticky="w", pady=(6, 0))
+
         # Make text read-only by default
         self.text.config(state="disabled")
 
@@ -176,15 +204,16 @@ class ChatApp(tk.Tk):
         frame.columnconfigure(0, weight=1)
 
         self.entry_var = tk.StringVar()
-        entry = ttk.Entry(
+        self.entry = entry = ttk.Entry(
             frame,
             textvariable=self.entry_var,
             width=10,
         )
         entry.grid(row=0, column=0, sticky="ew", padx=(0, 8))
         entry.bind("<Return>", self._on_send)
+        entry.bind("<Escape>", self._on_cancel)
 
-        send_btn = ttk.Button(
+        self.send_btn = send_btn = ttk.Button(
             frame,
             text="Send ▶",
             command=self._on_send,
@@ -193,7 +222,7 @@ class ChatApp(tk.Tk):
 
         hint = ttk.Label(
             frame,
-            text="Type your message · /history to see previous chats · /exit to close",
+            text="Type your message · /history to see previous chats · /search to find old answers · Esc to cancel · /exit to close",
             style="Muted.TLabel",
         )
         hint.grid(row=1, column=0, columnspan=2, sticky="w", pady=(6, 0))
@@ -209,28 +238,117 @@ class ChatApp(tk.Tk):
         self.text.see("end")
         self.text.config(state="disabled")
 
+    def _append_text(self, content: str) -> None:
+        """Append raw text (e.g. a streamed chunk) to the chat text widget."""
+        self.text.config(state="normal")
+        self.text.insert("end", content)
+        self.text.see("end")
+        self.text.config(state="disabled")
+
     def _load_initial_history(self) -> None:
         """Load a bit of history into the chat area on startup."""
         self._append_line("AI:", "Hi, I'm your local dev assistant. What are we coding today?")
 
     def _on_send(self, event: tk.Event | None = None) -> None:
         user_input = self.entry_var.get().strip()
-        if not user_input:
+        if not user_input or self._closing:
             return
 
         self.entry_var.set("")
         self._append_line("You:", user_input)
+        self.worker.submit(user_input)
 
-        reply = self.session.handle_user_input(user_input)
+    def _on_cancel(self, event: tk.Event | None = None) -> None:
+        self.worker.cancel()
 
-        if reply == self.session.EXIT_TOKEN:
-            self._append_line("AI:", "Goodbye 👋")
-            self.after(300, self.destroy)
+    def _on_close(self) -> None:
+        # /exit and the window's close button may both get here; close once.
+        if self._closing:
             return
+        self._closing = True
+        self.entry.config(state="disabled")
+        self.send_btn.config(state="disabled")
+        self.status_var.set("Saving history…")
+        # Queued turns finish and history is written off the Tk thread.
+        closer = threading.Thread(target=self._shut_down, name="gui-close", daemon=True)
+        closer.start()
+        self._finish_close(closer)
+
+    def _shut_down(self) -> None:
+        self.worker.close()
+        try:
+            self.history.close()
+        except Exception as exc:
+            print(f"⚠️ History could not be saved: {exc}", file=sys.stderr)
+
+    def _finish_close(self, closer: threading.Thread) -> None:
+        if closer.is_alive():
+            self.after(POLL_MS, self._finish_close, closer)
+            return
+        self.destroy()
+
+    def _poll_worker(self) -> None:
+        """Drain worker events; streamed chunks are inserted once per poll."""
+        pending: list[str] = []
+
+        for event in self.worker.poll():
+            if event.kind == "start":
+                self.status_var.set("AI is typing…")
+            elif event.kind == "chunk":
+                if event.text == self.session.EXIT_TOKEN:
+                    self._flush(pending)
+                    self._append_line("AI:", "Goodbye 👋")
+                    self.after(300, self._on_close)
+                    return
+                if not self._reply_open:
+                    pending.append("AI: ")
+                    self._reply_open = True
+                pending.append(event.text)
+            else:
+                # "done" | "cancelled" | "error" end the turn
+                self.status_var.set("")
+                if event.kind == "cancelled":
+                    pending.append(" [cancelled]" if self._reply_open else "AI: [cancelled]")
+                elif event.kind == "error":
+                    prefix = " " if self._reply_open else "AI: "
+                    pending.append(f"{prefix}[error: {event.text}]")
+                if self._reply_open or event.kind != "done":
+                    pending.append("\n")
+                self._reply_open = False
+
+                if event.kind == "done":
+                    reply = event.text
+                    # Update little bubble above the robot with a short preview
+                    self.bubble_var.set(reply[:80] + ("…" if len(reply) > 80 else ""))
+
+        self._flush(pending)
+        self.after(POLL_MS, self._poll_worker)
+
+    def _flush(self, pending: list[str]) -> None:
+        if pending:
+            self._append_text("".join(pending))
+
+
+# --- History (opened off the UI thread) ---------------------------------------
+
+
+def open_history():
+    """Searchable history whose writes happen on a background thread, off the chat turn."""
+    from src.storage.history import FileHistoryStorage
+    from src.storage.search import SearchIndex, SearchableHistory
+    from src.storage.write_behind import WriteBehindHistory
+
+    storage = FileHistoryStorage(
+        HISTORY_FILE, delta=True, max_bytes=HISTORY_SEGMENT_BYTES, compression="gzip"
+    )
+    return WriteBehindHistory(SearchableHistory(storage, SearchIndex(SEARCH_FILE)))
+
 
-        self._append_line("AI:", reply)
-        # Update little bubble above the robot with a short preview
-        self.bubble_var.set(reply[:80] + ("…" if len(reply) > 80 else ""))
+def load_indexes(history) -> None:
+    """Bring the history index and the search index up to date with the files."""
+    searchable = history.history
+    searchable.warm()
+    searchable.catch_up()
 
 
 # --- Small drawing helper -----------------------------------------------------
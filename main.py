@@ -1,34 +1,272 @@
 """
 Minimal terminal chat UI for the AI Assistant.
+
+Batch mode streams prompts from a JSONL file and writes one result line
+per prompt, in input order:
+
+    python3 main.py --batch input.jsonl --out output.jsonl
+
+Input lines look like {"id": "q1", "prompt": "...", "mode": "chat"} or
+carry a full {"messages": [{"role": ..., "content": ...}]} list.
+
+Startup is kept short because scripts run the CLI many times a minute:
+heavy modules (storage, search, HTTP clients, profiling) are imported
+where they are used, and the interactive mode opens the history and its
+indexes on a background thread while the prompt is already shown (see
+``benchmarks/startup.py``).
 """
 
-from src.ai.provider import FakeAIProvider
-from src.core import AICore
-from src.core.app import AssistantSession
-from src.storage.history import FileHistoryStorage
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Iterator, Tuple
+
+from src.core.prewarm import Prewarm
+
+if TYPE_CHECKING:
+    from src.ai.provider import AICore, AIProvider
+    from src.core.metrics import Metrics
+    from src.core.models import Conversation
+    from src.storage.write_behind import WriteBehindHistory
 
 
 HISTORY_FILE = "history.jsonl"
+SEARCH_FILE = "history.search.db"
+# Rotate history.jsonl into gzip-compressed segments past this size
+HISTORY_SEGMENT_BYTES = 16 * 1024 * 1024
+# Names accepted by src.storage.codecs.get_codec and WriteBehindHistory,
+# listed here so parsing the command line imports no storage code
+CODECS = ("auto", "json", "orjson", "msgspec", "msgpack")
+FSYNC_POLICIES = ("never", "interval", "always")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AI Assistant CLI")
+    parser.add_argument("--batch", metavar="INPUT", help="JSONL file of prompts to answer")
+    parser.add_argument("--out", metavar="OUTPUT", help="JSONL file for batch results")
+    parser.add_argument("--workers", type=int, default=8, help="parallel provider calls")
+    parser.add_argument("--batch-size", type=int, default=1, help="prompts per provider call")
+    parser.add_argument("--mode", default="chat", help="mode for prompts that don't set one")
+    parser.add_argument("--metrics", action="store_true", help="collect timings, see /stats")
+    parser.add_argument("--profile", metavar="FILE", help="cProfile chat turns into FILE (implies --metrics)")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="interval", help="history fsync policy")
+    parser.add_argument("--codec", choices=CODECS, default="auto", help="history codec for new files")
+    parser.add_argument("--base-url", help="OpenAI-compatible API to use instead of the fake provider")
+    parser.add_argument("--model", help="model name for --base-url")
+    args = parser.parse_args(argv)
+    if args.batch and not args.out:
+        parser.error("--batch needs --out")
+    if args.base_url and not args.model:
+        parser.error("--base-url needs --model")
+    return args
+
+
+def make_provider(args: argparse.Namespace) -> AIProvider:
+    """The provider chosen on the command line; HTTP clients load only when used."""
+    if args.base_url:
+        from src.ai.http_provider import OpenAICompatibleProvider
+
+        return OpenAICompatibleProvider(args.base_url, args.model, api_key=os.environ.get("OPENAI_API_KEY"))
+    from src.ai.provider import FakeAIProvider
+
+    return FakeAIProvider()
+
+
+def open_history(args: argparse.Namespace, metrics: Metrics | None = None) -> WriteBehindHistory:
+    """Searchable history whose writes happen on a background thread, off the chat turn.
+
+    With ``metrics`` the storage under the writer thread is instrumented,
+    so the timings and byte counts are those of the actual writes.
+    """
+    from src.storage.history import FileHistoryStorage
+    from src.storage.search import SearchIndex, SearchableHistory
+    from src.storage.write_behind import WriteBehindHistory
+
+    storage = FileHistoryStorage(
+        HISTORY_FILE,
+        delta=True,
+        max_bytes=HISTORY_SEGMENT_BYTES,
+        compression="gzip",
+        codec=args.codec,
+    )
+    history = SearchableHistory(storage, SearchIndex(SEARCH_FILE))
+    if metrics is not None:
+        from src.core.metrics import InstrumentedHistory
+
+        history = InstrumentedHistory(history, metrics)
+    return WriteBehindHistory(history, fsync=args.fsync)
 
 
-def main():
+def load_indexes(history: WriteBehindHistory) -> None:
+    """Bring the history index and the search index up to date with the files."""
+    searchable = history.history
+    searchable.warm()
+    searchable.catch_up()
+
+
+def read_prompts(path: str, default_mode: str, pending: Deque[Tuple[str, str | None]]) -> Iterator[Conversation]:
+    """Yield one Conversation per input line, recording ``(id, None)`` in ``pending``.
+
+    A line that can't be read as a prompt is recorded as ``(id, error)``
+    instead and yields nothing.
+    """
+    from src.core.models import Conversation, Message, Role
+
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            prompt_id = str(number)
+            try:
+                raw = json.loads(line)
+                if not isinstance(raw, dict):
+                    raise ValueError("expected a JSON object")
+                prompt_id = str(raw.get("id", number))
+                conv = Conversation(mode=raw.get("mode", default_mode))
+                for m in raw.get("messages", []):
+                    conv.add_message(Message(role=Role(m["role"]), content=m["content"]))
+                if "prompt" in raw:
+                    conv.add_user_message(raw["prompt"])
+            except (ValueError, KeyError, TypeError) as exc:
+                pending.append((prompt_id, f"line {number}: invalid prompt ({exc!r})"))
+                continue
+            pending.append((prompt_id, None))
+            yield conv
+
+
+def run_batch(core: AICore, args: argparse.Namespace) -> int:
+    """Answer every prompt of ``args.batch`` into ``args.out``; returns the count."""
+    pending: Deque[Tuple[str, str | None]] = deque()
+    prompts = read_prompts(args.batch, args.mode, pending)
+    count = 0
+    with open(args.out, "w", encoding="utf-8") as out:
+
+        def write(record: dict) -> None:
+            nonlocal count
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+
+        def write_errors() -> None:
+            # Bad lines read ahead of the next reply keep their input position
+            while pending and pending[0][1] is not None:
+                prompt_id, error = pending.popleft()
+                write({"id": prompt_id, "error": error})
+
+        replies = core.iter_replies(
+            prompts,
+            max_workers=args.workers,
+            batch_size=args.batch_size,
+            return_exceptions=True,
+        )
+        for reply in replies:
+            write_errors()
+            record = {"id": pending.popleft()[0]}
+            if isinstance(reply, Exception):
+                record["error"] = str(reply)
+            else:
+                record["reply"] = reply.content
+            write(record)
+        write_errors()
+    return count
+
+
+def startup_error(warm: Prewarm, *names: str) -> str | None:
+    """Wait for start-up tasks ``names``; describe the first one that failed."""
+    for name in names:
+        try:
+            warm.get(name)
+        except Exception as exc:
+            return f"Could not open the {name}: {exc}"
+    return None
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    metrics = None
+    if args.metrics or args.profile:
+        from src.core.metrics import InstrumentedCore, InstrumentedProvider, Metrics
+
+        metrics = Metrics()
+        if args.profile:
+            metrics.enable_profiling()
+    from src.ai.provider import AICore
+
+    if args.batch:
+        provider = make_provider(args)
+        if metrics is not None:
+            provider = InstrumentedProvider(provider, metrics)
+        count = run_batch(AICore(provider), args)
+        print(f"Wrote {count} results to {args.out}")
+        if metrics is not None:
+            print(metrics.render())
+        return 0
+
+    # The provider, history and indexes open in the background; the first
+    # turn (or command) that needs one of them waits for it.
+    warm = Prewarm()
+    provider = warm.add("provider", lambda: make_provider(args))
+    writer = warm.add("history", lambda: open_history(args, metrics))
+    warm.add("indexes", lambda: load_indexes(warm.get("history")))
+    warm.start()
+
     print("🤖 AI Assistant CLI")
-    print("Type your messages. Commands: /exit, /history\n")
+    print("Type your messages. Commands: /exit, /history, /search <terms>, /stats\n")
+
+    from src.core.app import AssistantSession
 
-    core = AICore(FakeAIProvider())
-    history = FileHistoryStorage(HISTORY_FILE)
-    session = AssistantSession.start(core=core, history=history, mode="chat")
+    if metrics is not None:
+        provider = InstrumentedProvider(provider, metrics)
+    core = AICore(provider)
+    if metrics is not None:
+        core = InstrumentedCore(core, metrics)
+    session = AssistantSession.start(core=core, history=writer, mode="chat", metrics=metrics)
 
-    while True:
-        user = input("You: ").strip()
-        reply = session.handle_user_input(user)
+    # Start-up errors are reported once, before the first turn; queued
+    # history saves are written however the loop ends.
+    started = reported = False
+    try:
+        while True:
+            try:
+                user = input("You: ").strip()
+            except (EOFError, KeyboardInterrupt):
+                print()
+                break
+            if not started:
+                error = startup_error(warm, "provider", "history")
+                if error is not None:
+                    print(f"⚠️ {error}")
+                    reported = True
+                    return 1
+                started = True
+            chunks = session.stream_user_input(user)
+            first = next(chunks, "")
 
-        if reply == session.EXIT_TOKEN:
-            print("Goodbye 👋")
-            break
+            if first == session.EXIT_TOKEN:
+                break
 
-        print(f"AI: {reply}")
+            # Print tokens as they arrive
+            print(f"AI: {first}", end="", flush=True)
+            for chunk in chunks:
+                print(chunk, end="", flush=True)
+            print()
+    finally:
+        error = startup_error(warm, "history")
+        if error is None:
+            try:
+                writer.close()
+            except Exception as exc:
+                print(f"⚠️ History could not be saved: {exc}")
+        elif not reported:
+            print(f"⚠️ {error}")
+        if args.profile:
+            metrics.dump_profile(args.profile)
+    print("Goodbye 👋")
+    return 0
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
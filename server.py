@@ -0,0 +1,103 @@
+"""
+HTTP/WebSocket server for the AI Assistant.
+
+    python3 server.py --port 8080
+
+Serves many concurrent sessions (see src/server/app.py for the routes).
+SIGINT/SIGTERM drain: running turns finish, sessions are saved, then the
+process exits. Measure it with ``python3 -m benchmarks.load_test``.
+"""
+
+import argparse
+import asyncio
+import signal
+
+from src.ai.coalesce import CoalescingProvider
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.metrics import InstrumentedProvider, Metrics
+from src.core.sessions import SessionManager
+from src.server.app import AssistantServer
+from src.storage.history import FileHistoryStorage
+from src.storage.search import SearchIndex, SearchableHistory
+from src.storage.write_behind import FSYNC_POLICIES, WriteBehindHistory
+
+
+HISTORY_FILE = "history.jsonl"
+SEARCH_FILE = "history.search.db"
+# Rotate history.jsonl into gzip-compressed segments past this size
+HISTORY_SEGMENT_BYTES = 16 * 1024 * 1024
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AI Assistant HTTP/WebSocket server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=32, help="threads running turns")
+    parser.add_argument("--max-inflight", type=int, default=256, help="concurrent turns before 503")
+    parser.add_argument("--max-sessions", type=int, default=1000, help="live sessions kept in memory")
+    parser.add_argument("--max-session-mb", type=float, default=None, help="memory cap for live sessions")
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="evict sessions idle this long (s)")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="shutdown grace period (s)")
+    parser.add_argument("--delay", type=float, default=0.0, help="FakeAIProvider latency (s, per chunk when streaming)")
+    parser.add_argument("--metrics", action="store_true", help="collect timings, see /stats and /metrics")
+    parser.add_argument("--fsync", choices=FSYNC_POLICIES, default="interval", help="history fsync policy")
+    return parser.parse_args(argv)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    metrics = Metrics() if args.metrics else None
+    provider = FakeAIProvider(delay=args.delay)
+    if metrics is not None:
+        provider = InstrumentedProvider(provider, metrics)
+    # Many users sending the same prompt at once share one provider call.
+    provider = CoalescingProvider(provider)
+    if metrics is not None:
+        metrics.add_source("coalesce", provider.usage)
+
+    storage = FileHistoryStorage(
+        HISTORY_FILE, delta=True, max_bytes=HISTORY_SEGMENT_BYTES, compression="gzip"
+    )
+    history = WriteBehindHistory(
+        SearchableHistory(storage, SearchIndex(SEARCH_FILE)),
+        fsync=args.fsync,
+    )
+    sessions = SessionManager(
+        AICore(provider),
+        history,
+        max_sessions=args.max_sessions,
+        max_bytes=int(args.max_session_mb * 1024 * 1024) if args.max_session_mb else None,
+        idle_timeout=args.idle_timeout,
+        metrics=metrics,
+    )
+    server = await AssistantServer(
+        sessions,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_inflight=args.max_inflight,
+        metrics=metrics,
+    ).start()
+    print(f"🤖 AI Assistant server on {server.base_url}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows: Ctrl+C raises KeyboardInterrupt instead
+            pass
+    try:
+        await stop.wait()
+    finally:
+        print("Draining…")
+        await server.shutdown(args.drain_timeout)
+        history.close()
+        print("Goodbye 👋")
+
+
+def main(argv=None):
+    asyncio.run(serve(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
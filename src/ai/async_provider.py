@@ -0,0 +1,151 @@
+"""
+Async counterparts of the provider layer.
+
+Async providers let many conversations share one event loop and overlap
+their provider latency. ``SyncProviderAdapter`` runs an existing sync
+provider in a thread pool so it can be used from async code.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Executor
+from typing import AsyncIterator, List, Protocol
+
+from src.ai.provider import AIProvider, check_batch
+from src.core.models import Conversation, Message, Role
+
+
+class AsyncAIProvider(Protocol):
+    """Protocol for async AI backends."""
+    async def generate(self, conversation: Conversation) -> str:
+        ...
+
+    def stream(self, conversation: Conversation) -> AsyncIterator[str]:
+        ...
+
+
+class AsyncFakeAIProvider:
+    """Async fake AI — echoes the user message without blocking the loop."""
+    def __init__(self, chunk_size: int = 8, delay: float = 0.0):
+        self.chunk_size = max(1, chunk_size)
+        self.delay = delay
+
+    async def generate(self, conversation: Conversation) -> str:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self._reply(conversation)
+
+    async def stream(self, conversation: Conversation) -> AsyncIterator[str]:
+        text = self._reply(conversation)
+        for i in range(0, len(text), self.chunk_size):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield text[i:i + self.chunk_size]
+
+    @staticmethod
+    def _reply(conversation: Conversation) -> str:
+        last_user = conversation.last_user_message()
+        if not last_user:
+            return "Hello! How can I help you?"
+        return f"🤖 I hear you said: {last_user}"
+
+
+_DONE = object()
+
+
+class SyncProviderAdapter:
+    """Expose a sync AIProvider as an AsyncAIProvider via a thread pool.
+
+    ``executor=None`` uses the event loop's default executor.
+    """
+    def __init__(self, provider: AIProvider, executor: Executor | None = None):
+        self.provider = provider
+        self.executor = executor
+
+    async def generate(self, conversation: Conversation) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.provider.generate, conversation)
+
+    async def stream(self, conversation: Conversation) -> AsyncIterator[str]:
+        stream = getattr(self.provider, "stream", None)
+        if stream is None:
+            yield await self.generate(conversation)
+            return
+
+        loop = asyncio.get_running_loop()
+        chunks = iter(stream(conversation))
+        while True:
+            chunk = await loop.run_in_executor(self.executor, next, chunks, _DONE)
+            if chunk is _DONE:
+                return
+            yield chunk
+
+
+class AsyncReplyStream:
+    """Async iterable of reply chunks that becomes a Message once exhausted."""
+
+    def __init__(self, conversation: Conversation, chunks: AsyncIterator[str]):
+        self.conversation = conversation
+        self._chunks = chunks
+        self._parts: list[str] = []
+        self.message: Message | None = None
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for chunk in self._chunks:
+            if not chunk:
+                continue
+            self._parts.append(chunk)
+            yield chunk
+        self.message = Message(role=Role.ASSISTANT, content="".join(self._parts))
+        self.conversation.add_message(self.message)
+
+
+class AsyncAICore:
+    """Bridge between Conversation and an AsyncAIProvider."""
+
+    def __init__(self, provider: AsyncAIProvider):
+        self.provider = provider
+
+    def start_conversation(self, mode: str) -> Conversation:
+        return Conversation(mode=mode)
+
+    async def generate_reply(self, conversation: Conversation) -> Message:
+        reply_text = await self.provider.generate(conversation)
+        msg = Message(role=Role.ASSISTANT, content=reply_text)
+        conversation.add_message(msg)
+        return msg
+
+    async def generate_replies(
+        self,
+        conversations: List[Conversation],
+        max_concurrency: int = 8,
+        batch_size: int = 1,
+    ) -> List[Message]:
+        """Reply to many conversations with at most ``max_concurrency`` calls in flight.
+
+        Uses the provider's ``generate_batch`` for groups of ``batch_size``
+        when it has one; results keep input order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        batch_call = getattr(self.provider, "generate_batch", None)
+        size = max(1, batch_size)
+        batches = [conversations[i:i + size] for i in range(0, len(conversations), size)]
+
+        async def run(batch: List[Conversation]) -> List[str]:
+            async with semaphore:
+                if batch_call is not None and len(batch) > 1:
+                    return check_batch(batch, await batch_call(batch))
+                return [await self.provider.generate(conv) for conv in batch]
+
+        results = await asyncio.gather(*(run(b) for b in batches))
+        replies: List[Message] = []
+        for batch, texts in zip(batches, results):
+            for conv, text in zip(batch, texts):
+                msg = Message(role=Role.ASSISTANT, content=text)
+                conv.add_message(msg)
+                replies.append(msg)
+        return replies
+
+    def stream_reply(self, conversation: Conversation) -> AsyncReplyStream:
+        return AsyncReplyStream(conversation, self.provider.stream(conversation))
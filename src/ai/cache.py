@@ -0,0 +1,199 @@
+"""
+Response cache in front of an AIProvider.
+
+Replies are keyed by a stable hash of the conversation mode and its
+normalized payload (optionally only the last N messages). A bounded
+in-memory LRU with TTL answers repeated prompts without calling the
+provider; an optional SQLite tier keeps entries across restarts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from src.ai.provider import AIProvider
+from src.core.models import Conversation
+
+
+def cache_key(conversation: Conversation, last_n: int | None = None) -> str:
+    """Stable hash of mode + normalized payload (contents with outer whitespace stripped).
+
+    Inner whitespace is kept: prompts that differ only in indentation (code)
+    must not share a reply.
+    """
+    payload = conversation.to_ai_payload()
+    if last_n is not None:
+        payload = payload[-last_n:] if last_n > 0 else []
+    normalized = [[m["role"], m["content"].strip()] for m in payload]
+    raw = json.dumps([conversation.mode, normalized], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SqliteCacheStore:
+    """On-disk cache tier: one table of key → (reply, expiry timestamp)."""
+
+    def __init__(self, db_path: str | Path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS replies ("
+            "key TEXT PRIMARY KEY, reply TEXT NOT NULL, expires REAL)"
+        )
+
+    def get(self, key: str) -> Tuple[str, float | None] | None:
+        """``(reply, seconds left to live or None)``, or None if absent or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT reply, expires FROM replies WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            reply, expires = row
+            if expires is None:
+                return reply, None
+            remaining = expires - time.time()
+            if remaining <= 0:
+                self._conn.execute("DELETE FROM replies WHERE key = ?", (key,))
+                return None
+            return reply, remaining
+
+    def put(self, key: str, reply: str, ttl: float | None) -> None:
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO replies (key, reply, expires) VALUES (?, ?, ?)",
+                (key, reply, expires),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachingProvider:
+    """AIProvider wrapper that serves repeated prompts from a cache.
+
+    ``max_entries`` bounds the in-memory LRU, ``ttl`` (seconds, None = never)
+    expires entries, ``last_n`` restricts the key to the last N messages and
+    ``disk_path`` enables the persistent SQLite tier.
+    """
+
+    def __init__(
+        self,
+        provider: AIProvider,
+        max_entries: int = 1024,
+        ttl: float | None = 3600.0,
+        last_n: int | None = None,
+        disk_path: str | Path | None = None,
+    ):
+        self.provider = provider
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.last_n = last_n
+        self.stats = CacheStats()
+        self.disk = SqliteCacheStore(disk_path) if disk_path is not None else None
+        self._entries: "OrderedDict[str, Tuple[str, float | None]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def generate(self, conversation: Conversation) -> str:
+        key = cache_key(conversation, self.last_n)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+
+        reply = self.provider.generate(conversation)
+        self._store(key, reply)
+        return reply
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        key = cache_key(conversation, self.last_n)
+        cached = self._lookup(key)
+        if cached is not None:
+            yield cached
+            return
+
+        stream = getattr(self.provider, "stream", None)
+        if stream is None:
+            reply = self.provider.generate(conversation)
+            self._store(key, reply)
+            yield reply
+            return
+
+        parts: list[str] = []
+        for chunk in stream(conversation):
+            parts.append(chunk)
+            yield chunk
+        # Only complete replies are cached.
+        self._store(key, "".join(parts))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _lookup(self, key: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                reply, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    return reply
+                del self._entries[key]
+                self.stats.expirations += 1
+
+        if self.disk is not None:
+            found = self.disk.get(key)
+            if found is not None:
+                reply, remaining = found
+                with self._lock:
+                    self.stats.hits += 1
+                    self.stats.disk_hits += 1
+                    self._remember(key, reply, remaining)  # expires with the disk row
+                return reply
+
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def _store(self, key: str, reply: str) -> None:
+        with self._lock:
+            self._remember(key, reply, self.ttl)
+        if self.disk is not None:
+            self.disk.put(key, reply, self.ttl)
+
+    def _remember(self, key: str, reply: str, ttl: float | None) -> None:
+        expires = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (reply, expires)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
@@ -0,0 +1,294 @@
+"""
+Single-flight coalescing of identical in-flight provider requests.
+
+Requests are keyed like the response cache (``cache_key``: mode plus the
+normalized payload). While a request for a key is in flight, identical
+requests don't call the provider again: they wait for the same result, or
+for streams, replay the chunks received so far and then follow the live
+stream. Nothing is kept once the call finishes (that's the cache's job),
+so a request that arrives later calls the provider again.
+
+``CoalescingProvider`` serves threaded callers, ``AsyncCoalescingProvider``
+asyncio ones.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterator, List
+
+from src.ai.async_provider import AsyncAIProvider
+from src.ai.cache import cache_key
+from src.ai.provider import AIProvider, generate_batch
+from src.core.models import Conversation
+
+
+_END = object()
+
+
+@dataclass
+class CoalescingStats:
+    calls: int = 0       # requests received
+    upstream: int = 0    # requests sent to the provider
+
+    @property
+    def merged(self) -> int:
+        """Requests answered by another request's upstream call."""
+        return self.calls - self.upstream
+
+
+class _Flight:
+    """One upstream call and everything its waiters need."""
+
+    def __init__(self) -> None:
+        self.result: str | None = None
+        self.error: BaseException | None = None
+        # Streams only:
+        self.chunks: List[str] = []
+        self.upstream = None         # the provider's chunk iterator
+        self.done = False
+        self.fetching = False        # a subscriber is pulling the next chunk
+        self.pull = None             # async: the task pulling the next chunk
+        self.subscribers = 0
+
+
+class CoalescingProvider:
+    """AIProvider wrapper that merges concurrent identical requests (threads).
+
+    A stream's subscribers take turns pulling the next chunk from the
+    provider, so the stream goes on as long as any of them is reading; it
+    is closed once every subscriber has left.
+    """
+
+    def __init__(self, provider: AIProvider, last_n: int | None = None):
+        self.provider = provider
+        self.last_n = last_n
+        self.stats = CoalescingStats()
+        self._calls: Dict[str, _Flight] = {}
+        self._streams: Dict[str, _Flight] = {}
+        self._cond = threading.Condition()
+
+    def generate(self, conversation: Conversation) -> str:
+        key = cache_key(conversation, self.last_n)
+        with self._cond:
+            self.stats.calls += 1
+            flight = self._calls.get(key)
+            if flight is not None:
+                while flight.result is None and flight.error is None:
+                    self._cond.wait()
+                return _outcome(flight)
+            flight = self._calls[key] = _Flight()
+            self.stats.upstream += 1
+
+        try:
+            flight.result = self.provider.generate(conversation)
+        except BaseException as exc:
+            flight.error = exc
+        with self._cond:
+            del self._calls[key]
+            self._cond.notify_all()
+        return _outcome(flight)
+
+    def generate_batch(self, conversations: List[Conversation]) -> List[str]:
+        # Batches are already grouped by the caller; pass them straight through.
+        return generate_batch(self.provider, conversations)
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        stream = getattr(self.provider, "stream", None)
+        if stream is None:
+            yield self.generate(conversation)
+            return
+
+        key = cache_key(conversation, self.last_n)
+        with self._cond:
+            self.stats.calls += 1
+            flight = self._streams.get(key)
+            if flight is None:
+                flight = self._streams[key] = _Flight()
+                flight.upstream = iter(stream(conversation))
+                self.stats.upstream += 1
+            flight.subscribers += 1
+
+        position = 0
+        try:
+            while True:
+                with self._cond:
+                    while position >= len(flight.chunks) and not flight.done and flight.fetching:
+                        self._cond.wait()
+                    if position < len(flight.chunks):
+                        part = flight.chunks[position]
+                        position += 1
+                    elif flight.done:
+                        if flight.error is not None:
+                            raise flight.error
+                        return
+                    else:
+                        flight.fetching = True
+                        part = None
+                if part is not None:
+                    yield part
+                    continue
+                self._fetch(key, flight)
+        finally:
+            self._unsubscribe(key, flight)
+
+    def usage(self) -> Dict[str, float]:
+        """Counters for ``Metrics.add_source``."""
+        return {
+            "calls": self.stats.calls,
+            "upstream": self.stats.upstream,
+            "merged": self.stats.merged,
+            "inflight": len(self._calls) + len(self._streams),
+        }
+
+    def __getattr__(self, name: str):
+        return getattr(self.provider, name)
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _fetch(self, key: str, flight: _Flight) -> None:
+        error = None
+        try:
+            part = next(flight.upstream, _END)
+        except BaseException as exc:
+            part, error = _END, exc
+        with self._cond:
+            flight.fetching = False
+            if part is _END:
+                flight.done = True
+                flight.error = error
+                if self._streams.get(key) is flight:
+                    del self._streams[key]  # later requests start a new call
+            else:
+                flight.chunks.append(part)
+            self._cond.notify_all()
+
+    def _unsubscribe(self, key: str, flight: _Flight) -> None:
+        with self._cond:
+            flight.subscribers -= 1
+            abandoned = flight.subscribers == 0 and not flight.done
+            if abandoned:
+                flight.done = True
+                if self._streams.get(key) is flight:
+                    del self._streams[key]
+        if abandoned:
+            close = getattr(flight.upstream, "close", None)
+            if close is not None:
+                close()
+
+
+class AsyncCoalescingProvider:
+    """AsyncAIProvider wrapper that merges concurrent identical requests (asyncio).
+
+    The upstream call, and each pull of a stream's next chunk, runs as its
+    own task, so a waiter that is cancelled doesn't cancel it for the others.
+    """
+
+    def __init__(self, provider: AsyncAIProvider, last_n: int | None = None):
+        self.provider = provider
+        self.last_n = last_n
+        self.stats = CoalescingStats()
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, _Flight] = {}
+        self._changed: Dict[str, asyncio.Condition] = {}
+
+    async def generate(self, conversation: Conversation) -> str:
+        key = cache_key(conversation, self.last_n)
+        self.stats.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            self.stats.upstream += 1
+            task = self._calls[key] = asyncio.ensure_future(self.provider.generate(conversation))
+            task.add_done_callback(lambda t: self._calls.pop(key, None) if self._calls.get(key) is t else None)
+        return await asyncio.shield(task)
+
+    async def stream(self, conversation: Conversation) -> AsyncIterator[str]:
+        stream = getattr(self.provider, "stream", None)
+        if stream is None:
+            yield await self.generate(conversation)
+            return
+
+        key = cache_key(conversation, self.last_n)
+        self.stats.calls += 1
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = self._streams[key] = _Flight()
+            flight.upstream = stream(conversation).__aiter__()
+            self._changed[key] = asyncio.Condition()
+            self.stats.upstream += 1
+        changed = self._changed[key]
+        flight.subscribers += 1
+
+        position = 0
+        try:
+            while True:
+                if position < len(flight.chunks):
+                    position += 1
+                    yield flight.chunks[position - 1]
+                    continue
+                if flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                if flight.pull is None:
+                    flight.pull = asyncio.ensure_future(self._pull(key, flight, changed))
+                async with changed:
+                    await changed.wait_for(lambda: position < len(flight.chunks) or flight.done)
+        finally:
+            await self._unsubscribe(key, flight)
+
+    def usage(self) -> Dict[str, float]:
+        return {
+            "calls": self.stats.calls,
+            "upstream": self.stats.upstream,
+            "merged": self.stats.merged,
+            "inflight": len(self._calls) + len(self._streams),
+        }
+
+    def __getattr__(self, name: str):
+        return getattr(self.provider, name)
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    async def _pull(self, key: str, flight: _Flight, changed: asyncio.Condition) -> None:
+        error = None
+        try:
+            part = await flight.upstream.__anext__()
+        except StopAsyncIteration:
+            part = _END
+        except Exception as exc:
+            part, error = _END, exc
+        flight.pull = None
+        if part is _END:
+            flight.done = True
+            flight.error = error
+            self._forget(key, flight)
+        else:
+            flight.chunks.append(part)
+        async with changed:
+            changed.notify_all()
+
+    async def _unsubscribe(self, key: str, flight: _Flight) -> None:
+        flight.subscribers -= 1
+        if flight.subscribers == 0 and not flight.done:
+            flight.done = True
+            self._forget(key, flight)
+            if flight.pull is not None:
+                flight.pull.cancel()
+                return
+            aclose = getattr(flight.upstream, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._streams.get(key) is flight:
+            del self._streams[key]
+            del self._changed[key]
+
+
+def _outcome(flight: _Flight) -> str:
+    if flight.error is not None:
+        raise flight.error
+    return flight.result
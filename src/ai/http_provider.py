@@ -0,0 +1,251 @@
+"""
+OpenAI-compatible HTTP providers.
+
+One long-lived ``httpx.Client`` / ``httpx.AsyncClient`` is kept per provider
+so requests reuse pooled keep-alive connections (HTTP/2 when the ``h2``
+package is installed). Transient failures are retried with exponential
+backoff and full jitter.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import random
+import time
+from typing import AsyncIterator, Iterator
+
+import httpx
+
+from src.core.context import ContextManager
+from src.core.models import Conversation
+
+
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class ProviderError(RuntimeError):
+    """Raised when the backend keeps failing or returns an unusable response."""
+
+
+class _OpenAICompatibleBase:
+    """Request building, response parsing and retry policy shared by both clients."""
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: str | None = None,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        max_retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 8.0,
+        http2: bool | None = None,
+        max_connections: int = 20,
+        context: ContextManager | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        # Budgets/trims the payload; None sends the whole conversation.
+        self.context = context
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        if http2 is None:
+            http2 = importlib.util.find_spec("h2") is not None
+
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+
+        self._client_kwargs = dict(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            http2=http2,
+        )
+
+    def _body(self, conversation: Conversation, stream: bool = False) -> dict:
+        if self.context is not None:
+            messages = self.context.payload(conversation)
+        else:
+            messages = conversation.to_ai_payload()
+        body = {"model": self.model, "messages": messages}
+        if stream:
+            body["stream"] = True
+        return body
+
+    def _backoff(self, attempt: int, response: httpx.Response | None = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _should_retry(self, attempt: int, response: httpx.Response | None) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        return response is None or response.status_code in RETRY_STATUSES
+
+    @staticmethod
+    def _parse_reply(response: httpx.Response) -> str:
+        try:
+            return response.json()["choices"][0]["message"]["content"] or ""
+        except (ValueError, KeyError, IndexError, TypeError) as exc:
+            raise ProviderError(f"Malformed completion response: {response.text[:200]}") from exc
+
+    @staticmethod
+    def _parse_sse_line(line: str) -> str | None:
+        """Return the content delta of one SSE line, "" to skip, None at [DONE]."""
+        if not line.startswith("data:"):
+            return ""
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return None
+        try:
+            delta = json.loads(data)["choices"][0].get("delta", {})
+        except (ValueError, KeyError, IndexError) as exc:
+            raise ProviderError(f"Malformed stream event: {data[:200]}") from exc
+        return delta.get("content") or ""
+
+    @staticmethod
+    def _error(response: httpx.Response | None, exc: Exception | None) -> ProviderError:
+        if response is not None:
+            return ProviderError(f"Provider returned HTTP {response.status_code}: {response.text[:200]}")
+        return ProviderError(f"Provider request failed: {exc}")
+
+
+class OpenAICompatibleProvider(_OpenAICompatibleBase):
+    """Sync AIProvider for any OpenAI-compatible ``/chat/completions`` endpoint."""
+
+    def __init__(self, base_url: str, model: str, **kwargs):
+        super().__init__(base_url, model, **kwargs)
+        self.client = httpx.Client(**self._client_kwargs)
+
+    def generate(self, conversation: Conversation) -> str:
+        response = self._post(self._body(conversation))
+        return self._parse_reply(response)
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        body = self._body(conversation, stream=True)
+        attempt = 0
+        yielded = False
+        while True:
+            try:
+                with self.client.stream("POST", "/chat/completions", json=body) as response:
+                    if response.status_code == 200:
+                        for line in response.iter_lines():
+                            chunk = self._parse_sse_line(line)
+                            if chunk is None:
+                                return
+                            if chunk:
+                                yielded = True
+                                yield chunk
+                        return
+                    response.read()
+                    failed, error = response, None
+            except httpx.TransportError as exc:
+                failed, error = None, exc
+
+            # A stream that already produced output cannot be replayed.
+            if yielded or not self._should_retry(attempt, failed):
+                raise self._error(failed, error)
+            time.sleep(self._backoff(attempt, failed))
+            attempt += 1
+
+    def close(self) -> None:
+        self.client.close()
+
+    def __enter__(self) -> "OpenAICompatibleProvider":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _post(self, body: dict) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = self.client.post("/chat/completions", json=body)
+                if response.status_code == 200:
+                    return response
+                failed, error = response, None
+            except httpx.TransportError as exc:
+                failed, error = None, exc
+
+            if not self._should_retry(attempt, failed):
+                raise self._error(failed, error)
+            time.sleep(self._backoff(attempt, failed))
+            attempt += 1
+
+
+class AsyncOpenAICompatibleProvider(_OpenAICompatibleBase):
+    """AsyncAIProvider for any OpenAI-compatible ``/chat/completions`` endpoint."""
+
+    def __init__(self, base_url: str, model: str, **kwargs):
+        super().__init__(base_url, model, **kwargs)
+        self.client = httpx.AsyncClient(**self._client_kwargs)
+
+    async def generate(self, conversation: Conversation) -> str:
+        response = await self._post(self._body(conversation))
+        return self._parse_reply(response)
+
+    async def stream(self, conversation: Conversation) -> AsyncIterator[str]:
+        body = self._body(conversation, stream=True)
+        attempt = 0
+        yielded = False
+        while True:
+            try:
+                async with self.client.stream("POST", "/chat/completions", json=body) as response:
+                    if response.status_code == 200:
+                        async for line in response.aiter_lines():
+                            chunk = self._parse_sse_line(line)
+                            if chunk is None:
+                                return
+                            if chunk:
+                                yielded = True
+                                yield chunk
+                        return
+                    await response.aread()
+                    failed, error = response, None
+            except httpx.TransportError as exc:
+                failed, error = None, exc
+
+            if yielded or not self._should_retry(attempt, failed):
+                raise self._error(failed, error)
+            await asyncio.sleep(self._backoff(attempt, failed))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncOpenAICompatibleProvider":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _post(self, body: dict) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self.client.post("/chat/completions", json=body)
+                if response.status_code == 200:
+                    return response
+                failed, error = response, None
+            except httpx.TransportError as exc:
+                failed, error = None, exc
+
+            if not self._should_retry(attempt, failed):
+                raise self._error(failed, error)
+            await asyncio.sleep(self._backoff(attempt, failed))
+            attempt += 1
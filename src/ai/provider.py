@@ -2,25 +2,107 @@
 Fake AI provider (later can be replaced with real API: OpenAI, Gemini, etc.)
 """
 
-from typing import Protocol
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Iterable, Iterator, List, Protocol, Tuple
 from src.core.models import Conversation, Message, Role
 
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
 
 class AIProvider(Protocol):
-    """Protocol for plugging different AI backends."""
+    """Protocol for plugging different AI backends.
+
+    ``stream`` is optional: providers without it are streamed as one chunk.
+    ``generate_batch`` is optional too: without it ``generate_batch()``
+    below loops over ``generate``.
+    """
     def generate(self, conversation: Conversation) -> str:
         ...
 
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        ...
+
+    def generate_batch(self, conversations: List[Conversation]) -> List[str]:
+        ...
+
+
+def generate_batch(provider: AIProvider, conversations: List[Conversation]) -> List[str]:
+    """Use the provider's batch endpoint when it has one, else loop."""
+    batch = getattr(provider, "generate_batch", None)
+    if batch is not None:
+        return check_batch(conversations, batch(conversations))
+    return [provider.generate(conv) for conv in conversations]
+
+
+def check_batch(conversations: List[Conversation], texts: List[str]) -> List[str]:
+    """Return ``texts``, or raise ValueError unless there is one per conversation."""
+    if len(texts) != len(conversations):
+        raise ValueError(f"provider returned {len(texts)} replies for {len(conversations)} conversations")
+    return texts
+
 
 class FakeAIProvider:
-    """Simple fake AI — echoes the user message."""
+    """Simple fake AI — echoes the user message.
+
+    ``chunk_size`` and ``delay`` control ``stream``: the reply is cut into
+    chunks of that many characters, sleeping ``delay`` seconds before each,
+    so time-to-first-token can be tested offline. ``generate`` sleeps
+    ``delay`` once, to simulate request latency.
+    """
+    def __init__(self, chunk_size: int = 8, delay: float = 0.0):
+        self.chunk_size = max(1, chunk_size)
+        self.delay = delay
+
     def generate(self, conversation: Conversation) -> str:
+        if self.delay:
+            time.sleep(self.delay)
+        return self._reply(conversation)
+
+    def generate_batch(self, conversations: List[Conversation]) -> List[str]:
+        if self.delay:
+            time.sleep(self.delay)
+        return [self._reply(conv) for conv in conversations]
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        text = self._reply(conversation)
+        for i in range(0, len(text), self.chunk_size):
+            if self.delay:
+                time.sleep(self.delay)
+            yield text[i:i + self.chunk_size]
+
+    @staticmethod
+    def _reply(conversation: Conversation) -> str:
         last_user = conversation.last_user_message()
         if not last_user:
             return "Hello! How can I help you?"
         return f"🤖 I hear you said: {last_user}"
 
 
+class ReplyStream:
+    """Iterable of reply chunks that becomes a Message once exhausted.
+
+    After iteration finishes, the assembled reply is appended to the
+    conversation and available as ``message``.
+    """
+
+    def __init__(self, conversation: Conversation, chunks: Iterator[str]):
+        self.conversation = conversation
+        self._chunks = chunks
+        self._parts: list[str] = []
+        self.message: Message | None = None
+
+    def __iter__(self) -> Iterator[str]:
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self._parts.append(chunk)
+            yield chunk
+        self.message = Message(role=Role.ASSISTANT, content="".join(self._parts))
+        self.conversation.add_message(self.message)
+
+
 class AICore:
     """Bridge between Conversation and an AIProvider."""
 
@@ -33,5 +115,77 @@ class AICore:
     def generate_reply(self, conversation: Conversation) -> Message:
         reply_text = self.provider.generate(conversation)
         msg = Message(role=Role.ASSISTANT, content=reply_text)
-        conversation.messages.append(msg)
-        return msg
\ No newline at end of file
+        conversation.add_message(msg)
+        return msg
+
+    def stream_reply(self, conversation: Conversation) -> ReplyStream:
+        stream = getattr(self.provider, "stream", None)
+        if stream is None:
+            chunks = iter([self.provider.generate(conversation)])
+        else:
+            chunks = stream(conversation)
+        return ReplyStream(conversation, chunks)
+
+    def generate_replies(
+        self,
+        conversations: Iterable[Conversation],
+        max_workers: int = 8,
+        batch_size: int = 1,
+    ) -> List[Message]:
+        """Reply to many conversations in parallel; results keep input order."""
+        return list(self.iter_replies(conversations, max_workers, batch_size))
+
+    def iter_replies(
+        self,
+        conversations: Iterable[Conversation],
+        max_workers: int = 8,
+        batch_size: int = 1,
+        return_exceptions: bool = False,
+    ) -> Iterator[Message | Exception]:
+        """Yield replies in input order while keeping a bounded number in flight.
+
+        Conversations are grouped ``batch_size`` at a time into one
+        ``generate_batch`` call, and at most ``max_workers`` batches run at
+        once on a thread pool. Input is consumed lazily, so arbitrarily long
+        streams of prompts never sit in memory. With ``return_exceptions``
+        a failed batch yields its exception for each of its conversations
+        instead of raising.
+        """
+        from concurrent.futures import ThreadPoolExecutor  # not needed for single chats
+
+        pending: Deque[Tuple[List[Conversation], "Future"]] = deque()
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for batch in _chunked(conversations, max(1, batch_size)):
+                pending.append((batch, pool.submit(generate_batch, self.provider, batch)))
+                if len(pending) >= max_workers * 2:
+                    yield from self._finish(*pending.popleft(), return_exceptions)
+            while pending:
+                yield from self._finish(*pending.popleft(), return_exceptions)
+
+    @staticmethod
+    def _finish(
+        batch: List[Conversation], future: "Future", return_exceptions: bool
+    ) -> Iterator[Message | Exception]:
+        try:
+            texts = future.result()
+        except Exception as exc:
+            if not return_exceptions:
+                raise
+            for _ in batch:
+                yield exc
+            return
+        for conv, text in zip(batch, texts):
+            msg = Message(role=Role.ASSISTANT, content=text)
+            conv.add_message(msg)
+            yield msg
+
+
+def _chunked(items: Iterable[Conversation], size: int) -> Iterator[List[Conversation]]:
+    batch: List[Conversation] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,352 @@
+"""
+Route requests across several AIProviders.
+
+``RoutingProvider`` is itself an AIProvider, so ``AICore`` (and every
+wrapper around providers) works unchanged. For each request it orders the
+healthy backends by the chosen strategy:
+
+- "weighted":           random, proportional to each backend's weight.
+- "least_outstanding":  fewest requests in flight per unit of weight.
+- "latency":            lowest recent latency (EWMA) times in-flight load;
+                        untried backends go first.
+
+The first backend gets the request. If it hasn't answered once its usual
+latency percentile (``hedge_percentile``) has passed, the same request is
+also sent to the next backend, and whichever answers first wins. A failure
+moves on to the next backend straight away. Each backend has a circuit
+breaker: after ``failure_threshold`` consecutive failures it is skipped for
+``reset_timeout`` seconds, then a single probe request decides whether it
+comes back.
+
+Streams are hedged on their first chunk; after that they stay on the
+backend that produced it.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Iterator, List, Sequence, Tuple
+
+from src.ai.provider import AIProvider, generate_batch
+from src.core.models import Conversation
+
+
+STRATEGIES = ("weighted", "least_outstanding", "latency")
+
+_END = object()  # a stream that ended before its first chunk
+
+
+class RoutingError(RuntimeError):
+    """No backend could answer (all failed or all circuits are open)."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open → half-open → closed."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._probing or self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def available(self) -> bool:
+        """Whether a request could be sent now (does not claim the probe)."""
+        with self._lock:
+            return self.opened_at is None or (
+                not self._probing and self.clock() - self.opened_at >= self.reset_timeout
+            )
+
+    def allow(self) -> bool:
+        """Claim permission to send one request."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._probing or self.clock() - self.opened_at < self.reset_timeout:
+                return False
+            self._probing = True  # half-open: exactly one probe
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._probing = False
+
+
+@dataclass(eq=False)
+class Backend:
+    """One provider behind the router, with its load and latency figures."""
+    name: str
+    provider: AIProvider
+    weight: float = 1.0
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    window: int = 256
+
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    hedges: int = 0          # hedged duplicates sent to this backend
+    wins: int = 0            # hedged races this backend won
+    ewma: float | None = None
+    _recent: Deque[float] = field(default_factory=deque, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def latency_percentile(self, q: float) -> float | None:
+        with self._lock:
+            ordered = sorted(self._recent)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def samples(self) -> int:
+        return len(self._recent)
+
+    def _started(self) -> None:
+        with self._lock:
+            self.outstanding += 1
+            self.requests += 1
+
+    def _finished(self, seconds: float, ok: bool) -> None:
+        with self._lock:
+            self.outstanding -= 1
+            if ok:
+                if len(self._recent) >= self.window:
+                    self._recent.popleft()
+                self._recent.append(seconds)
+                self.ewma = seconds if self.ewma is None else 0.8 * self.ewma + 0.2 * seconds
+            else:
+                self.failures += 1
+
+
+class RoutingProvider:
+    """AIProvider that spreads, hedges and fails over across ``backends``.
+
+    ``backends`` are providers, ``(name, provider)`` or ``(name, provider,
+    weight)`` tuples, or ``Backend`` objects. ``hedge_percentile`` (None
+    disables hedging) applies once a backend has ``hedge_min_samples``
+    latencies; before that ``hedge_delay`` (None = don't hedge) is used.
+    """
+
+    def __init__(
+        self,
+        backends: Sequence[AIProvider | Tuple | Backend],
+        strategy: str = "least_outstanding",
+        hedge_percentile: float | None = 0.95,
+        hedge_min_samples: int = 20,
+        hedge_delay: float | None = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_workers: int = 32,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}, not {strategy!r}")
+        self.strategy = strategy
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_delay = hedge_delay
+        self.clock = clock
+        self.backends: List[Backend] = [
+            self._backend(spec, i, failure_threshold, reset_timeout) for i, spec in enumerate(backends)
+        ]
+        if not self.backends:
+            raise ValueError("RoutingProvider needs at least one backend")
+        self.hedged = 0          # requests that sent a hedge
+        self._rng = rng or random.Random()
+        self._rotation = 0       # tie-breaker for equally loaded backends
+        self._lock = threading.Lock()  # picking + claiming a backend is atomic
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route")
+
+    # ──────────────────────────────────────────────────────────────
+    # AIProvider
+    def generate(self, conversation: Conversation) -> str:
+        return self._race(lambda backend: backend.provider.generate(conversation))
+
+    def generate_batch(self, conversations: List[Conversation]) -> List[str]:
+        return self._race(lambda backend: generate_batch(backend.provider, conversations))
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        def open_stream(backend: Backend) -> Tuple[Iterator[str], object]:
+            stream = getattr(backend.provider, "stream", None)
+            if stream is None:
+                return iter(()), backend.provider.generate(conversation)
+            chunks = iter(stream(conversation))
+            return chunks, next(chunks, _END)
+
+        winner, (chunks, first) = self._race(open_stream, discard=_close_stream, with_backend=True)
+        if first is _END:
+            return
+        yield first
+        try:
+            yield from chunks
+        except Exception:
+            winner.breaker.record_failure()
+            raise
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    # ──────────────────────────────────────────────────────────────
+    # Introspection
+    def usage(self) -> Dict[str, float]:
+        """Flat per-backend gauges (for ``Metrics.add_source``)."""
+        values: Dict[str, float] = {"hedged": self.hedged}
+        for b in self.backends:
+            values[f"{b.name}_outstanding"] = b.outstanding
+            values[f"{b.name}_requests"] = b.requests
+            values[f"{b.name}_failures"] = b.failures
+            values[f"{b.name}_hedge_wins"] = b.wins
+            values[f"{b.name}_open"] = int(b.breaker.state != "closed")
+            values[f"{b.name}_latency_p50"] = b.latency_percentile(0.5) or 0.0
+        return values
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    # ──────────────────────────────────────────────────────────────
+    # Routing
+    def order(self) -> List[Backend]:
+        """Backends to try for the next request, best first (healthy ones only)."""
+        healthy = [b for b in self.backends if b.breaker.available()]
+        if self.strategy == "weighted":
+            return self._weighted_order(healthy)
+        self._rotation += 1
+        n = len(self.backends)
+        rotation = {b: (i + self._rotation) % n for i, b in enumerate(self.backends)}
+        if self.strategy == "least_outstanding":
+            return sorted(healthy, key=lambda b: (b.outstanding / b.weight, rotation[b]))
+        # "latency": untried first, then EWMA scaled by load (peak-EWMA style)
+        return sorted(healthy, key=lambda b: (
+            b.ewma is not None,
+            (b.ewma or 0.0) * (b.outstanding + 1) / b.weight,
+            rotation[b],
+        ))
+
+    def _weighted_order(self, healthy: List[Backend]) -> List[Backend]:
+        remaining, ordered = list(healthy), []
+        while remaining:
+            pick = self._rng.choices(remaining, weights=[b.weight for b in remaining])[0]
+            remaining.remove(pick)
+            ordered.append(pick)
+        return ordered
+
+    def _hedge_after(self, backend: Backend) -> float | None:
+        if self.hedge_percentile is not None and backend.samples >= self.hedge_min_samples:
+            return backend.latency_percentile(self.hedge_percentile)
+        return self.hedge_delay
+
+    def _race(self, call, discard=None, with_backend: bool = False):
+        """Run ``call(backend)`` with hedging and failover; first success wins."""
+        running: Dict[Future, Backend] = {}
+        last_error: BaseException | None = None
+        hedged = False
+
+        def launch(hedge: bool) -> bool:
+            for backend in candidates:
+                if not backend.breaker.allow():
+                    continue
+                if hedge:
+                    backend.hedges += 1
+                backend._started()
+                running[self._executor.submit(self._timed, backend, call)] = backend
+                return True
+            return False
+
+        with self._lock:
+            candidates = iter(self.order())
+            if not launch(hedge=False):
+                raise RoutingError("no backend available: every circuit is open")
+        try:
+            while running:
+                timeout = None
+                if not hedged and len(running) == 1:
+                    timeout = self._hedge_after(next(iter(running.values())))
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    # Primary is slower than usual: race a duplicate against it.
+                    hedged = True
+                    with self._lock:
+                        if launch(hedge=True):
+                            self.hedged += 1
+                    continue
+                for future in done:
+                    backend = running.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        last_error = exc
+                        continue
+                    if hedged:
+                        backend.wins += 1
+                    return (backend, result) if with_backend else result
+                if not running:
+                    with self._lock:
+                        launch(hedge=False)  # failover
+        finally:
+            # Losers keep running on their threads; drop whatever they return.
+            for future in running:
+                if discard is not None:
+                    future.add_done_callback(lambda f: discard(f.result()) if not f.exception() else None)
+        raise RoutingError(f"all backends failed: {last_error}") from last_error
+
+    @staticmethod
+    def _timed(backend: Backend, call):
+        started = time.perf_counter()
+        try:
+            result = call(backend)
+        except BaseException:
+            backend._finished(time.perf_counter() - started, ok=False)
+            backend.breaker.record_failure()
+            raise
+        backend._finished(time.perf_counter() - started, ok=True)
+        backend.breaker.record_success()
+        return result
+
+    def _backend(self, spec, index: int, failure_threshold: int, reset_timeout: float) -> Backend:
+        if isinstance(spec, Backend):
+            return spec
+        name, weight = f"backend{index}", 1.0
+        if isinstance(spec, tuple):
+            name, provider, *rest = spec
+            weight = rest[0] if rest else 1.0
+        else:
+            provider = spec
+        breaker = CircuitBreaker(failure_threshold, reset_timeout, self.clock)
+        return Backend(name=name, provider=provider, weight=weight, breaker=breaker)
+
+
+def _close_stream(opened: Tuple[Iterator[str], object]) -> None:
+    close = getattr(opened[0], "close", None)
+    if close is not None:
+        close()
@@ -0,0 +1,154 @@
+"""
+In-process OpenAI-compatible stub server.
+
+Serves ``POST /chat/completions`` (plain and ``stream: true`` SSE) on
+localhost so HTTP providers can be tested and benchmarked offline. Replies
+echo the last user message, like FakeAIProvider.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubServer:
+    """Background HTTP/1.1 server with keep-alive, latency and failure injection.
+
+    ``latency`` delays every response; ``fail_first`` makes the first N
+    requests answer ``fail_status``. ``connections`` counts accepted TCP
+    connections, which shows whether a client reuses pooled connections.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        fail_first: int = 0,
+        fail_status: int = 503,
+        chunk_size: int = 8,
+    ):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.chunk_size = chunk_size
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _next_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+    def _new_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+    @staticmethod
+    def _reply(messages: list[dict]) -> str:
+        for msg in reversed(messages):
+            if msg.get("role") == "user":
+                return f"🤖 I hear you said: {msg.get('content', '')}"
+        return "Hello! How can I help you?"
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self) -> None:
+                super().setup()
+                # Headers and body are separate writes; don't let Nagle delay them.
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                stub._new_connection()
+
+            def log_message(self, format, *args) -> None:  # keep test output quiet
+                pass
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                number = stub._next_request()
+
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                if number <= stub.fail_first:
+                    self._send_json(stub.fail_status, {"error": {"message": "injected failure"}})
+                    return
+
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._send_json(404, {"error": {"message": "not found"}})
+                    return
+
+                text = stub._reply(body.get("messages", []))
+                if body.get("stream"):
+                    self._send_stream(text, body.get("model", "stub"))
+                else:
+                    self._send_json(200, {
+                        "object": "chat.completion",
+                        "model": body.get("model", "stub"),
+                        "choices": [{
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                        }],
+                    })
+
+            def _send_json(self, status: int, payload: dict) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, text: str, model: str) -> None:
+                events = []
+                for i in range(0, len(text), stub.chunk_size):
+                    chunk = {
+                        "object": "chat.completion.chunk",
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": text[i:i + stub.chunk_size]}}],
+                    }
+                    events.append(f"data: {json.dumps(chunk)}\n\n")
+                events.append("data: [DONE]\n\n")
+                data = "".join(events).encode("utf-8")
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
-from typing import Protocol, List
+from typing import Iterable, Iterator, Protocol, List
 
+from .history_view import USAGE as HISTORY_USAGE, parse_history_args, render_history
+from .metrics import Metrics
 from .models import Conversation, Message, Role
 
 
@@ -12,12 +15,38 @@ class CorePort(Protocol):
     def generate_reply(self, conversation: Conversation) -> Message: ...
 
 
+class StreamingCorePort(CorePort, Protocol):
+    """Core that can also stream reply chunks (see ``AICore.stream_reply``)."""
+    def stream_reply(self, conversation: Conversation) -> Iterable[str]: ...
+
+
 class HistoryPort(Protocol):
-    """Minimal interface that our session needs from history storage."""
+    """Minimal interface that our session needs from history storage.
+
+    Storages may also offer ``persisted(conversation_id) -> int``, the part
+    of the transcript they have confirmed; compaction stays within it.
+    """
     def save(self, conversation: Conversation) -> None: ...
     def load_all(self) -> List[Conversation]: ...
 
 
+class SearchHitLike(Protocol):
+    conversation_id: str
+    position: int
+    role: str
+    snippet: str
+
+
+class SearchPort(Protocol):
+    """Optional full-text search offered by a history storage."""
+    def search(self, terms: str, limit: int = 10) -> List[SearchHitLike]: ...
+
+
+class CompactorPort(Protocol):
+    """Optional stage that shrinks long conversations after they are saved."""
+    def maybe_compact(self, conversation: Conversation, stored: int | None = None) -> bool: ...
+
+
 @dataclass
 class AssistantSession:
     """High-level chat session: handles commands + normal messages."""
@@ -28,15 +57,29 @@ class AssistantSession:
     # Special token used to signal the CLI loop to exit
     EXIT_TOKEN: str = "__EXIT__"
 
+    # Runs after each saved turn (see src.core.compaction.Compactor)
+    compactor: CompactorPort | None = None
+
+    # Optional instrumentation (see src.core.metrics); None costs nothing
+    metrics: Metrics | None = None
+
     @classmethod
     def start(
         cls,
         core: CorePort,
         history: HistoryPort,
         mode: str = "chat",
+        compactor: CompactorPort | None = None,
+        metrics: Metrics | None = None,
     ) -> "AssistantSession":
         conv = core.start_conversation(mode)
-        return cls(core=core, history=history, conversation=conv)
+        return cls(
+            core=core,
+            history=history,
+            conversation=conv,
+            compactor=compactor,
+            metrics=metrics,
+        )
 
     # ──────────────────────────────────────────────────────────────
     # Public API used by CLI
@@ -45,7 +88,9 @@ class AssistantSession:
 
         - normal text → send to AI, save history, return AI reply
         - /exit → return EXIT_TOKEN
-        - /history → render history as multiline string
+        - /history [page] [--mode X] [--last N] → one page of history
+        - /search <terms> → ranked matching messages from history
+        - /stats → latency and counter summary (when metrics are on)
         """
         text = text.strip()
         if not text:
@@ -54,36 +99,160 @@ class AssistantSession:
         if text.startswith("/"):
             return self._handle_command(text)
 
-        # Normal chat message
+        if self.metrics is None:
+            return self._chat(text)
+        with self.metrics.turn():
+            return self._chat(text)
+
+    def stream_user_input(self, text: str) -> Iterator[str]:
+        """Like ``handle_user_input`` but yields the reply in chunks.
+
+        Commands and cores without ``stream_reply`` yield a single chunk.
+        History is saved once the reply is complete.
+        """
+        text = text.strip()
+        if not text:
+            return
+
+        if text.startswith("/"):
+            yield from self._iter_command(text)
+            return
+
+        stream_reply = getattr(self.core, "stream_reply", None)
+        if stream_reply is None:
+            yield self.handle_user_input(text)
+            return
+
+        if self.metrics is None:
+            yield from self._stream_chat(text, stream_reply)
+            return
+        with self.metrics.turn():
+            started = time.perf_counter()
+            chunks = self._stream_chat(text, stream_reply)
+            first = next(chunks, None)
+            if first is None:
+                return
+            self.metrics.observe("session_ttft_seconds", time.perf_counter() - started)
+            yield first
+            yield from chunks
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _chat(self, text: str) -> str:
         self.conversation.add_user_message(text)
         reply = self.core.generate_reply(self.conversation)
         # Persist updated conversation
         self.history.save(self.conversation)
+        self._compact()
         return reply.content
 
-    # ──────────────────────────────────────────────────────────────
-    # Internal helpers
+    def _stream_chat(self, text: str, stream_reply) -> Iterator[str]:
+        self.conversation.add_user_message(text)
+        yield from stream_reply(self.conversation)
+        self.history.save(self.conversation)
+        self._compact()
+
+    def _compact(self) -> None:
+        # Only messages the history confirmed: a write-behind save may still be
+        # queued, and compacting unsaved messages would lose them for good.
+        if self.compactor is None:
+            return
+        persisted = getattr(self.history, "persisted", None)
+        stored = None if persisted is None else persisted(self.conversation.id)
+        self.compactor.maybe_compact(self.conversation, stored=stored)
+
     def _handle_command(self, cmd: str) -> str:
+        return "".join(self._iter_command(cmd))
+
+    def _iter_command(self, cmd: str) -> Iterator[str]:
+        """Run a command, yielding its output in chunks."""
+        return SessionCommands(self.history, self.metrics, self.EXIT_TOKEN).run(cmd)
+
+
+class SessionCommands:
+    """Slash commands shared by AssistantSession and AsyncAssistantSession.
+
+    Works on a sync HistoryPort; paging and ``/search`` use the storage's
+    ``list_summaries``/``get``/``search`` when it has them.
+    """
+
+    def __init__(
+        self,
+        history: HistoryPort,
+        metrics: Metrics | None = None,
+        exit_token: str = AssistantSession.EXIT_TOKEN,
+    ):
+        self.history = history
+        self.metrics = metrics
+        self.exit_token = exit_token
+
+    def handle(self, cmd: str) -> str:
+        return "".join(self.run(cmd))
+
+    def run(self, cmd: str) -> Iterator[str]:
+        """Run a command, yielding its output in chunks."""
+        name, _, args = cmd.partition(" ")
+        args = args.strip()
+
         if cmd == "/exit":
-            return self.EXIT_TOKEN
+            yield self.exit_token
+            return
+
+        if name == "/search":
+            yield self._search(args)
+            return
+
+        if name == "/history":
+            yield from self._history(args)
+            return
+
+        if cmd == "/stats":
+            yield self._stats()
+            return
+
+        yield "Unknown command. Try typing a message, /history, /search <terms>, /stats, or /exit."
+
+    def _history(self, args: str) -> Iterator[str]:
+        try:
+            query = parse_history_args(args)
+        except ValueError:
+            yield HISTORY_USAGE
+            return
+
+        # Page over index summaries when the storage has them (see
+        # FileHistoryStorage), loading only the conversations shown.
+        list_summaries = getattr(self.history, "list_summaries", None)
+        get = getattr(self.history, "get", None)
+        if list_summaries is not None and get is not None:
+            yield from render_history(list_summaries(mode=query.mode), query, role_label, get)
+        else:
+            yield from render_history(self.history.load_all(), query, role_label)
 
-        if cmd == "/history":
-            conversations = self.history.load_all()
-            lines: list[str] = []
+    def _search(self, terms: str) -> str:
+        search = getattr(self.history, "search", None)
+        if search is None:
+            return "Search is not available for this history storage."
+        if not terms:
+            return "Usage: /search <terms>"
 
-            for conv in conversations:
-                for msg in conv.messages:
-                    prefix = self._role_label(msg.role)
-                    lines.append(f"{prefix}: {msg.content}")
+        hits = search(terms)
+        if not hits:
+            return f"No messages match '{terms}'."
+        return "\n".join(
+            f"[{hit.conversation_id[:8]}#{hit.position}] "
+            f"{role_label(Role(hit.role))}: {hit.snippet}"
+            for hit in hits
+        )
 
-            return "\n".join(lines) if lines else "(no history yet)"
+    def _stats(self) -> str:
+        if self.metrics is None:
+            return "Metrics are off for this session."
+        return self.metrics.render()
 
-        return "Unknown command. Try typing a message, /history, or /exit."
 
-    @staticmethod
-    def _role_label(role: Role) -> str:
-        if role is Role.USER:
-            return "User"
-        if role is Role.ASSISTANT:
-            return "Assistant"
-        return "System"
\ No newline at end of file
+def role_label(role: Role) -> str:
+    if role is Role.USER:
+        return "User"
+    if role is Role.ASSISTANT:
+        return "Assistant"
+    return "System"
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Iterable, List, Protocol, Tuple, TypeVar
+
+from .app import AssistantSession, HistoryPort, SessionCommands
+from .metrics import Metrics
+from .models import Conversation, Message
+
+T = TypeVar("T")
+
+class AsyncCorePort(Protocol):
+    """Minimal interface that the async session needs from the AI core."""
+    def start_conversation(self, mode: str) -> Conversation: ...
+    async def generate_reply(self, conversation: Conversation) -> Message: ...
+
+
+class AsyncHistoryPort(Protocol):
+    """Minimal interface that the async session needs from history storage."""
+    async def save(self, conversation: Conversation) -> None: ...
+    async def load_all(self) -> List[Conversation]: ...
+
+
+class ThreadedHistory:
+    """Expose a sync HistoryPort as an AsyncHistoryPort via a thread pool.
+
+    Calls are serialized with a lock because the file/SQLite storages are
+    not written with concurrent callers in mind.
+    """
+    def __init__(self, history: HistoryPort, executor: Executor | None = None):
+        self.history = history
+        self.executor = executor
+        self._lock = asyncio.Lock()
+
+    async def save(self, conversation: Conversation) -> None:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.history.save, conversation)
+
+    async def load_all(self) -> List[Conversation]:
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, self.history.load_all)
+
+    async def call(self, fn: Callable[[HistoryPort], T]) -> T:
+        """Run ``fn(history)`` on the wrapped storage in the thread pool."""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, self.history)
+
+
+class _LoadedHistory:
+    """Conversations already loaded from an async-only history."""
+    def __init__(self, conversations: List[Conversation]):
+        self.conversations = conversations
+
+    def save(self, conversation: Conversation) -> None:
+        raise NotImplementedError("loaded history is read-only")
+
+    def load_all(self) -> List[Conversation]:
+        return self.conversations
+
+
+@dataclass(eq=False)
+class AsyncAssistantSession:
+    """Async chat session: same commands as AssistantSession, non-blocking I/O.
+
+    Compared by identity so the scheduler can keep per-session state.
+    """
+    core: AsyncCorePort
+    history: AsyncHistoryPort
+    conversation: Conversation
+
+    EXIT_TOKEN: str = AssistantSession.EXIT_TOKEN
+
+    # Optional instrumentation (see src.core.metrics); None costs nothing
+    metrics: Metrics | None = None
+
+    @classmethod
+    def start(
+        cls,
+        core: AsyncCorePort,
+        history: AsyncHistoryPort,
+        mode: str = "chat",
+        metrics: Metrics | None = None,
+    ) -> "AsyncAssistantSession":
+        conv = core.start_conversation(mode)
+        return cls(core=core, history=history, conversation=conv, metrics=metrics)
+
+    # ──────────────────────────────────────────────────────────────
+    # Public API
+    async def handle_user_input(self, text: str) -> str:
+        text = text.strip()
+        if not text:
+            return ""
+
+        if text.startswith("/"):
+            return await self._handle_command(text)
+
+        if self.metrics is None:
+            return await self._chat(text)
+        with self.metrics.turn():
+            return await self._chat(text)
+
+    async def stream_user_input(self, text: str) -> AsyncIterator[str]:
+        text = text.strip()
+        if not text:
+            return
+
+        if text.startswith("/"):
+            yield await self._handle_command(text)
+            return
+
+        stream_reply = getattr(self.core, "stream_reply", None)
+        if stream_reply is None:
+            yield await self.handle_user_input(text)
+            return
+
+        self.conversation.add_user_message(text)
+        async for chunk in stream_reply(self.conversation):
+            yield chunk
+        await self.history.save(self.conversation)
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    async def _chat(self, text: str) -> str:
+        self.conversation.add_user_message(text)
+        reply = await self.core.generate_reply(self.conversation)
+        await self.history.save(self.conversation)
+        return reply.content
+
+    async def _handle_command(self, cmd: str) -> str:
+        # Same commands as AssistantSession: run them on the sync storage
+        # behind ThreadedHistory, or over a loaded copy of async-only history.
+        call = getattr(self.history, "call", None)
+        if call is not None:
+            return await call(lambda history: self._commands(history).handle(cmd))
+
+        loaded: List[Conversation] = []
+        if cmd.partition(" ")[0] == "/history":
+            loaded = await self.history.load_all()
+        return self._commands(_LoadedHistory(loaded)).handle(cmd)
+
+    def _commands(self, history: HistoryPort) -> SessionCommands:
+        return SessionCommands(history, self.metrics, self.EXIT_TOKEN)
+
+class TurnScheduler:
+    """Runs turns for many async sessions with bounded concurrency.
+
+    At most ``max_concurrency`` turns are in flight at once, and turns of
+    the same session run one after another so its conversation stays ordered.
+    """
+
+    def __init__(self, max_concurrency: int = 100):
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._session_locks: "weakref.WeakKeyDictionary[AsyncAssistantSession, asyncio.Lock]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self.in_flight = 0
+
+    async def submit(self, session: AsyncAssistantSession, text: str) -> str:
+        lock = self._session_locks.get(session)
+        if lock is None:
+            lock = self._session_locks[session] = asyncio.Lock()
+
+        async with lock, self._semaphore:
+            self.in_flight += 1
+            try:
+                return await session.handle_user_input(text)
+            finally:
+                self.in_flight -= 1
+
+    async def run_all(
+        self, turns: Iterable[Tuple[AsyncAssistantSession, str]]
+    ) -> List[str]:
+        """Run every (session, text) turn and return replies in input order."""
+        return await asyncio.gather(*(self.submit(s, t) for s, t in turns))
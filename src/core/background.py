@@ -0,0 +1,119 @@
+"""
+Run an AssistantSession on a worker thread.
+
+UIs submit user input and poll for events instead of calling the session
+directly, so slow providers and history writes never block the UI thread.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+from typing import List, NamedTuple
+
+from .app import AssistantSession
+
+
+class ReplyEvent(NamedTuple):
+    """Something that happened while handling a submitted input."""
+    job: int
+    kind: str   # "start" | "chunk" | "done" | "cancelled" | "error"
+    text: str = ""
+
+
+class BackgroundSession:
+    """Serializes turns of one session on a single worker thread.
+
+    Turns run in submission order. ``cancel`` stops the in-flight turn at the
+    next chunk boundary; a provider call that is already running finishes,
+    but its output is dropped and history is not saved for that turn. The
+    turn's user message is removed from the conversation too, so the next
+    turn doesn't follow a question that never got an answer.
+    """
+
+    def __init__(self, session: AssistantSession):
+        self.session = session
+        self.events: "queue.Queue[ReplyEvent]" = queue.Queue()
+        self._jobs: "queue.Queue[tuple[int, str] | None]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._next_job = 0
+        self._current_job: int | None = None
+        self._cancelled_job: int | None = None
+        self._thread = threading.Thread(target=self._run, name="assistant-worker", daemon=True)
+        self._thread.start()
+
+    # ──────────────────────────────────────────────────────────────
+    # Public API used by UIs
+    def submit(self, text: str) -> int:
+        with self._lock:
+            self._next_job += 1
+            job = self._next_job
+        self._jobs.put((job, text))
+        return job
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancelled_job = self._current_job
+
+    @property
+    def busy(self) -> bool:
+        return self._current_job is not None or not self._jobs.empty()
+
+    def poll(self, max_events: int | None = None) -> List[ReplyEvent]:
+        """Return pending events without blocking."""
+        out: List[ReplyEvent] = []
+        while max_events is None or len(out) < max_events:
+            try:
+                out.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return out
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Finish queued turns (so history is persisted) and stop the worker."""
+        self._jobs.put(None)
+        self._thread.join(timeout)
+
+    # ──────────────────────────────────────────────────────────────
+    # Worker thread
+    def _run(self) -> None:
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                return
+            job, text = item
+            with self._lock:
+                self._current_job = job
+            try:
+                self._handle(job, text)
+            except Exception as exc:  # surface provider/storage errors to the UI
+                self.events.put(ReplyEvent(job, "error", str(exc)))
+            finally:
+                with self._lock:
+                    self._current_job = None
+
+    def _handle(self, job: int, text: str) -> None:
+        self.events.put(ReplyEvent(job, "start"))
+        parts: list[str] = []
+        conversation = self.session.conversation
+        before = len(conversation.messages)
+        chunks = self.session.stream_user_input(text)
+        try:
+            for chunk in chunks:
+                if self._is_cancelled(job):
+                    chunks.close()
+                    # Drop the half turn (the user message, and any partial reply).
+                    if len(conversation.messages) > before:
+                        conversation.replace_messages(before, len(conversation.messages), [])
+                    self.events.put(ReplyEvent(job, "cancelled"))
+                    return
+                parts.append(chunk)
+                self.events.put(ReplyEvent(job, "chunk", chunk))
+        finally:
+            chunks.close()
+
+        self.events.put(ReplyEvent(job, "done", "".join(parts)))
+
+    def _is_cancelled(self, job: int) -> bool:
+        with self._lock:
+            return self._cancelled_job == job
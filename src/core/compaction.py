@@ -0,0 +1,115 @@
+"""
+Conversation compaction for long sessions.
+
+Once a conversation passes a message or token threshold, its older turns
+are replaced in memory by one ``Role.SYSTEM`` summary message produced by
+an AI provider. The full transcript stays in history storage: compaction
+must run after the conversation was saved, and it advances
+``Conversation.archived`` so later saves keep appending at the right
+position. ``maybe_compact(stored=...)`` limits it to the messages the
+history has confirmed, so a queued or failed save never loses any.
+"""
+
+from __future__ import annotations
+
+from typing import List, Protocol
+
+from .context import Tokenizer, estimate_tokens
+from .models import Conversation, Message, Role
+
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+SUMMARY_INSTRUCTION = (
+    "Summarize the following conversation in a few sentences. "
+    "Keep facts, decisions and open questions."
+)
+
+
+class SummaryProvider(Protocol):
+    """Anything with AIProvider.generate can write summaries."""
+    def generate(self, conversation: Conversation) -> str: ...
+
+
+def is_summary(message: Message) -> bool:
+    return message.role is Role.SYSTEM and message.content.startswith(SUMMARY_PREFIX)
+
+
+class Compactor:
+    """Replace older turns with a rolling summary once a threshold is passed.
+
+    ``max_messages`` / ``max_tokens`` (either may be None) trigger compaction;
+    ``keep_last`` recent messages always stay verbatim, as do the leading
+    system messages (instructions). A previous summary is folded into the
+    next one.
+    """
+
+    def __init__(
+        self,
+        provider: SummaryProvider,
+        max_messages: int | None = 200,
+        max_tokens: int | None = None,
+        keep_last: int = 20,
+        tokenizer: Tokenizer = estimate_tokens,
+    ):
+        self.provider = provider
+        self.max_messages = max_messages
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+        self.tokenizer = tokenizer
+        self.compactions = 0
+
+    def needs_compaction(self, conversation: Conversation) -> bool:
+        if self.max_messages is not None and len(conversation.messages) > self.max_messages:
+            return True
+        if self.max_tokens is not None:
+            tokens = sum(self.tokenizer(m.content) for m in conversation.messages)
+            return tokens > self.max_tokens
+        return False
+
+    def maybe_compact(self, conversation: Conversation, stored: int | None = None) -> bool:
+        """Compact in place if a threshold is passed; return whether it did.
+
+        ``stored`` is how much of the transcript history has confirmed;
+        only those messages are folded into the summary (None: all of them).
+        """
+        if not self.needs_compaction(conversation):
+            return False
+
+        messages = conversation.messages
+        pinned = 0
+        while (
+            pinned < len(messages)
+            and messages[pinned].role is Role.SYSTEM
+            and not is_summary(messages[pinned])
+        ):
+            pinned += 1
+
+        cut = max(pinned, len(messages) - self.keep_last)
+        if stored is not None:
+            cut = min(cut, stored - conversation.archived)
+        older = messages[pinned:cut]
+        if len(older) < 2:
+            # Replacing fewer than two messages with a summary saves nothing.
+            return False
+
+        summary = Message(
+            role=Role.SYSTEM,
+            content=SUMMARY_PREFIX + self._summarize(conversation.mode, older),
+        )
+        conversation.replace_messages(pinned, cut, [summary])
+        conversation.archived += len(older) - 1
+        self.compactions += 1
+        return True
+
+    def _summarize(self, mode: str, older: List[Message]) -> str:
+        request = Conversation(mode=mode)
+        request.add_system_message(SUMMARY_INSTRUCTION)
+        request.add_user_message("\n".join(self._transcript_line(m) for m in older))
+        return self.provider.generate(request)
+
+    @staticmethod
+    def _transcript_line(message: Message) -> str:
+        if is_summary(message):
+            return f"summary: {message.content[len(SUMMARY_PREFIX):]}"
+        return f"{message.role.value}: {message.content}"
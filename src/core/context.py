@@ -0,0 +1,154 @@
+"""
+Context-window management for provider payloads.
+
+``ContextWindow`` follows one conversation incrementally: each new message
+is tokenized and converted to a payload dict once, the window is trimmed
+from the oldest end to fit a token budget, and the built payload is cached
+between calls. System messages are always kept. Anything but appends (a
+new or shortened list, ``replace_messages``, in-place MessageStore edits)
+or a budget change rebuilds the window.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, List
+
+from .models import Conversation, Role
+
+
+Tokenizer = Callable[[str], int]
+
+# Rough per-message framing cost (role, separators) in chat APIs.
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast heuristic: about four characters per token for English text."""
+    return (len(text) + 3) // 4
+
+
+class ContextWindow:
+    """Incrementally maintained, budgeted payload for one conversation."""
+
+    def __init__(
+        self,
+        conversation: Conversation,
+        budget: int,
+        tokenizer: Tokenizer = estimate_tokens,
+    ):
+        self.conversation = conversation
+        self.budget = budget
+        self.tokenizer = tokenizer
+        self._reset()
+
+    @property
+    def total_tokens(self) -> int:
+        """Estimated tokens of the current window (what ``payload`` sends)."""
+        self._sync()
+        return self._window_tokens + self._system_before_tokens
+
+    @property
+    def dropped(self) -> int:
+        """Number of non-system messages trimmed from the front."""
+        self._sync()
+        return self._start - len(self._system_before)
+
+    def payload(self) -> List[Dict[str, str]]:
+        """Return the budgeted payload; the list is cached, do not mutate it."""
+        self._sync()
+        if self._payload is None:
+            self._payload = [self._entries[i] for i in self._system_before]
+            self._payload.extend(self._entries[self._start:])
+            self._built = len(self._entries)
+        elif self._built < len(self._entries):
+            self._payload.extend(self._entries[self._built:])
+            self._built = len(self._entries)
+        return self._payload
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _reset(self) -> None:
+        self._messages = self.conversation.messages
+        self._edits = self._edit_mark()
+        self._budget = self.budget
+        self._tokens: List[int] = []
+        self._entries: List[Dict[str, str]] = []
+        self._start = 0                      # first index inside the window
+        self._window_tokens = 0              # tokens of messages[start:]
+        self._system_before: List[int] = []  # system messages trimmed past, still sent
+        self._system_before_tokens = 0
+        self._payload: List[Dict[str, str]] | None = None
+        self._built = 0
+
+    def _sync(self) -> None:
+        messages = self.conversation.messages
+        if (
+            messages is not self._messages
+            or len(messages) < len(self._entries)
+            or self._edit_mark() != self._edits
+            or self.budget != self._budget
+        ):
+            # Replaced, shortened or edited (e.g. compaction), or re-budgeted: start over.
+            self._reset()
+
+        for msg in messages[len(self._entries):]:
+            tokens = self.tokenizer(msg.content) + MESSAGE_OVERHEAD
+            self._tokens.append(tokens)
+            self._entries.append({"role": msg.role.value, "content": msg.content})
+            self._window_tokens += tokens
+
+        self._trim()
+
+    def _edit_mark(self) -> tuple:
+        return self.conversation.rewrites, getattr(self.conversation.messages, "rewritten", 0)
+
+    def _trim(self) -> None:
+        last = len(self._entries) - 1
+        trimmed = False
+        while (
+            self._window_tokens + self._system_before_tokens > self.budget
+            and self._start < last
+        ):
+            i = self._start
+            if self._messages[i].role is Role.SYSTEM:
+                self._system_before.append(i)
+                self._system_before_tokens += self._tokens[i]
+            self._window_tokens -= self._tokens[i]
+            self._start += 1
+            trimmed = True
+        if trimmed:
+            self._payload = None
+
+
+class ContextManager:
+    """Per-mode token budgets and one ContextWindow per conversation id."""
+
+    def __init__(
+        self,
+        budgets: Dict[str, int] | None = None,
+        default_budget: int = 4096,
+        tokenizer: Tokenizer = estimate_tokens,
+        max_windows: int = 1024,
+    ):
+        self.budgets = dict(budgets or {})
+        self.default_budget = default_budget
+        self.tokenizer = tokenizer
+        self.max_windows = max_windows
+        self._windows: Dict[str, ContextWindow] = {}
+
+    def budget_for(self, mode: str) -> int:
+        return self.budgets.get(mode, self.default_budget)
+
+    def window(self, conversation: Conversation) -> ContextWindow:
+        win = self._windows.pop(conversation.id, None)
+        if win is None or win.conversation is not conversation:
+            win = ContextWindow(conversation, self.budget_for(conversation.mode), self.tokenizer)
+        win.budget = self.budget_for(conversation.mode)
+        # Re-insert as most recently used; drop the oldest beyond the bound.
+        self._windows[conversation.id] = win
+        while len(self._windows) > self.max_windows:
+            self._windows.pop(next(iter(self._windows)))
+        return win
+
+    def payload(self, conversation: Conversation) -> List[Dict[str, str]]:
+        return self.window(conversation).payload()
@@ -0,0 +1,120 @@
+"""
+Streaming /history rendering.
+
+Conversations flow through a generator pipeline — source, snapshot
+de-duplication, mode filter, ``--last`` window, page slice, formatting —
+and output is produced in chunks (one per conversation). When the storage
+can list summaries, the pipeline runs over those and only the requested
+page (plus any legacy snapshots, which are compared to de-duplicate them)
+is read from disk.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, Union
+
+from src.storage.snapshots import dedupe_snapshots, is_snapshot
+
+from .models import Conversation, Role
+
+if TYPE_CHECKING:
+    from src.storage.index import ConversationSummary
+
+    Entry = Union[Conversation, ConversationSummary]
+
+
+PAGE_SIZE = 10
+
+USAGE = "Usage: /history [page] [--mode MODE] [--last N]"
+
+
+@dataclass
+class HistoryQuery:
+    page: int = 1
+    mode: str | None = None
+    last: int | None = None
+    page_size: int = PAGE_SIZE
+
+
+def parse_history_args(args: str) -> HistoryQuery:
+    """Parse "/history" arguments; raises ValueError on bad input."""
+    query = HistoryQuery()
+    tokens = args.split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token in ("--mode", "--last"):
+            if i + 1 >= len(tokens):
+                raise ValueError(f"{token} needs a value")
+            value = tokens[i + 1]
+            if token == "--mode":
+                query.mode = value
+            else:
+                query.last = int(value)
+                if query.last < 1:
+                    raise ValueError("--last must be positive")
+            i += 2
+            continue
+        query.page = int(token)
+        if query.page < 1:
+            raise ValueError("page must be positive")
+        i += 1
+    return query
+
+
+def render_history(
+    source: Iterable["Entry"],
+    query: HistoryQuery,
+    role_label: Callable[[Role], str],
+    get: Callable[[str], Conversation | None] | None = None,
+) -> Iterator[str]:
+    """Yield the requested page of history, one chunk per conversation.
+
+    ``source`` yields conversations, or ``ConversationSummary`` records
+    when ``get`` is given to load the ones that end up on the page.
+    """
+    if get is not None:
+        source = _load_snapshots(source, get)
+    convs: Iterator["Entry"] = dedupe_snapshots(source)
+    if query.mode is not None:
+        convs = (c for c in convs if c.mode == query.mode)
+    if query.last is not None:
+        convs = iter(deque(convs, maxlen=query.last))
+
+    start = (query.page - 1) * query.page_size
+    # One extra item tells us whether there is a next page.
+    page = islice(convs, start, start + query.page_size + 1)
+
+    shown = 0
+    for entry in page:
+        if shown == query.page_size:
+            yield f"\n(page {query.page} · /history {query.page + 1} for more)"
+            return
+        conv = entry if isinstance(entry, Conversation) else get(entry.id)
+        if conv is None:
+            continue  # removed since it was listed
+        lines = [f"── {conv.id[:8]} · {conv.mode} ──"]
+        lines.extend(f"{role_label(msg.role)}: {msg.content}" for msg in conv.messages)
+        block = "\n".join(lines)
+        yield block if shown == 0 else "\n" + block
+        shown += 1
+
+    if shown == 0:
+        yield "(no history yet)" if query.page == 1 else f"(no history on page {query.page})"
+
+
+def _load_snapshots(
+    summaries: Iterable["ConversationSummary"],
+    get: Callable[[str], Conversation | None],
+) -> Iterator["Entry"]:
+    """Load legacy snapshots (de-duplication compares their messages)."""
+    for summary in summaries:
+        if not is_snapshot(summary):
+            yield summary
+            continue
+        conv = get(summary.id)
+        if conv is not None:
+            yield conv
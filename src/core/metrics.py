@@ -0,0 +1,310 @@
+"""
+Optional instrumentation: latency histograms, counters and profiling.
+
+Nothing here runs unless a ``Metrics`` object is created and the
+wrappers below are put around the core, provider and history. Without
+them the hot path pays a single ``is None`` check in the session.
+
+    metrics = Metrics()
+    core = InstrumentedCore(AICore(InstrumentedProvider(provider, metrics)), metrics)
+    history = InstrumentedHistory(history, metrics)
+    session = AssistantSession.start(core, history, metrics=metrics)
+
+Read the numbers with ``/stats``, ``Metrics.render()`` or ``to_prometheus()``.
+"""
+
+from __future__ import annotations
+
+import io
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Iterator, List
+
+from .models import Conversation, Message
+
+if TYPE_CHECKING:
+    import cProfile
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Count/sum over all samples plus quantiles over the most recent ``window``."""
+
+    def __init__(self, window: int = 4096):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+            self._recent.append(value)
+
+    def quantiles(self) -> Dict[float, float]:
+        with self._lock:
+            ordered = sorted(self._recent)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class Metrics:
+    """Registry of histograms (seconds), counters and pull-based gauges."""
+
+    def __init__(self, window: int = 4096):
+        self.window = window
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self.profiler: cProfile.Profile | None = None
+        self._sources: Dict[str, Callable[[], Dict[str, float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float) -> None:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(name, Histogram(self.window))
+        histogram.observe(value)
+
+    def incr(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    @contextmanager
+    def turn(self) -> Iterator[None]:
+        """Time one chat turn, under the profiler when profiling is on."""
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.enable()
+        try:
+            with self.timer("session_turn_seconds"):
+                yield
+        finally:
+            if profiler is not None:
+                profiler.disable()
+
+    def add_source(self, name: str, source: Callable[[], Dict[str, float]]) -> None:
+        """Register gauges read on demand, e.g. ``watch_cache``."""
+        self._sources[name] = source
+
+    def watch_cache(self, cache, name: str = "cache") -> None:
+        """Expose a CachingProvider's hit/miss counters and hit rate."""
+        self.add_source(name, lambda: {
+            "hits": cache.stats.hits,
+            "misses": cache.stats.misses,
+            "hit_rate": cache.stats.hit_rate,
+            "entries": len(cache),
+        })
+
+    def gauges(self) -> Dict[str, float]:
+        values: Dict[str, float] = {}
+        for source_name, source in list(self._sources.items()):
+            for key, value in source().items():
+                values[f"{source_name}_{key}"] = value
+        return values
+
+    # ──────────────────────────────────────────────────────────────
+    # Profiling (opt-in)
+    def enable_profiling(self) -> None:
+        if self.profiler is None:
+            import cProfile  # only profiled runs pay for the import
+
+            self.profiler = cProfile.Profile()
+
+    def profile_report(self, limit: int = 20) -> str:
+        if self.profiler is None:
+            return "Profiling is off."
+        import pstats
+
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(limit)
+        return out.getvalue()
+
+    def dump_profile(self, path: str | Path) -> None:
+        """Write pstats data (open with ``python -m pstats PATH`` or snakeviz)."""
+        if self.profiler is not None:
+            self.profiler.dump_stats(str(path))
+
+    # ──────────────────────────────────────────────────────────────
+    # Reporting
+    def snapshot(self) -> dict:
+        return {
+            "histograms": {
+                name: {
+                    "count": h.count,
+                    "sum": h.total,
+                    "max": h.max,
+                    **{f"p{int(q * 100)}": v for q, v in h.quantiles().items()},
+                }
+                for name, h in sorted(self.histograms.items())
+            },
+            "counters": dict(sorted(self.counters.items())),
+            "gauges": self.gauges(),
+        }
+
+    def render(self) -> str:
+        """Human-readable summary used by ``/stats``."""
+        snap = self.snapshot()
+        lines: List[str] = []
+        for name, h in snap["histograms"].items():
+            lines.append(
+                f"{name}: n={h['count']} p50={h['p50'] * 1000:.2f}ms "
+                f"p95={h['p95'] * 1000:.2f}ms p99={h['p99'] * 1000:.2f}ms"
+            )
+        for name, value in snap["counters"].items():
+            lines.append(f"{name}: {value:g}")
+        for name, value in snap["gauges"].items():
+            lines.append(f"{name}: {value:.3g}" if isinstance(value, float) else f"{name}: {value}")
+        return "\n".join(lines) if lines else "(no metrics yet)"
+
+
+def to_prometheus(metrics: Metrics, prefix: str = "assistant") -> str:
+    """Render metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, h in sorted(metrics.histograms.items()):
+        full = f"{prefix}_{name}"
+        lines.append(f"# TYPE {full} summary")
+        for q, value in h.quantiles().items():
+            lines.append(f'{full}{{quantile="{q}"}} {value!r}')
+        lines.append(f"{full}_sum {h.total!r}")
+        lines.append(f"{full}_count {h.count}")
+    for name, value in sorted(metrics.counters.items()):
+        full = f"{prefix}_{name}"
+        lines.append(f"# TYPE {full} counter")
+        lines.append(f"{full} {value!r}")
+    for name, value in sorted(metrics.gauges().items()):
+        full = f"{prefix}_{name}"
+        lines.append(f"# TYPE {full} gauge")
+        lines.append(f"{full} {float(value)!r}")
+    return "\n".join(lines) + "\n"
+
+
+# ──────────────────────────────────────────────────────────────
+# Wrappers
+class InstrumentedProvider:
+    """AIProvider wrapper timing ``generate`` and time-to-first-token of ``stream``."""
+
+    def __init__(self, provider, metrics: Metrics):
+        self.provider = provider
+        self.metrics = metrics
+
+    def generate(self, conversation: Conversation) -> str:
+        try:
+            with self.metrics.timer("provider_generate_seconds"):
+                return self.provider.generate(conversation)
+        except Exception:
+            self.metrics.incr("provider_errors_total")
+            raise
+
+    def stream(self, conversation: Conversation) -> Iterator[str]:
+        stream = getattr(self.provider, "stream", None)
+        if stream is None:
+            yield self.generate(conversation)
+            return
+
+        started = time.perf_counter()
+        first = True
+        try:
+            for chunk in stream(conversation):
+                if first:
+                    self.metrics.observe("provider_ttft_seconds", time.perf_counter() - started)
+                    first = False
+                yield chunk
+        except Exception:
+            self.metrics.incr("provider_errors_total")
+            raise
+        self.metrics.observe("provider_stream_seconds", time.perf_counter() - started)
+
+    def __getattr__(self, name: str):
+        return getattr(self.provider, name)
+
+
+class InstrumentedCore:
+    """CorePort wrapper timing ``generate_reply`` and streamed replies."""
+
+    def __init__(self, core, metrics: Metrics):
+        self.core = core
+        self.metrics = metrics
+
+    def start_conversation(self, mode: str) -> Conversation:
+        return self.core.start_conversation(mode)
+
+    def generate_reply(self, conversation: Conversation) -> Message:
+        with self.metrics.timer("core_generate_reply_seconds"):
+            return self.core.generate_reply(conversation)
+
+    def stream_reply(self, conversation: Conversation) -> Iterator[str]:
+        stream_reply = getattr(self.core, "stream_reply", None)
+        if stream_reply is None:
+            yield self.generate_reply(conversation).content
+            return
+
+        started = time.perf_counter()
+        first = True
+        for chunk in stream_reply(conversation):
+            if first:
+                self.metrics.observe("core_ttft_seconds", time.perf_counter() - started)
+                first = False
+            yield chunk
+        self.metrics.observe("core_stream_reply_seconds", time.perf_counter() - started)
+
+    def __getattr__(self, name: str):
+        return getattr(self.core, name)
+
+
+class InstrumentedHistory:
+    """HistoryPort wrapper timing ``save``/``load_all`` and counting bytes written.
+
+    Bytes come from the wrapped storage's ``bytes_written`` counter when it
+    keeps one (FileHistoryStorage does). Put it inside a WriteBehindHistory,
+    not around it, so it times the writes rather than the enqueue.
+    """
+
+    def __init__(self, history, metrics: Metrics):
+        self.history = history
+        self.metrics = metrics
+
+    def save(self, conversation: Conversation) -> None:
+        self._timed_write(self.history.save, conversation)
+
+    def save_many(self, conversations: List[Conversation]) -> None:
+        save_many = getattr(self.history, "save_many", None)
+        if save_many is None:
+            for conversation in conversations:
+                self.save(conversation)
+            return
+        self._timed_write(save_many, conversations)
+
+    def load_all(self) -> List[Conversation]:
+        with self.metrics.timer("history_load_all_seconds"):
+            return self.history.load_all()
+
+    def __getattr__(self, name: str):
+        return getattr(self.history, name)
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _timed_write(self, write: Callable, arg) -> None:
+        before = getattr(self.history, "bytes_written", None)
+        with self.metrics.timer("history_save_seconds"):
+            write(arg)
+        if before is not None:
+            self.metrics.incr("history_bytes_written_total", self.history.bytes_written - before)
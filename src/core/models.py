@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import uuid
+from array import array
+from collections.abc import MutableSequence
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, overload
 
 class Role(str, Enum):
   """Role of a message in a conversation."""
@@ -11,39 +14,275 @@ class Role(str, Enum):
   SYSTEM = "system"
   AI = "ai"
 
-@dataclass
+# Stable one-byte codes for roles, used by the columnar MessageStore.
+ROLE_BY_CODE = tuple(Role)
+CODE_BY_ROLE = {role: code for code, role in enumerate(ROLE_BY_CODE)}
+
+
+@dataclass(frozen=True, slots=True)
 class Message:
-  """A single message in the conversation."""
+  """A single message in the conversation (immutable, no per-instance dict)."""
   role: Role
   content: str
 
+
+class MessageStore(MutableSequence):
+  """Columnar list of messages for large in-memory histories.
+
+  Roles are kept as one-byte codes in an ``array('B')`` and contents in a
+  plain list, so a stored message costs two slots instead of a Message
+  object. Indexing returns Message views, so it behaves like List[Message].
+
+  ``version`` goes up on every mutation; ``rewritten`` is the version of
+  the last change that was not an append (so a RoleIndex can tell).
+  """
+
+  __slots__ = ("_roles", "_contents", "version", "rewritten")
+
+  def __init__(self, messages: Iterable[Message] = ()):
+    self._roles = array("B")
+    self._contents: List[str] = []
+    self.version = 0
+    self.rewritten = 0
+    self.extend(messages)
+
+  @classmethod
+  def from_columns(cls, roles: Iterable[Role], contents: Iterable[str]) -> "MessageStore":
+    store = cls()
+    store._roles.extend(CODE_BY_ROLE[r] for r in roles)
+    store._contents.extend(contents)
+    return store
+
+  @classmethod
+  def from_records(cls, records: List[Dict[str, str]]) -> "MessageStore":
+    """Build straight from decoded ``{"role", "content"}`` dicts (history format).
+
+    Role strings map to codes without creating Role or Message objects.
+    """
+    store = cls()
+    store._roles.extend([CODE_BY_ROLE[r["role"]] for r in records])
+    store._contents.extend([r["content"] for r in records])
+    return store
+
+  def to_records(self) -> List[Dict[str, str]]:
+    """Inverse of ``from_records``."""
+    return [
+      {"role": ROLE_BY_CODE[code].value, "content": content}
+      for code, content in zip(self._roles, self._contents)
+    ]
+
+  def __len__(self) -> int:
+    return len(self._contents)
+
+  @overload
+  def __getitem__(self, index: int) -> Message: ...
+  @overload
+  def __getitem__(self, index: slice) -> "MessageStore": ...
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      store = MessageStore()
+      store._roles = self._roles[index]
+      store._contents = self._contents[index]
+      return store
+    return Message(role=ROLE_BY_CODE[self._roles[index]], content=self._contents[index])
+
+  def __setitem__(self, index, value) -> None:
+    self._rewrite()
+    if isinstance(index, slice):
+      values = list(value)
+      self._roles[index] = array("B", [CODE_BY_ROLE[m.role] for m in values])
+      self._contents[index] = [m.content for m in values]
+      return
+    self._roles[index] = CODE_BY_ROLE[value.role]
+    self._contents[index] = value.content
+
+  def __delitem__(self, index) -> None:
+    self._rewrite()
+    del self._roles[index]
+    del self._contents[index]
+
+  def insert(self, index: int, value: Message) -> None:
+    self._rewrite()
+    self._roles.insert(index, CODE_BY_ROLE[value.role])
+    self._contents.insert(index, value.content)
+
+  def append(self, value: Message) -> None:
+    self.version += 1
+    self._roles.append(CODE_BY_ROLE[value.role])
+    self._contents.append(value.content)
+
+  def extend(self, values: Iterable[Message]) -> None:
+    self.version += 1
+    if isinstance(values, MessageStore):
+      self._roles.extend(values._roles)
+      self._contents.extend(values._contents)
+      return
+    for value in values:
+      self.append(value)
+
+  def __iter__(self) -> Iterator[Message]:
+    for code, content in zip(self._roles, self._contents):
+      yield Message(role=ROLE_BY_CODE[code], content=content)
+
+  def __reversed__(self) -> Iterator[Message]:
+    for i in range(len(self._contents) - 1, -1, -1):
+      yield self[i]
+
+  def __eq__(self, other: object) -> bool:
+    if isinstance(other, MessageStore):
+      return self._roles == other._roles and self._contents == other._contents
+    if isinstance(other, (list, tuple)):
+      return len(other) == len(self) and all(a == b for a, b in zip(self, other))
+    return NotImplemented
+
+  def __repr__(self) -> str:
+    return f"MessageStore({list(self)!r})"
+
+  def roles(self) -> List[Role]:
+    return [ROLE_BY_CODE[c] for c in self._roles]
+
+  def roles_from(self, start: int) -> Iterator[Role]:
+    """Roles of messages ``start`` onwards, without copying the earlier ones."""
+    roles = self._roles
+    for pos in range(start, len(roles)):
+      yield ROLE_BY_CODE[roles[pos]]
+
+  def contents(self) -> List[str]:
+    return list(self._contents)
+
+  def _rewrite(self) -> None:
+    self.version += 1
+    self.rewritten = self.version
+
+class RoleIndex:
+  """Incremental per-role index over a conversation's messages.
+
+  Tracks the last position and count per role and the positions of user
+  turns. It follows appends in O(1); any other change to the message list
+  makes it rebuild on the next query. A MessageStore reports such changes
+  through its ``rewritten`` version; a plain list only by identity or
+  length, so in-place edits of a list must go through ``replace_messages``.
+  """
+
+  __slots__ = ("messages", "size", "version", "last", "counts", "user_positions")
+
+  def __init__(self, messages: List[Message]):
+    self.messages = messages
+    self.size = 0
+    self.version = getattr(messages, "version", 0)
+    self.last: Dict[Role, int] = {}
+    self.counts: Dict[Role, int] = {}
+    self.user_positions: List[int] = []
+
+  def track(self, position: int, role: Role) -> None:
+    self.last[role] = position
+    self.counts[role] = self.counts.get(role, 0) + 1
+    if role is Role.USER:
+      self.user_positions.append(position)
+    self.size = position + 1
+
+  def in_sync(self, messages: List[Message]) -> bool:
+    if messages is not self.messages or len(messages) < self.size:
+      return False
+    return getattr(messages, "rewritten", 0) <= self.version
+
+  def catch_up(self) -> None:
+    messages = self.messages
+    if isinstance(messages, MessageStore):
+      for pos, role in enumerate(messages.roles_from(self.size), start=self.size):
+        self.track(pos, role)
+      self.version = messages.version
+    else:
+      for pos in range(self.size, len(messages)):
+        self.track(pos, messages[pos].role)
+
+
 @dataclass
 class Conversation:
   """Represents a full conversation with the AI Assistant.
   'mode' can be used to switch behavior:
   e.g. "chat", "coder", "translatior", "explainer",...
+  'id' is a stable identifier used by history storage to append
+  only new messages instead of re-writing the whole conversation.
+  'archived' counts messages that were persisted and then dropped from
+  memory by compaction: messages[i] is message i + archived of the
+  stored transcript.
+  'rewrites' counts replace_messages calls, so caches built over the
+  messages (RoleIndex, ContextWindow) notice in-place edits of a list.
   """
   mode: str
   messages: List[Message] = field(default_factory=list)
+  id: str = field(default_factory=lambda: uuid.uuid4().hex)
+  archived: int = 0
+  rewrites: int = field(default=0, init=False, repr=False, compare=False)
+  _index: RoleIndex | None = field(default=None, init=False, repr=False, compare=False)
+
+  @property
+  def transcript_length(self) -> int:
+    """Number of messages in the full (stored) transcript."""
+    return len(self.messages) + self.archived
 
   def add_user_message(self, content: str) -> None:
-    self.messages.append(Message(role=Role.USER, content=content))
+    self.add_message(Message(role=Role.USER, content=content))
 
   def add_assistant_message(self, content: str) -> None:
-    self.messages.append(Message(role=Role.ASSISTANT, content=content))
+    self.add_message(Message(role=Role.ASSISTANT, content=content))
 
   def add_system_message(self, content: str) -> None:
-    self.messages.append(Message(role=Role.SYSTEM, content=content))
+    self.add_message(Message(role=Role.SYSTEM, content=content))
 
   def add_message(self, message: Message) -> None:
     """Apend a pre-built Message object."""
     self.messages.append(message)
+    index = self._index
+    if index is not None and index.messages is self.messages and index.size == len(self.messages) - 1:
+      index.track(index.size, message.role)
+
+  def replace_messages(self, start: int, stop: int, messages: List[Message]) -> None:
+    """Replace messages[start:stop] (e.g. older turns by a summary)."""
+    self.messages[start:stop] = messages
+    self._index = None
+    self.rewrites += 1
+
+  # ──────────────────────────────────────────────────────────────
+  # Role-based queries (served from the incremental index)
+  def last_message(self, role: Role) -> Message | None:
+    pos = self._role_index().last.get(role)
+    return None if pos is None else self.messages[pos]
 
   def last_user_message(self) -> str:
-    for msg in reversed(self.messages):
-      if msg.role == Role.USER:
-        return msg.content
-    return ""
+    msg = self.last_message(Role.USER)
+    return msg.content if msg is not None else ""
+
+  def count(self, role: Role) -> int:
+    return self._role_index().counts.get(role, 0)
+
+  def user_turn_positions(self) -> List[int]:
+    """Positions of user messages, oldest first (a copy)."""
+    return list(self._role_index().user_positions)
+
+  def last_user_turns(self, n: int) -> List[Message]:
+    """Messages from the n-th most recent user message to the end."""
+    if n <= 0:
+      return []
+    positions = self._role_index().user_positions
+    if not positions:
+      return []
+    start = positions[-n] if n <= len(positions) else positions[0]
+    return list(self.messages[start:])
+
+  def _role_index(self) -> RoleIndex:
+    index = self._index
+    if index is None or not index.in_sync(self.messages):
+      index = self._index = RoleIndex(self.messages)
+    index.catch_up()
+    return index
+
+  def compact(self) -> None:
+    """Switch to columnar MessageStore storage (saves memory for big histories)."""
+    if not isinstance(self.messages, MessageStore):
+      self.messages = MessageStore(self.messages)
 
   def to_ai_payload(self) -> List[Dict[str, str]]:
     """Convert messages into a list of dicts compatible with common AI APIs.
@@ -0,0 +1,127 @@
+"""
+Start-up work that runs in the background while the UI comes up.
+
+``Prewarm`` runs named tasks, in the order they were added, on one daemon
+thread. ``get(name)`` returns a task's result, waiting for it if it is
+still running, and re-raises its error in the caller. ``Deferred`` stands
+in for such a result so it can be handed to code that expects the real
+object (e.g. a HistoryPort): the first attribute access waits for it.
+
+    warm = Prewarm()
+    history = warm.add("history", open_history)   # Deferred
+    warm.add("index", lambda: warm.get("history").warm())
+    warm.start()
+    print("You: ", end="")                        # no waiting here
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, List
+
+
+class _Task:
+    def __init__(self, name: str, fn: Callable[[], object]):
+        self.name = name
+        self.fn = fn
+        self.done = threading.Event()
+        self.result: object = None
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        try:
+            self.result = self.fn()
+        except BaseException as exc:
+            self.error = exc
+        finally:
+            self.done.set()
+
+
+class Prewarm:
+    """Ordered background start-up tasks whose results are awaited on demand."""
+
+    def __init__(self, name: str = "prewarm"):
+        self.name = name
+        self._tasks: Dict[str, _Task] = {}
+        self._queue: List[_Task] = []
+        self._thread: threading.Thread | None = None
+        self._started = False
+        self._lock = threading.Lock()
+
+    def add(self, name: str, fn: Callable[[], object]) -> "Deferred":
+        """Queue ``fn``; tasks may ``get`` the results of earlier tasks."""
+        with self._lock:
+            if name in self._tasks:
+                raise ValueError(f"task {name!r} was already added")
+            task = self._tasks[name] = _Task(name, fn)
+            self._queue.append(task)
+            if self._started and self._thread is None:
+                self._start_locked()
+        return Deferred(self, name)
+
+    def start(self) -> "Prewarm":
+        """Start the background thread (idempotent)."""
+        with self._lock:
+            self._started = True
+            if self._thread is None and self._queue:
+                self._start_locked()
+        return self
+
+    def get(self, name: str, timeout: float | None = None) -> object:
+        """Result of task ``name``, waiting for it (and starting if needed)."""
+        task = self._tasks[name]
+        if not task.done.is_set():
+            if threading.current_thread() is self._thread:
+                raise RuntimeError(f"task {name!r} is queued after the task waiting for it")
+            self.start()
+            if not task.done.wait(timeout):
+                raise TimeoutError(f"start-up task {name!r} is still running")
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def ready(self, name: str) -> bool:
+        """Whether task ``name`` has finished (successfully or not)."""
+        return self._tasks[name].done.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for every queued task; False on timeout."""
+        for task in list(self._tasks.values()):
+            if not task.done.wait(timeout):
+                return False
+        return True
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _start_locked(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._thread = None
+                    return
+                task = self._queue.pop(0)
+            task.run()
+
+
+class Deferred:
+    """Placeholder for a ``Prewarm`` result; attribute access waits for it."""
+
+    def __init__(self, prewarm: Prewarm, name: str):
+        self._prewarm = prewarm
+        self._name = name
+
+    def resolve(self) -> object:
+        return self._prewarm.get(self._name)
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)  # copy/pickle probes shouldn't block
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        state = "ready" if self._prewarm.ready(self._name) else "pending"
+        return f"<Deferred {self._name!r} ({state})>"
@@ -0,0 +1,369 @@
+"""
+Many conversations per worker.
+
+``SessionManager`` keys ``AssistantSession`` objects by conversation (or
+user) id. Recently used sessions stay in a bounded in-memory LRU; idle or
+least recently used ones are saved to the HistoryPort and dropped, and
+rehydrated from history the next time their key is used. Both the number
+of live sessions and their estimated size are capped, so a worker's memory
+stays flat however many users have ever connected.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from .app import AssistantSession, CompactorPort, CorePort, HistoryPort
+from .metrics import Metrics
+from .models import Conversation
+
+
+SESSION_OVERHEAD = 2048   # rough bytes per live session besides its messages
+MESSAGE_OVERHEAD = 16     # rough bytes per message besides its text
+
+# An evicted session: key, its entry, whether it has unsaved messages, busy event
+_Victim = Tuple[str, "_Entry", bool, threading.Event]
+
+
+def estimate_bytes(conversation: Conversation) -> int:
+    """Rough in-memory size of a conversation (text plus fixed overheads)."""
+    return SESSION_OVERHEAD + sum(_message_bytes(c) for c in _contents(conversation))
+
+
+@dataclass
+class SessionStats:
+    hits: int = 0
+    rehydrated: int = 0     # loaded back from history
+    created: int = 0        # new conversations
+    evictions: int = 0      # LRU / memory pressure
+    idle_evictions: int = 0
+    save_errors: int = 0    # evictions put back because saving failed
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.rehydrated + self.created
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class _Entry:
+    session: AssistantSession
+    last_used: float
+    saved: int                      # transcript length known to be in history
+    size: int                       # estimate_bytes of the conversation
+    count: int                      # len(messages) when size was computed
+    archived: int                   # conversation.archived when size was computed
+    pins: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class SessionManager:
+    """Bounded LRU of AssistantSessions backed by a HistoryPort.
+
+    ``max_sessions`` caps live sessions and ``max_bytes`` (None = no cap)
+    their estimated total size; ``idle_timeout`` (seconds, None = never)
+    evicts sessions nobody used for that long; acquiring sessions sweeps
+    for them at most every ``idle_timeout / 2``. Sessions in use (see
+    ``session``) are never evicted, so the caps can be exceeded briefly
+    while more sessions than that are busy at once.
+
+    A key that history does not know starts a new conversation whose id is
+    the key, so user ids work as keys too. Turns on one session are
+    serialized; different sessions run concurrently. History is read and
+    written outside the manager lock: a key being loaded or saved is
+    marked busy, and only callers for that key wait for it.
+    """
+
+    def __init__(
+        self,
+        core: CorePort,
+        history: HistoryPort,
+        mode: str = "chat",
+        max_sessions: int = 1000,
+        max_bytes: int | None = None,
+        idle_timeout: float | None = None,
+        compactor: CompactorPort | None = None,
+        metrics: Metrics | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.core = core
+        self.history = history
+        self.mode = mode
+        self.max_sessions = max(1, max_sessions)
+        self.max_bytes = max_bytes
+        self.idle_timeout = idle_timeout
+        self.compactor = compactor
+        self.metrics = metrics
+        self.clock = clock
+        self.stats = SessionStats()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._busy: Dict[str, threading.Event] = {}   # keys being loaded or saved
+        self._next_sweep = clock() + idle_timeout / 2 if idle_timeout is not None else None
+        self._lock = threading.RLock()
+        if metrics is not None:
+            metrics.add_source("sessions", self.usage)
+
+    # ──────────────────────────────────────────────────────────────
+    # Public API used by servers
+    def handle(self, key: str, text: str) -> str:
+        """``AssistantSession.handle_user_input`` on the session for ``key``."""
+        with self.session(key) as session:
+            return session.handle_user_input(text)
+
+    def stream(self, key: str, text: str) -> Iterator[str]:
+        """``AssistantSession.stream_user_input``; the session stays pinned until exhausted."""
+        with self.session(key) as session:
+            yield from session.stream_user_input(text)
+
+    @contextmanager
+    def session(self, key: str, mode: str | None = None) -> Iterator[AssistantSession]:
+        """Pin the session for ``key`` (loading or creating it) and run one turn.
+
+        The session is not evicted and no other turn runs on it until the
+        block exits.
+        """
+        entry, victims = self._acquire(key, mode)
+        completed = False
+        try:
+            self._save(victims)
+            with entry.lock:
+                yield entry.session
+            completed = True
+        finally:
+            self._release(key, entry, completed)
+
+    def evict_idle(self) -> int:
+        """Evict sessions idle for longer than ``idle_timeout``; returns how many."""
+        if self.idle_timeout is None:
+            return 0
+        with self._lock:
+            victims = self._idle_victims()
+        return len(victims) - len(self._save(victims))
+
+    def close(self) -> None:
+        """Save every live session that has unsaved messages and drop them all.
+
+        Sessions that fail to save stay live, and the first error is raised.
+        """
+        with self._lock:
+            victims = [self._detach(key) for key in list(self._entries)]
+        errors = self._save(victims)
+        if errors:
+            raise errors[0]
+
+    def usage(self) -> Dict[str, float]:
+        """Occupancy and memory figures (also exported as metrics gauges)."""
+        with self._lock:
+            return {
+                "live": len(self._entries),
+                "max_sessions": self.max_sessions,
+                "occupancy": len(self._entries) / self.max_sessions,
+                "pinned": sum(1 for e in self._entries.values() if e.pins),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes if self.max_bytes is not None else 0,
+                "hits": self.stats.hits,
+                "rehydrated": self.stats.rehydrated,
+                "created": self.stats.created,
+                "evictions": self.stats.evictions,
+                "idle_evictions": self.stats.idle_evictions,
+                "save_errors": self.stats.save_errors,
+                "hit_rate": self.stats.hit_rate,
+            }
+
+    def keys(self) -> List[str]:
+        """Live session keys, least recently used first."""
+        with self._lock:
+            return list(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _acquire(self, key: str, mode: str | None) -> Tuple[_Entry, List[_Victim]]:
+        """Pin ``key``'s entry; returns it and the sessions it pushed out, to save."""
+        while True:
+            with self._lock:
+                victims = self._idle_victims() if self._sweep_due() else []
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.stats.hits += 1
+                    victims += self._pin(entry)
+                    busy = None
+                    break
+                busy = self._busy.get(key)
+                if busy is None:
+                    # Claim the key; its history is read outside the lock.
+                    busy = self._busy[key] = threading.Event()
+                    break
+            self._save(victims)
+            busy.wait()  # loaded or saved by another thread; look again
+
+        if busy is None:
+            return entry, victims
+        try:
+            entry = self._load(key, mode or self.mode)
+            with self._lock:
+                self._entries[key] = entry
+                self._bytes += entry.size
+                victims += self._pin(entry)
+        finally:
+            with self._lock:
+                del self._busy[key]
+            busy.set()
+        return entry, victims
+
+    def _release(self, key: str, entry: _Entry, completed: bool) -> None:
+        victims = []
+        with self._lock:
+            entry.pins -= 1
+            entry.last_used = self.clock()
+            if completed:
+                # AssistantSession saves after every completed turn; a failed
+                # or cancelled one leaves messages for eviction to save.
+                entry.saved = entry.session.conversation.transcript_length
+            if self._entries.get(key) is entry:
+                self._resize(entry)
+                victims = self._over_limit_victims()
+        self._save(victims)
+
+    def _load(self, key: str, mode: str) -> _Entry:
+        conv = self._rehydrate(key)
+        rehydrated = conv is not None
+        if not rehydrated:
+            conv = self.core.start_conversation(mode)
+            conv.id = key
+        with self._lock:
+            if rehydrated:
+                self.stats.rehydrated += 1
+            else:
+                self.stats.created += 1
+        session = AssistantSession(
+            core=self.core,
+            history=self.history,
+            conversation=conv,
+            compactor=self.compactor,
+            metrics=self.metrics,
+        )
+        return _Entry(
+            session=session,
+            last_used=self.clock(),
+            saved=conv.transcript_length,
+            size=estimate_bytes(conv),
+            count=len(conv.messages),
+            archived=conv.archived,
+        )
+
+    def _rehydrate(self, key: str) -> Conversation | None:
+        get = getattr(self.history, "get", None)
+        if get is not None:
+            return get(key)
+        # Plain HistoryPort: scan (newest record of the id wins).
+        found = None
+        for conv in self.history.load_all():
+            if conv.id == key:
+                found = conv
+        return found
+
+    def _resize(self, entry: _Entry) -> None:
+        conv = entry.session.conversation
+        count = len(conv.messages)
+        if conv.archived == entry.archived and count >= entry.count:
+            # Only appended since last time: size just the new messages.
+            size = entry.size + sum(
+                _message_bytes(conv.messages[i].content) for i in range(entry.count, count)
+            )
+        else:
+            size = estimate_bytes(conv)  # compacted or edited
+        self._bytes += size - entry.size
+        entry.size, entry.count, entry.archived = size, count, conv.archived
+
+    def _pin(self, entry: _Entry) -> List[_Victim]:
+        entry.pins += 1
+        entry.last_used = self.clock()
+        return self._over_limit_victims()
+
+    def _over_limit_victims(self) -> List[_Victim]:
+        victims = []
+        while self._over_limits():
+            victim = next((k for k, e in self._entries.items() if not e.pins), None)
+            if victim is None:
+                break  # everything left is in use
+            victims.append(self._detach(victim))
+            self.stats.evictions += 1
+        return victims
+
+    def _over_limits(self) -> bool:
+        if len(self._entries) > self.max_sessions:
+            return True
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _sweep_due(self) -> bool:
+        if self._next_sweep is None or self.clock() < self._next_sweep:
+            return False
+        self._next_sweep = self.clock() + self.idle_timeout / 2
+        return True
+
+    def _idle_victims(self) -> List[_Victim]:
+        cutoff = self.clock() - self.idle_timeout
+        idle = [
+            key for key, entry in self._entries.items()
+            if entry.last_used <= cutoff and not entry.pins
+        ]
+        self.stats.idle_evictions += len(idle)
+        return [self._detach(key) for key in idle]
+
+    def _detach(self, key: str) -> _Victim:
+        """Drop ``key`` (under the lock) and mark it busy until ``_save`` has run."""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        unsaved = entry.session.conversation.transcript_length > entry.saved
+        busy = self._busy[key] = threading.Event()
+        return key, entry, unsaved, busy
+
+    def _save(self, victims: List[_Victim]) -> List[Exception]:
+        """Save detached sessions with unsaved messages (outside the lock).
+
+        A session that fails to save is put back as least recently used, so
+        it is retried on a later eviction; the errors are returned, not
+        raised, since they don't belong to the caller's turn.
+        """
+        errors = []
+        for key, entry, unsaved, busy in victims:
+            try:
+                if unsaved:
+                    self.history.save(entry.session.conversation)
+            except Exception as exc:
+                errors.append(exc)
+                with self._lock:
+                    self.stats.save_errors += 1
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key, last=False)
+                    self._bytes += entry.size
+            finally:
+                with self._lock:
+                    del self._busy[key]
+                busy.set()
+        return errors
+
+
+def _contents(conversation: Conversation) -> List[str]:
+    contents = getattr(conversation.messages, "contents", None)
+    if contents is not None:
+        return contents()
+    return [m.content for m in conversation.messages]
+
+
+def _message_bytes(content: str) -> int:
+    return sys.getsizeof(content) + MESSAGE_OVERHEAD
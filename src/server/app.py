@@ -0,0 +1,444 @@
+"""
+Asyncio front end that serves a SessionManager over HTTP.
+
+    POST /sessions/<key>/messages   {"text": "..."} → {"reply": "..."}
+                                    streamed as Server-Sent Events when the
+                                    request sends ``Accept: text/event-stream``
+                                    or ``?stream=1``
+    GET  /sessions/<key>/ws         WebSocket: each text message is one line of
+                                    user input, answered by {"type": "chunk"}
+                                    frames and a final {"type": "done"}
+    GET  /health, /stats, /metrics  liveness, JSON usage, Prometheus text
+
+Turns run on a thread pool (the sessions, core and history are
+synchronous). Streamed chunks pass through a small bounded queue, so a
+slow client stalls its own producer thread instead of buffering the whole
+reply; a client that doesn't read for ``write_timeout`` is disconnected.
+``max_inflight`` bounds concurrent turns, and requests that can't get a
+slot within ``queue_timeout`` get 503. ``shutdown`` drains: it stops
+accepting, lets running turns finish (up to a timeout) and saves all
+sessions.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Tuple
+
+from src.core.app import AssistantSession
+from src.core.metrics import Metrics, to_prometheus
+from src.core.sessions import SessionManager
+from src.server.protocol import (
+    CLOSE,
+    GOING_AWAY,
+    INTERNAL_ERROR,
+    NORMAL_CLOSURE,
+    TEXT,
+    HttpError,
+    Request,
+    WebSocketClosed,
+    chunk,
+    close_payload,
+    encode_frame,
+    json_response,
+    read_message,
+    read_request,
+    response,
+    response_head,
+    sse_event,
+    websocket_accept,
+)
+
+
+KEY_PATTERN = re.compile(r"^[A-Za-z0-9_.\-]{1,128}$")
+
+
+@dataclass
+class _Connection:
+    busy: bool = False          # serving a request (not waiting for the next one)
+
+
+class AssistantServer:
+    """HTTP/SSE/WebSocket server for many concurrent sessions.
+
+    ``workers`` threads run turns; ``stream_buffer`` is the number of reply
+    chunks buffered per streamed turn before the producer blocks.
+    """
+
+    def __init__(
+        self,
+        sessions: SessionManager,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        workers: int = 32,
+        max_inflight: int = 256,
+        queue_timeout: float = 1.0,
+        stream_buffer: int = 16,
+        write_timeout: float = 10.0,
+        keep_alive_timeout: float = 30.0,
+        max_body: int = 1024 * 1024,
+        metrics: Metrics | None = None,
+    ):
+        self.sessions = sessions
+        self.host = host
+        self.port = port
+        self.max_inflight = max_inflight
+        self.queue_timeout = queue_timeout
+        self.stream_buffer = max(1, stream_buffer)
+        self.write_timeout = write_timeout
+        self.keep_alive_timeout = keep_alive_timeout
+        self.max_body = max_body
+        self.metrics = metrics
+
+        self.inflight = 0
+        self.rejected = 0
+        self.slow_clients = 0
+        self.draining = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="turn")
+        self._slots: asyncio.Semaphore | None = None
+        self._drain_event: asyncio.Event | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: Dict[asyncio.Task, _Connection] = {}
+        if metrics is not None:
+            metrics.add_source("server", self.usage)
+
+    # ──────────────────────────────────────────────────────────────
+    # Lifecycle
+    async def start(self) -> "AssistantServer":
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self._drain_event = asyncio.Event()
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port, limit=64 * 1024
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def shutdown(self, timeout: float = 30.0) -> None:
+        """Stop accepting, finish running turns (up to ``timeout``), save sessions."""
+        if self.draining:
+            return
+        self.draining = True
+        self._drain_event.set()
+        self._server.close()
+        for task, conn in list(self._connections.items()):
+            if not conn.busy:
+                task.cancel()  # idle keep-alive connection
+        pending = set(self._connections)
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self._server.wait_closed()
+
+        loop = asyncio.get_running_loop()
+        # Turns already handed to a thread finish (and save) before sessions close.
+        await loop.run_in_executor(None, self._executor.shutdown, True)
+        await loop.run_in_executor(None, self.sessions.close)
+
+    def usage(self) -> Dict[str, float]:
+        return {
+            "connections": len(self._connections),
+            "inflight": self.inflight,
+            "rejected": self.rejected,
+            "slow_clients": self.slow_clients,
+            "draining": int(self.draining),
+        }
+
+    # ──────────────────────────────────────────────────────────────
+    # Connections
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = _Connection()
+        task = asyncio.current_task()
+        self._connections[task] = conn
+        # Small transport buffer: drain() then really waits for a slow client.
+        writer.transport.set_write_buffer_limits(high=64 * 1024)
+        try:
+            while not self.draining:
+                try:
+                    request = await asyncio.wait_for(
+                        read_request(reader, self.max_body), self.keep_alive_timeout
+                    )
+                except HttpError as exc:
+                    writer.write(self._error_response(exc, keep_alive=False))
+                    await self._drain(writer)
+                    return
+                if request is None:
+                    return
+                conn.busy = True
+                keep_alive = await self._dispatch(request, reader, writer)
+                conn.busy = False
+                if not keep_alive:
+                    return
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # shutdown
+        finally:
+            del self._connections[task]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _dispatch(self, request: Request, reader, writer) -> bool:
+        """Serve one request; returns whether the connection may be reused."""
+        keep_alive = request.keep_alive and not self.draining
+        started = time.perf_counter()
+        try:
+            route, key = self._route(request)
+            if route == "ws":
+                await self._websocket(request, key, reader, writer)
+                return False
+            if route == "messages":
+                keep_alive = await self._messages(request, key, writer, keep_alive)
+            elif route == "health":
+                status = 503 if self.draining else 200
+                payload = {"status": "draining" if self.draining else "ok"}
+                writer.write(json_response(status, payload, keep_alive))
+            elif route == "stats":
+                payload = {"server": self.usage(), "sessions": self.sessions.usage()}
+                if self.metrics is not None:
+                    payload["metrics"] = self.metrics.snapshot()
+                writer.write(json_response(200, payload, keep_alive))
+            elif route == "metrics":
+                if self.metrics is None:
+                    raise HttpError(404, "metrics are off")
+                body = to_prometheus(self.metrics).encode("utf-8")
+                writer.write(response(200, body, "text/plain; version=0.0.4", keep_alive))
+        except HttpError as exc:
+            writer.write(self._error_response(exc, keep_alive))
+        except ConnectionError:
+            raise
+        except Exception as exc:  # turn failed: report, keep serving others
+            writer.write(json_response(500, {"error": str(exc) or type(exc).__name__}, keep_alive))
+        await self._drain(writer)
+        if self.metrics is not None:
+            self.metrics.incr("server_requests")
+            self.metrics.observe("server_request_seconds", time.perf_counter() - started)
+        return keep_alive
+
+    def _route(self, request: Request) -> Tuple[str, str | None]:
+        parts = request.path.strip("/").split("/")
+        if len(parts) == 1 and parts[0] in ("health", "stats", "metrics"):
+            self._require(request, "GET")
+            return parts[0], None
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] in ("messages", "ws"):
+            if not KEY_PATTERN.match(parts[1]):
+                raise HttpError(400, "bad session key")
+            self._require(request, "POST" if parts[2] == "messages" else "GET")
+            return parts[2], parts[1]
+        raise HttpError(404)
+
+    @staticmethod
+    def _require(request: Request, method: str) -> None:
+        if request.method != method:
+            raise HttpError(405, headers={"Allow": method})
+
+    # ──────────────────────────────────────────────────────────────
+    # Handlers
+    async def _messages(self, request: Request, key: str, writer, keep_alive: bool) -> bool:
+        text = request.json().get("text")
+        if not isinstance(text, str):
+            raise HttpError(400, 'body needs a "text" string')
+        streamed = (
+            request.query.get("stream") in ("1", "true")
+            or "text/event-stream" in request.headers.get("accept", "")
+        )
+        if not streamed:
+            async with self._turn_slot():
+                loop = asyncio.get_running_loop()
+                reply = await loop.run_in_executor(self._executor, self.sessions.handle, key, text)
+            keep_alive = keep_alive and not self.draining
+            writer.write(json_response(200, {"reply": _visible(reply)}, keep_alive))
+            return keep_alive
+
+        async with self._turn_slot():
+            writer.write(response_head(200, {
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "Transfer-Encoding": "chunked",
+                "Connection": "keep-alive" if keep_alive else "close",
+            }))
+            try:
+                async with aclosing(self._stream_turn(key, text)) as parts:
+                    async for part in parts:
+                        writer.write(chunk(sse_event({"text": _visible(part)})))
+                        await self._drain(writer)
+                writer.write(chunk(sse_event({}, event="done")))
+            except ConnectionError:
+                raise
+            except Exception as exc:
+                writer.write(chunk(sse_event({"error": str(exc) or type(exc).__name__}, event="error")))
+            writer.write(chunk(b""))
+        return keep_alive and not self.draining
+
+    async def _websocket(self, request: Request, key: str, reader, writer) -> None:
+        ws_key = request.headers.get("sec-websocket-key")
+        if not request.wants_websocket() or not ws_key:
+            raise HttpError(400, "expected a WebSocket upgrade")
+        if request.headers.get("sec-websocket-version") != "13":
+            raise HttpError(426, headers={"Sec-WebSocket-Version": "13"})
+        if self.draining:
+            raise HttpError(503, "server is shutting down")
+        writer.write(response_head(101, {
+            "Upgrade": "websocket",
+            "Connection": "Upgrade",
+            "Sec-WebSocket-Accept": websocket_accept(ws_key),
+        }))
+        await self._drain(writer)
+
+        code = NORMAL_CLOSURE
+        try:
+            while True:
+                message = await self._next_message(reader, writer)
+                if message is None:
+                    code = GOING_AWAY
+                    break
+                text = message.decode("utf-8", "replace")
+                try:
+                    async with self._turn_slot():
+                        exit_requested = await self._websocket_turn(key, text, writer)
+                except HttpError as exc:
+                    await self._send_json(writer, {"type": "error", "error": str(exc), "status": exc.status})
+                    continue
+                if exit_requested:
+                    break
+        except WebSocketClosed:
+            return  # close frame already echoed
+        except ConnectionError:
+            return
+        except Exception:
+            code = INTERNAL_ERROR
+        writer.write(encode_frame(CLOSE, close_payload(code)))
+        try:
+            await self._drain(writer)
+        except ConnectionError:
+            pass
+
+    async def _websocket_turn(self, key: str, text: str, writer) -> bool:
+        try:
+            async with aclosing(self._stream_turn(key, text)) as parts:
+                async for part in parts:
+                    if part == AssistantSession.EXIT_TOKEN:
+                        return True
+                    await self._send_json(writer, {"type": "chunk", "text": part})
+        except ConnectionError:
+            raise
+        except Exception as exc:
+            await self._send_json(writer, {"type": "error", "error": str(exc) or type(exc).__name__})
+            return False
+        await self._send_json(writer, {"type": "done"})
+        return False
+
+    async def _next_message(self, reader, writer) -> bytes | None:
+        """Next WebSocket data message, or None once the server starts draining."""
+        read = asyncio.ensure_future(read_message(reader, writer, self.max_body))
+        drained = asyncio.ensure_future(self._drain_event.wait())
+        done, _ = await asyncio.wait({read, drained}, return_when=asyncio.FIRST_COMPLETED)
+        if read in done:
+            drained.cancel()
+            return read.result()[1]
+        read.cancel()
+        return None
+
+    # ──────────────────────────────────────────────────────────────
+    # Turns
+    @asynccontextmanager
+    async def _turn_slot(self) -> AsyncIterator[None]:
+        if self.draining:
+            raise HttpError(503, "server is shutting down")
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HttpError(503, "server busy", {"Retry-After": "1"}) from None
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            self._slots.release()
+
+    async def _stream_turn(self, key: str, text: str) -> AsyncIterator[str]:
+        """Run ``SessionManager.stream`` on a worker thread, yielding its chunks.
+
+        At most ``stream_buffer`` chunks wait for the client; then the worker
+        blocks. Leaving the loop early stops the worker, which closes the
+        session stream (the unfinished turn isn't saved until eviction).
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(self.stream_buffer)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            while True:
+                try:
+                    future.result(0.1)
+                    return True
+                except FutureTimeoutError:  # not the builtin before Python 3.11
+                    if stop.is_set():
+                        future.cancel()
+                        return False
+
+        def produce() -> None:
+            chunks = self.sessions.stream(key, text)
+            try:
+                for part in chunks:
+                    if stop.is_set() or not put(("chunk", part)):
+                        return
+            except Exception as exc:
+                put(("error", exc))
+                return
+            finally:
+                chunks.close()
+            put(("done", None))
+
+        loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "done":
+                    return
+                if kind == "error":
+                    raise value
+                yield value
+        finally:
+            stop.set()
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    async def _drain(self, writer: asyncio.StreamWriter) -> None:
+        try:
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except asyncio.TimeoutError:
+            self.slow_clients += 1
+            writer.transport.abort()
+            raise ConnectionResetError("client too slow") from None
+
+    async def _send_json(self, writer, payload: dict) -> None:
+        writer.write(encode_frame(TEXT, json.dumps(payload).encode("utf-8")))
+        await self._drain(writer)
+
+    @staticmethod
+    def _error_response(exc: HttpError, keep_alive: bool) -> bytes:
+        return json_response(exc.status, {"error": str(exc)}, keep_alive, headers=exc.headers)
+
+
+def _visible(reply: str) -> str:
+    # /exit means nothing over HTTP: the client just stops sending.
+    return "" if reply == AssistantSession.EXIT_TOKEN else reply
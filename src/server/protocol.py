@@ -0,0 +1,288 @@
+"""
+Just enough HTTP/1.1, Server-Sent Events and WebSocket (RFC 6455) on top
+of asyncio streams for the assistant server and its load-test client.
+
+Requests are read with a bounded header block and a ``Content-Length``
+body (no chunked request bodies); streamed responses use chunked
+transfer encoding so connections stay reusable. WebSocket support covers
+text/binary messages, fragmentation, ping/pong and close, without
+extensions.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+MAX_HEADER_BYTES = 16 * 1024
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC11B30"
+
+# WebSocket opcodes
+CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# WebSocket close codes
+NORMAL_CLOSURE = 1000
+GOING_AWAY = 1001
+PROTOCOL_ERROR = 1002
+MESSAGE_TOO_BIG = 1009
+INTERNAL_ERROR = 1011
+
+
+class HttpError(Exception):
+    """Request that can't be served; answered with ``status`` and a JSON error."""
+
+    def __init__(self, status: int, message: str = "", headers: Dict[str, str] | None = None):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+        self.headers = headers or {}
+
+
+class WebSocketClosed(Exception):
+    """The peer closed the WebSocket (or broke the protocol)."""
+
+    def __init__(self, code: int = NORMAL_CLOSURE, reason: str = ""):
+        super().__init__(f"{code} {reason}".strip())
+        self.code = code
+        self.reason = reason
+
+
+@dataclass
+class Request:
+    method: str
+    target: str
+    version: str
+    headers: Dict[str, str]            # lower-case names
+    body: bytes = b""
+    path: str = field(init=False)
+    query: Dict[str, str] = field(init=False)
+
+    def __post_init__(self) -> None:
+        parts = urlsplit(self.target)
+        self.path = parts.path
+        self.query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    def json(self) -> dict:
+        try:
+            data = json.loads(self.body or b"{}")
+        except ValueError:
+            raise HttpError(400, "body is not valid JSON") from None
+        if not isinstance(data, dict):
+            raise HttpError(400, "body must be a JSON object")
+        return data
+
+    def wants_websocket(self) -> bool:
+        return (
+            self.headers.get("upgrade", "").lower() == "websocket"
+            and "upgrade" in self.headers.get("connection", "").lower()
+        )
+
+
+# ──────────────────────────────────────────────────────────────
+# HTTP
+async def read_request(reader: asyncio.StreamReader, max_body: int) -> Request | None:
+    """Read one request; None when the peer closed the connection between requests."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as exc:
+        if not exc.partial.strip():
+            return None
+        raise HttpError(400, "incomplete request head") from None
+    except asyncio.LimitOverrunError:
+        raise HttpError(431) from None
+    if len(head) > MAX_HEADER_BYTES:
+        raise HttpError(431)
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "malformed request line") from None
+    if version not in ("HTTP/1.0", "HTTP/1.1"):
+        raise HttpError(505)
+    headers = parse_headers(lines[1:])
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HttpError(411, "chunked request bodies are not supported")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HttpError(400, "bad Content-Length") from None
+    if length < 0:
+        raise HttpError(400, "bad Content-Length")
+    if length > max_body:
+        raise HttpError(413)
+    body = await reader.readexactly(length) if length else b""
+    return Request(method, target, version, headers, body)
+
+
+def parse_headers(lines) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    for line in lines:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise HttpError(400, "malformed header")
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def response_head(status: int, headers: Dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def response(
+    status: int,
+    body: bytes = b"",
+    content_type: str = "application/json",
+    keep_alive: bool = True,
+    headers: Dict[str, str] | None = None,
+) -> bytes:
+    all_headers = {
+        "Content-Type": content_type,
+        "Content-Length": str(len(body)),
+        "Connection": "keep-alive" if keep_alive else "close",
+    }
+    all_headers.update(headers or {})
+    return response_head(status, all_headers) + body
+
+
+def json_response(status: int, payload: object, keep_alive: bool = True, **kwargs) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    return response(status, body, keep_alive=keep_alive, **kwargs)
+
+
+def chunk(data: bytes) -> bytes:
+    """One chunk of a ``Transfer-Encoding: chunked`` body (b"" ends the body)."""
+    return b"%x\r\n%s\r\n" % (len(data), data)
+
+
+def sse_event(data: object, event: str | None = None) -> bytes:
+    """One Server-Sent Event carrying ``data`` as JSON."""
+    lines = [] if event is None else [f"event: {event}"]
+    lines.append(f"data: {json.dumps(data)}")
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+# ──────────────────────────────────────────────────────────────
+# WebSocket
+def websocket_accept(key: str) -> str:
+    digest = hashlib.sha1(key.encode("ascii") + WS_GUID).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def websocket_key() -> str:
+    return base64.b64encode(os.urandom(16)).decode("ascii")
+
+
+def encode_frame(opcode: int, payload: bytes = b"", mask: bool = False) -> bytes:
+    """One final frame; clients must ``mask``, servers must not."""
+    head = bytearray([0x80 | opcode])
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        head.append(mask_bit | length)
+    elif length < 1 << 16:
+        head.append(mask_bit | 126)
+        head += struct.pack(">H", length)
+    else:
+        head.append(mask_bit | 127)
+        head += struct.pack(">Q", length)
+    if mask:
+        key = os.urandom(4)
+        return bytes(head) + key + _apply_mask(payload, key)
+    return bytes(head) + payload
+
+
+def close_payload(code: int, reason: str = "") -> bytes:
+    return struct.pack(">H", code) + reason.encode("utf-8")[:120]
+
+
+async def read_frame(reader: asyncio.StreamReader, max_size: int) -> Tuple[bool, int, bytes]:
+    """Read one frame: ``(fin, opcode, payload)`` with the payload unmasked."""
+    try:
+        b1, b2 = await reader.readexactly(2)
+        length = b2 & 0x7F
+        if length == 126:
+            (length,) = struct.unpack(">H", await reader.readexactly(2))
+        elif length == 127:
+            (length,) = struct.unpack(">Q", await reader.readexactly(8))
+        if length > max_size:
+            raise WebSocketClosed(MESSAGE_TOO_BIG, "frame too big")
+        key = await reader.readexactly(4) if b2 & 0x80 else None
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise WebSocketClosed(GOING_AWAY, "connection lost") from None
+    if b1 & 0x70:
+        raise WebSocketClosed(PROTOCOL_ERROR, "extensions are not supported")
+    if key is not None:
+        payload = _apply_mask(payload, key)
+    return bool(b1 & 0x80), b1 & 0x0F, payload
+
+
+async def read_message(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    max_size: int,
+    mask: bool = False,
+) -> Tuple[int, bytes]:
+    """Read one complete data message, answering pings and reassembling fragments.
+
+    Raises ``WebSocketClosed`` when the peer sends a close frame (which is
+    echoed back first).
+    """
+    opcode, parts, size = None, [], 0
+    while True:
+        fin, op, payload = await read_frame(reader, max_size)
+        if op == PING:
+            writer.write(encode_frame(PONG, payload, mask))
+            continue
+        if op == PONG:
+            continue
+        if op == CLOSE:
+            code = struct.unpack(">H", payload[:2])[0] if len(payload) >= 2 else NORMAL_CLOSURE
+            writer.write(encode_frame(CLOSE, payload[:2], mask))
+            raise WebSocketClosed(code, payload[2:].decode("utf-8", "replace"))
+        if op == CONTINUATION:
+            if opcode is None:
+                raise WebSocketClosed(PROTOCOL_ERROR, "unexpected continuation frame")
+        elif op in (TEXT, BINARY):
+            if opcode is not None:
+                raise WebSocketClosed(PROTOCOL_ERROR, "expected a continuation frame")
+            opcode = op
+        else:
+            raise WebSocketClosed(PROTOCOL_ERROR, f"unknown opcode {op}")
+        size += len(payload)
+        if size > max_size:
+            raise WebSocketClosed(MESSAGE_TOO_BIG, "message too big")
+        parts.append(payload)
+        if fin:
+            return opcode, b"".join(parts)
+
+
+def _apply_mask(data: bytes, key: bytes) -> bytes:
+    # XOR as one big integer: much faster than a per-byte Python loop.
+    n = len(data)
+    if not n:
+        return data
+    repeated = (key * (n // 4 + 1))[:n]
+    masked = int.from_bytes(data, "big") ^ int.from_bytes(repeated, "big")
+    return masked.to_bytes(n, "big")
@@ -0,0 +1,244 @@
+"""
+Record codecs for history files.
+
+A codec turns one history record (a dict) into a framed byte string and
+back. Two on-disk formats exist:
+
+- "jsonl":   one JSON object per line. Written by the stdlib ``json``
+             module, or by ``orjson``/``msgspec`` when installed (same bytes
+             on disk, much faster). Files without a header are jsonl.
+- "msgpack": length-prefixed msgpack frames (4-byte big-endian length +
+             payload). Needs the optional ``msgpack`` package.
+
+Files in any other format than jsonl start with a one-line JSON header,
+``{"format":"msgpack","version":1}``, so readers pick the right codec;
+jsonl files stay header-less and readable by older versions.
+
+Optional packages are looked up without importing them; a codec imports
+its package when it is first constructed, so startup doesn't pay for it.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import struct
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+
+HEADER_PREFIX = b'{"format":'
+FORMAT_VERSION = 1
+
+
+class Codec:
+    """Newline-delimited JSON with the stdlib ``json`` module."""
+
+    name = "json"
+    format = "jsonl"
+    framing = "line"  # "line": frames end with b"\n"; "length": 4-byte length prefix
+    errors: Tuple[type, ...] = (ValueError,)
+
+    def dumps(self, obj: object) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
+    def loads(self, data: bytes) -> object:
+        return json.loads(data)
+
+    def frame(self, record: dict) -> bytes:
+        return self.dumps(record) + b"\n"
+
+    def unframe(self, frame: bytes) -> object:
+        return self.loads(frame)
+
+    def frames(self, f: BinaryIO, offset: int) -> Iterator[Tuple[int, bytes]]:
+        """Yield ``(offset, frame)`` for complete frames from the current position."""
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # torn last line
+            yield offset, line
+            offset += len(line)
+
+
+class OrjsonCodec(Codec):
+    name = "orjson"
+    errors = (ValueError,)  # orjson.JSONDecodeError subclasses ValueError
+
+    def __init__(self):
+        import orjson
+
+        self.dumps = orjson.dumps
+        self.loads = orjson.loads
+
+
+class MsgspecCodec(Codec):
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self.errors = (ValueError, msgspec.DecodeError)
+
+    def dumps(self, obj: object) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: bytes) -> object:
+        return self._decoder.decode(data)
+
+
+class MsgpackCodec(Codec):
+    """Length-prefixed msgpack frames."""
+
+    name = "msgpack"
+    format = "msgpack"
+    framing = "length"
+    _HEAD = struct.Struct(">I")
+
+    def __init__(self):
+        import msgpack
+
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+        self.errors = (ValueError, TypeError, msgpack.UnpackException)
+
+    def dumps(self, obj: object) -> bytes:
+        return self._packb(obj, use_bin_type=True)
+
+    def loads(self, data: bytes) -> object:
+        return self._unpackb(data, raw=False)
+
+    def frame(self, record: dict) -> bytes:
+        payload = self.dumps(record)
+        return self._HEAD.pack(len(payload)) + payload
+
+    def unframe(self, frame: bytes) -> object:
+        return self.loads(frame[self._HEAD.size:])
+
+    def frames(self, f: BinaryIO, offset: int) -> Iterator[Tuple[int, bytes]]:
+        size = self._HEAD.size
+        while True:
+            head = f.read(size)
+            if len(head) < size:
+                return
+            (length,) = self._HEAD.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length:
+                return  # torn last frame
+            yield offset, head + payload
+            offset += size + length
+
+
+_installed: Dict[str, bool] = {}
+
+
+def _is_installed(package: str) -> bool:
+    """Whether ``package`` can be imported, without importing it."""
+    if package not in _installed:
+        _installed[package] = importlib.util.find_spec(package) is not None
+    return _installed[package]
+
+
+_CODECS = {
+    "json": (Codec, lambda: True),
+    "orjson": (OrjsonCodec, lambda: _is_installed("orjson")),
+    "msgspec": (MsgspecCodec, lambda: _is_installed("msgspec")),
+    "msgpack": (MsgpackCodec, lambda: _is_installed("msgpack")),
+}
+
+_instances: Dict[str, Codec] = {}
+
+
+def available() -> list[str]:
+    return [name for name, (_, present) in _CODECS.items() if present()]
+
+
+def get_codec(name: str = "auto") -> Codec:
+    """Codec by name; "auto" is the fastest installed JSON codec."""
+    if name == "auto":
+        name = next(n for n in ("msgspec", "orjson", "json") if _CODECS[n][1]())
+    if name not in _CODECS:
+        raise ValueError(f"unknown codec {name!r}; choose from {list(_CODECS)}")
+    cls, present = _CODECS[name]
+    if not present():
+        raise RuntimeError(f"codec {name!r} needs the {name!r} package")
+    if name not in _instances:
+        _instances[name] = cls()
+    return _instances[name]
+
+
+def codec_for_format(fmt: str, preferred: Codec | None = None) -> Codec:
+    """Codec able to read files in ``fmt``, ``preferred`` when it can."""
+    if preferred is not None and preferred.format == fmt:
+        return preferred
+    if fmt == "jsonl":
+        return get_codec("auto")
+    if fmt == "msgpack":
+        return get_codec("msgpack")
+    raise ValueError(f"unknown history format {fmt!r}")
+
+
+def header(codec: Codec) -> bytes:
+    """Header line for a new file written with ``codec`` (empty for jsonl)."""
+    if codec.format == "jsonl":
+        return b""
+    return json.dumps(
+        {"format": codec.format, "version": FORMAT_VERSION}, separators=(",", ":")
+    ).encode("utf-8") + b"\n"
+
+
+def read_header(f: BinaryIO, preferred: Codec | None = None) -> Tuple[Codec, int]:
+    """Read the header at the start of ``f``; returns the codec and header length.
+
+    Leaves ``f`` positioned at the first record.
+    """
+    f.seek(0)
+    start = f.read(len(HEADER_PREFIX))
+    if start != HEADER_PREFIX:
+        f.seek(0)
+        return codec_for_format("jsonl", preferred), 0
+    line = start + f.readline()
+    fmt = json.loads(line)["format"]
+    return codec_for_format(fmt, preferred), len(line)
+
+
+def iter_records(f: BinaryIO, preferred: Codec | None = None) -> Iterator[Tuple[int, int, dict]]:
+    """Yield ``(offset, length, record)`` for every intact record of a history stream.
+
+    Handles the header, skips blank and corrupt records and stops at a torn
+    last record; offsets are exact so they match index entries.
+    """
+    codec, offset = read_header(f, preferred)
+    for frame_offset, frame in codec.frames(f, offset):
+        if not frame.strip():
+            continue
+        try:
+            raw = codec.unframe(frame)
+        except codec.errors:
+            continue
+        if isinstance(raw, dict):
+            yield frame_offset, len(frame), raw
+
+
+def resync(codec: Codec, data: bytes) -> Tuple[int, List[bytes]]:
+    """Step over an unreadable frame at the start of ``data``.
+
+    Returns ``(skip, frames)``: the first ``skip`` bytes are the bad frame
+    and ``frames`` are the intact records after it, which together cover
+    the rest of ``data``. A bad length prefix hides where the next frame
+    starts, so every later offset is tried until the remainder parses.
+    """
+    for skip in range(1, len(data) + 1):
+        rest = data[skip:]
+        frames = [frame for _, frame in codec.frames(io.BytesIO(rest), 0)]
+        if sum(len(frame) for frame in frames) == len(rest) and all(_intact(codec, f) for f in frames):
+            return skip, frames
+    return len(data), []
+
+
+def _intact(codec: Codec, frame: bytes) -> bool:
+    try:
+        return isinstance(codec.unframe(frame), dict)
+    except codec.errors:
+        return False
@@ -1,47 +1,504 @@
-import json
+import os
+import time
+import uuid
+from contextlib import nullcontext
+from itertools import groupby
 from pathlib import Path
-from typing import List
-from src.core.models import Conversation, Message, Role
+from typing import BinaryIO, ContextManager, Dict, Iterator, List, Tuple
+from src.core.models import Conversation, Message, MessageStore, Role
+from src.storage.codecs import Codec, get_codec, header, iter_records, read_header, resync
+from src.storage.index import ConversationSummary, HistoryIndex, IndexEntry
+from src.storage.locking import FileLock
+from src.storage.segments import COMPRESSIONS, SegmentSet, snapshot_key
+from src.storage.snapshots import dedupe_snapshots, is_snapshot
+
+
+_UNSEEN = object()
+
+
+class HistoryGapError(RuntimeError):
+    """A save would skip messages that were compacted away before being stored."""
 
 
 class FileHistoryStorage:
     """
-    Saves full conversations to a JSONL file (one conversation per line).
+    Saves conversations to a JSONL file.
+
+    Two on-disk record kinds can live in the same file:
+
+    - snapshot: {"mode": ..., "messages": [...]}
+      the legacy format, one full conversation per line.
+    - delta:    {"id": ..., "mode": ..., "start": N, "ts": ..., "messages": [...]}
+      only the messages added since the previous save of conversation `id`,
+      starting at position `start`.
+
+    With ``delta=True`` new saves are written as deltas; loading always
+    understands both kinds and folds deltas back into whole conversations.
+
+    With ``index=True`` a sidecar offset index (see ``HistoryIndex``) backs
+    ``iter_conversations``, ``get`` and ``list_summaries`` so they only read
+    the records they return.
+
+    Several processes may share the file. Appends hold an exclusive
+    advisory lock on ``<file>.lock`` and reads hold a shared one (``lock=False``
+    turns this off). Lines that do not parse are skipped on load. A torn last
+    line left by a crashed writer is terminated by the next append; a bad
+    length-prefixed frame is moved to ``<file>.corrupt`` by the next append
+    and the records after it are kept.
+
+    ``max_bytes`` and ``max_age`` (seconds since the first record) rotate the
+    active file into closed segments (see ``SegmentSet``) when a save
+    crosses them; ``compression`` ("gzip" or "zstd") compresses closed
+    segments. Reads see all segments plus the active file as one history.
+
+    ``codec`` picks the record encoding for new files (see ``codecs``):
+    "auto" (fastest installed JSON codec), "json", "orjson", "msgspec" or
+    "msgpack". Existing files keep the format recorded in their header.
     """
 
-    def __init__(self, file_path: str | Path):
+    def __init__(
+        self,
+        file_path: str | Path,
+        delta: bool = False,
+        index: bool = True,
+        lock: bool = True,
+        max_bytes: int | None = None,
+        max_age: float | None = None,
+        compression: str | None = None,
+        codec: str | Codec = "auto",
+    ):
+        if compression is not None and compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}, not {compression!r}")
         self.path = Path(file_path)
+        self.delta = delta
+        self.index = HistoryIndex(self.path) if index else None
+        self.lock = FileLock(self.path.with_name(self.path.name + ".lock")) if lock else None
+        self.segments = SegmentSet(self.path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compression = compression
+        self.codec = get_codec(codec) if isinstance(codec, str) else codec
+        # conversation id -> number of messages already persisted
+        self._saved_counts: Dict[str, int] = {}
+        # bytes appended by this instance (read by InstrumentedHistory)
+        self.bytes_written = 0
+        # (st_dev, st_ino) of the active file when last looked at
+        self._active_id: object = _UNSEEN
+        self._active_since: float | None = None
+        self._active_codec: Codec | None = None  # format of the existing active file
 
     def save(self, conversation: Conversation) -> None:
-        data = {
-            "mode": conversation.mode,
-            "messages": [
-                {"role": msg.role.value, "content": msg.content}
-                for msg in conversation.messages
-            ],
-        }
-        with self.path.open("a", encoding="utf-8") as f:
-            f.write(json.dumps(data) + "\n")
+        self.save_many([conversation])
 
-    def load_all(self) -> List[Conversation]:
+    def save_many(self, conversations: List[Conversation]) -> None:
+        """Save several conversations with a single append (group commit)."""
+        with self._locked():
+            self._refresh()
+            self._write(conversations)
+            rotated = self._rotate_if_due()
+        if rotated is not None and self.compression is not None:
+            self.segments.compress(rotated, self.compression)
+
+    def rotate(self) -> Path | None:
+        """Close the active file as a new segment now; returns its path."""
+        with self._locked():
+            self._refresh()
+            rotated = self._rotate()
+        if rotated is None:
+            return None
+        if self.compression is not None:
+            self.segments.compress(rotated, self.compression)
+        return self.segments.path(rotated)
+
+    def _write(self, conversations: List[Conversation]) -> None:
+        if not self.delta:
+            self._append([self._snapshot_record(conv) for conv in conversations])
+            return
+
+        previous: Dict[str, int | None] = {}
+        records = []
+        for conv in conversations:
+            record = self._delta_record(conv)
+            if record is None:
+                continue
+            records.append(record)
+            previous.setdefault(conv.id, self._saved_counts.get(conv.id))
+            self._saved_counts[conv.id] = conv.transcript_length
+        try:
+            self._append(records)
+        except BaseException:
+            # Nothing was written: the next save must resend these messages.
+            for conv_id, count in previous.items():
+                if count is None:
+                    self._saved_counts.pop(conv_id, None)
+                else:
+                    self._saved_counts[conv_id] = count
+            raise
+
+    def sync(self) -> None:
+        """fsync the history file so appended records survive a crash."""
         if not self.path.exists():
-            return []
+            return
+        with self.path.open("rb+") as f:
+            os.fsync(f.fileno())
+
+    def persisted(self, conversation_id: str) -> int:
+        """Messages of the conversation's transcript already written to the file."""
+        saved = self._saved_counts.get(conversation_id)
+        if saved is not None:
+            return saved
+        if self.index is None:
+            return 0
+        with self._locked(shared=True):
+            self._refresh()
+            return self._stored_count(conversation_id)
+
+    def warm(self) -> None:
+        """Load the index and segment list now instead of on the first read.
+
+        Meant for a background thread at startup (see ``src.core.prewarm``).
+        """
+        with self._locked(shared=True):
+            self._refresh()
+
+    def iter_conversations(self, mode: str | None = None) -> Iterator[Conversation]:
+        """Yield stored conversations one by one, optionally filtered by mode."""
+        if self.index is None:
+            for conv in self.load_all():
+                if mode is None or conv.mode == mode:
+                    yield conv
+            return
+
+        for summary in self.list_summaries(mode):
+            conv = self.get(summary.id)
+            if conv is not None:
+                yield conv
+
+    def get(self, conversation_id: str) -> Conversation | None:
+        """Materialize a single conversation by id (or legacy "@offset" key)."""
+        if self.index is None:
+            for conv in self.load_all():
+                if conv.id == conversation_id:
+                    return conv
+            return None
 
+        conv: Conversation | None = None
+        with self._locked(shared=True):
+            self._refresh()
+            for seq, located in groupby(self._locate(conversation_id), key=lambda item: item[0]):
+                with self._open(seq) as f:
+                    codec, _ = read_header(f, self.codec)
+                    for _, entry in located:
+                        f.seek(entry.offset)
+                        raw = codec.unframe(f.read(entry.length))
+                        if conv is None:
+                            conv = Conversation(mode=raw["mode"], id=conversation_id, messages=MessageStore())
+                        if "id" in raw:
+                            self._apply_delta(conv, raw)
+                        else:
+                            conv.messages = self._decode_messages(raw["messages"])
+        if conv is None:
+            return None
+
+        if not conversation_id.startswith("@"):
+            self._saved_counts[conversation_id] = len(conv.messages)
+        return conv
+
+    def list_summaries(self, mode: str | None = None) -> List[ConversationSummary]:
+        """Describe stored conversations without reading their messages."""
+        if self.index is None:
+            return [
+                ConversationSummary(
+                    id=conv.id,
+                    mode=conv.mode,
+                    created=None,
+                    updated=None,
+                    message_count=len(conv.messages),
+                    records=1,
+                )
+                for conv in self.iter_conversations(mode)
+            ]
+        with self._locked(shared=True):
+            self._refresh()
+            keys = dict.fromkeys(self.segments.keys() + self.index.keys())
+            summaries = [
+                ConversationSummary.from_entries(key, [e for _, e in self._locate(key)])
+                for key in keys
+            ]
+        return [s for s in summaries if mode is None or s.mode == mode]
+
+    def load_all(self) -> List[Conversation]:
         conversations: List[Conversation] = []
+        by_id: Dict[str, Conversation] = {}
+
+        with self._locked(shared=True):
+            self._refresh()
+            for seq in self.segments.seqs():
+                with self.segments.open(seq) as f:
+                    self._read_records(f, seq, conversations, by_id)
+            if self.path.exists():
+                with self.path.open("rb") as f:
+                    self._read_records(f, None, conversations, by_id)
+
+        for conv_id, conv in by_id.items():
+            self._saved_counts[conv_id] = len(conv.messages)
+
+        return conversations
+
+    def migrate(self) -> int:
+        """Rewrite the file in delta format and return the number of conversations.
 
-        with self.path.open("r", encoding="utf-8") as f:
-            for line in f:
-                if not line.strip():
-                    continue
-                raw = json.loads(line)
-                conv = Conversation(mode=raw["mode"])
-                for m in raw["messages"]:
-                    conv.messages.append(
-                        Message(
-                            role=Role(m["role"]),
-                            content=m["content"]
-                        )
-                    )
+        Consecutive legacy snapshots where one extends the other (same mode,
+        previous messages are a prefix) are collapsed into one conversation,
+        which is what the old "save after every turn" behaviour produced.
+        Only a history that was never rotated can be migrated.
+        """
+        with self._locked():
+            self._refresh()
+            if self.segments.seqs():
+                raise RuntimeError("migrate() cannot rewrite a rotated history")
+            return self._migrate()
+
+    def _migrate(self) -> int:
+        if not self.path.exists():
+            return 0
+
+        merged = collapse_snapshots(self.load_all())
+
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(header(self.codec))
+            for conv in merged:
+                if is_snapshot(conv):
+                    # Offsets change with the rewrite: give it a real id.
+                    conv.id = uuid.uuid4().hex
+                record = {
+                    "id": conv.id,
+                    "mode": conv.mode,
+                    "start": 0,
+                    "ts": time.time(),
+                    "messages": self._encode_messages(conv.messages),
+                }
+                f.write(self.codec.frame(record))
+        tmp.replace(self.path)
+        if self.index is not None:
+            self.index.reset()
+            self.index.loaded = False
+
+        self._saved_counts = {c.id: len(c.messages) for c in merged}
+        return len(merged)
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _locked(self, shared: bool = False) -> ContextManager:
+        if self.lock is None:
+            return nullcontext()
+        return self.lock.shared() if shared else self.lock.exclusive()
+
+    def _refresh(self) -> None:
+        """Notice appends and rotations done by other processes."""
+        try:
+            st = self.path.stat()
+            active = (st.st_dev, st.st_ino)
+        except FileNotFoundError:
+            active = None
+        if active != self._active_id:
+            self._active_id = active
+            self._active_since = None
+            self._active_codec = None
+            if active is not None:
+                with self.path.open("rb") as f:
+                    if f.read(1):
+                        self._active_codec, _ = read_header(f, self.codec)
+            self.segments.refresh()
+            if self.index is not None:
+                self.index.loaded = False
+        if self.index is not None:
+            self.index.refresh()
+
+    def _locate(self, key: str) -> List[Tuple[int | None, IndexEntry]]:
+        """Records of ``key``, oldest first; seq None is the active file."""
+        located = list(self.segments.entries(key))
+        if self.index is not None:
+            located.extend((None, entry) for entry in self.index.entries(key))
+        return located
+
+    def _open(self, seq: int | None) -> BinaryIO:
+        return self.path.open("rb") if seq is None else self.segments.open(seq)
+
+    def _stored_count(self, conversation_id: str) -> int:
+        located = self._locate(conversation_id)
+        if not located:
+            return 0
+        last = located[-1][1]
+        return last.start + last.count
+
+    def _rotate_if_due(self) -> int | None:
+        if self.max_bytes is None and self.max_age is None:
+            return None
+        if not self.path.exists():
+            return None
+        due = self.max_bytes is not None and self.path.stat().st_size >= self.max_bytes
+        if not due and self.max_age is not None:
+            started = self._started()
+            due = time.time() - started >= self.max_age
+        return self._rotate() if due else None
+
+    def _rotate(self) -> int | None:
+        # Caller holds the exclusive lock.
+        if not self.path.exists() or self.path.stat().st_size == 0:
+            return None
+        seq = self.segments.close_active(self.index)
+        if self.index is not None:
+            self.index.reset()
+            self.index.loaded = False
+        self._active_id = None
+        self._active_since = None
+        return seq
+
+    def _started(self) -> float:
+        """Timestamp of the first record in the active file (for ``max_age``)."""
+        if self._active_since is None:
+            started = None
+            with self.path.open("rb") as f:
+                for _, _, raw in iter_records(f, self.codec):
+                    started = raw.get("ts")
+                    break
+            self._active_since = started if started is not None else time.time()
+        return self._active_since
+
+    def _append(self, records: List[dict]) -> None:
+        if not records:
+            return
+        with self.path.open("a+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end == 0:
+                # New file: written in our format, announced by its header.
+                codec = self._active_codec = self.codec
+                prefix = header(codec)
+            else:
+                codec = self._active_codec or self.codec
+                prefix = self._repair_tail(f, end, codec)
+                end = f.seek(0, os.SEEK_END)
+            frames = [codec.frame(record) for record in records]
+            offset = end + len(prefix)
+            f.write(prefix + b"".join(frames))
+        if self.index is not None:
+            for record, frame in zip(records, frames):
+                self.index.add(record, offset, len(frame))
+                offset += len(frame)
+        self.bytes_written += len(prefix) + sum(len(frame) for frame in frames)
+
+    def _repair_tail(self, f: BinaryIO, end: int, codec: Codec) -> bytes:
+        """Deal with a torn or corrupt record left by a crashed writer.
+
+        Lines are terminated (returns the b"\\n" to write first). A bad
+        length-prefixed frame hides every frame after it, so its bytes are
+        moved to the ``.corrupt`` sidecar and the intact frames that
+        followed it are returned to be written again in its place.
+        """
+        if codec.framing == "line":
+            f.seek(end - 1)
+            return b"" if f.read(1) == b"\n" else b"\n"
+        if self.index is not None:
+            good = self.index.end  # refreshed under our lock: every readable frame
+        else:
+            good = max(
+                (offset + length for offset, length, _ in iter_records(f, codec)),
+                default=read_header(f, codec)[1],
+            )
+        if good >= end:
+            return b""
+        f.seek(good)
+        tail = f.read(end - good)
+        skip, frames = resync(codec, tail)
+        with self.path.with_name(self.path.name + ".corrupt").open("ab") as quarantine:
+            quarantine.write(tail[:skip])
+        f.truncate(good)
+        return b"".join(frames)
+
+    def _read_records(
+        self,
+        f: BinaryIO,
+        seq: int | None,
+        conversations: List[Conversation],
+        by_id: Dict[str, Conversation],
+    ) -> None:
+        for offset, _, raw in iter_records(f, self.codec):
+            if "id" not in raw:
+                # Same key the sidecar index uses for this line.
+                key = f"@{offset}" if seq is None else snapshot_key(seq, offset)
+                conversations.append(self._conversation_from_snapshot(raw, key))
+                continue
+
+            conv = by_id.get(raw["id"])
+            if conv is None:
+                conv = Conversation(mode=raw["mode"], id=raw["id"], messages=MessageStore())
+                by_id[conv.id] = conv
                 conversations.append(conv)
+            self._apply_delta(conv, raw)
+
+    def _snapshot_record(self, conversation: Conversation) -> dict:
+        return {
+            "mode": conversation.mode,
+            "messages": self._encode_messages(conversation.messages),
+        }
+
+    def _delta_record(self, conversation: Conversation) -> dict | None:
+        saved = self._saved_counts.get(conversation.id)
+        if saved is None:
+            saved = self._stored_count(conversation.id) if self.index is not None else 0
+        total = conversation.transcript_length
+        archived = conversation.archived
+        if saved > total:
+            # Conversation was shortened in memory: re-send what we still hold,
+            # unless compaction put its summary where stored messages were.
+            if archived:
+                raise HistoryGapError(
+                    f"conversation {conversation.id}: shortened below its {saved} stored "
+                    "messages after compaction"
+                )
+            saved = 0
+        elif saved < archived:
+            raise HistoryGapError(
+                f"conversation {conversation.id}: messages {saved}..{archived - 1} "
+                "were compacted before they were saved"
+            )
+        elif saved == total and saved > 0:
+            return None
+
+        return {
+            "id": conversation.id,
+            "mode": conversation.mode,
+            "start": saved,
+            "ts": time.time(),
+            "messages": self._encode_messages(conversation.messages[saved - archived:]),
+        }
+
+    @staticmethod
+    def _encode_messages(messages: List[Message]) -> List[dict]:
+        if isinstance(messages, MessageStore):
+            return messages.to_records()
+        return [{"role": msg.role.value, "content": msg.content} for msg in messages]
+
+    @staticmethod
+    def _decode_messages(raw_messages: List[dict]) -> MessageStore:
+        return MessageStore.from_records(raw_messages)
+
+    def _conversation_from_snapshot(self, raw: dict, key: str) -> Conversation:
+        return Conversation(
+            mode=raw["mode"],
+            id=key,
+            messages=self._decode_messages(raw["messages"]),
+        )
+
+    def _apply_delta(self, conv: Conversation, raw: dict) -> None:
+        start = raw.get("start", len(conv.messages))
+        conv.mode = raw["mode"]
+        del conv.messages[start:]
+        conv.messages.extend(self._decode_messages(raw["messages"]))
+
 
-        return conversations
\ No newline at end of file
+def collapse_snapshots(conversations: List[Conversation]) -> List[Conversation]:
+    """Merge runs of legacy snapshots of the same chat (see ``dedupe_snapshots``)."""
+    return list(dedupe_snapshots(conversations))
@@ -0,0 +1,268 @@
+"""
+Sidecar offset index for JSONL history files.
+
+For every record line in ``history.jsonl`` the index keeps one small entry
+in ``history.jsonl.idx``: conversation key, mode, timestamp, byte offset,
+byte length and message range. Readers use it to seek straight to the
+records of one conversation instead of parsing the whole history file.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+from .codecs import Codec, read_header
+
+
+@dataclass
+class IndexEntry:
+    """Location of one record line in the history file."""
+    key: str          # conversation id, or "@<offset>" for legacy snapshot lines
+    mode: str
+    ts: float | None
+    offset: int
+    length: int
+    start: int        # position of the first message of the record
+    count: int        # number of messages in the record
+
+    def to_row(self) -> list:
+        return [self.key, self.mode, self.ts, self.offset, self.length, self.start, self.count]
+
+    @classmethod
+    def from_row(cls, row: list) -> "IndexEntry":
+        return cls(*row)
+
+    @classmethod
+    def from_record(cls, raw: dict, offset: int, length: int, prev_len: int) -> "IndexEntry":
+        key = raw.get("id") or f"@{offset}"
+        if "id" in raw:
+            start = raw.get("start", prev_len)
+        else:
+            start = 0
+        return cls(
+            key=key,
+            mode=raw["mode"],
+            ts=raw.get("ts"),
+            offset=offset,
+            length=length,
+            start=start,
+            count=len(raw["messages"]),
+        )
+
+
+@dataclass
+class ConversationSummary:
+    """Cheap description of a stored conversation, built from the index only."""
+    id: str
+    mode: str
+    created: float | None
+    updated: float | None
+    message_count: int
+    records: int
+
+    @classmethod
+    def from_entries(cls, key: str, entries: List["IndexEntry"]) -> "ConversationSummary":
+        last = entries[-1]
+        return cls(
+            id=key,
+            mode=last.mode,
+            created=entries[0].ts,
+            updated=last.ts,
+            message_count=last.start + last.count,
+            records=len(entries),
+        )
+
+
+class HistoryIndex:
+    """Append-only sidecar index for a history file.
+
+    The index is valid when its entries cover the data file contiguously from
+    byte 0. On load, a stale index is extended by scanning only the un-indexed
+    tail of the data file; an inconsistent one is rebuilt from scratch.
+
+    Several processes may share one sidecar (see ``FileHistoryStorage``
+    locking): ``refresh`` first picks up rows other processes appended and
+    only scans the data file for what is still missing. Rows that repeat an
+    already indexed range are ignored.
+    """
+
+    SUFFIX = ".idx"
+
+    def __init__(self, data_path: str | Path):
+        self.data_path = Path(data_path)
+        self.path = self.data_path.with_name(self.data_path.name + self.SUFFIX)
+        self.loaded = False
+        self._entries: Dict[str, List[IndexEntry]] = {}
+        self._end = 0
+        self._sidecar_end = 0  # bytes of the sidecar already read
+        self.codec: Codec | None = None  # detected from the data file header
+
+    # ──────────────────────────────────────────────────────────────
+    # Queries
+    def keys(self) -> List[str]:
+        self.ensure_loaded()
+        return list(self._entries)
+
+    def entries(self, key: str) -> List[IndexEntry]:
+        self.ensure_loaded()
+        return self._entries.get(key, [])
+
+    def message_count(self, key: str) -> int:
+        entries = self.entries(key)
+        if not entries:
+            return 0
+        last = entries[-1]
+        return last.start + last.count
+
+    @property
+    def end(self) -> int:
+        """Offset just past the last indexed frame of the data file."""
+        return self._end
+
+    def summaries(self) -> Iterator[ConversationSummary]:
+        self.ensure_loaded()
+        for key, entries in self._entries.items():
+            yield ConversationSummary.from_entries(key, entries)
+
+    # ──────────────────────────────────────────────────────────────
+    # Maintenance
+    def ensure_loaded(self) -> None:
+        if not self.loaded:
+            self.load()
+
+    def load(self) -> None:
+        self._entries = {}
+        self._end = 0
+        self._sidecar_end = 0
+        self.codec = None
+        self.loaded = True
+
+        if not self.data_path.exists():
+            self.reset()
+            return
+
+        if self.path.exists() and not self._read_sidecar():
+            self.reset()
+
+        size = self.data_path.stat().st_size
+        if self._end > size:
+            self.reset()
+        if self._end < size:
+            self._scan_tail()
+
+    def refresh(self) -> None:
+        """Catch up with records appended since the index was loaded."""
+        if not self.loaded:
+            self.load()
+            return
+        size = self.data_path.stat().st_size if self.data_path.exists() else 0
+        if size < self._end:
+            self.load()  # file was replaced (rotation, migrate)
+        elif size > self._end:
+            self._catch_up()
+
+    def add(self, raw: dict, offset: int, length: int) -> None:
+        """Record a line just appended to the data file."""
+        if self.loaded:
+            if offset != self._end:
+                # Somebody else wrote in between: pick their records up first.
+                self._catch_up(stop=offset)
+                if self._end > offset:
+                    return  # a rebuild already indexed this line
+            entry = self._track(raw, offset, length)
+        else:
+            # Without the in-memory index we cannot resolve an implicit start;
+            # the writer always sets it for delta records.
+            entry = IndexEntry.from_record(raw, offset, length, prev_len=0)
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(entry.to_row()) + "\n")
+
+    def reset(self) -> None:
+        """Drop the sidecar; the next load rebuilds it from the data file."""
+        self._entries = {}
+        self._end = 0
+        self._sidecar_end = 0
+        if self.path.exists():
+            self.path.unlink()
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _read_sidecar(self) -> bool:
+        """Apply sidecar rows past ``_sidecar_end``; False if they leave a gap."""
+        with self.path.open("rb") as f:
+            f.seek(self._sidecar_end)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # row still being written
+                self._sidecar_end += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = IndexEntry.from_row(json.loads(line))
+                except (ValueError, TypeError):
+                    return False
+                if entry.offset < self._end:
+                    continue  # same range indexed twice (e.g. two readers scanned it)
+                if entry.offset != self._end:
+                    return False
+                if entry.key:
+                    self._entries.setdefault(entry.key, []).append(entry)
+                self._end = entry.offset + entry.length
+        return True
+
+    def _catch_up(self, stop: int | None = None) -> None:
+        if self.path.exists() and not self._read_sidecar():
+            self.load()
+            return
+        if stop is None or self._end < stop:
+            self._scan_tail(stop=stop)
+
+    def _scan_tail(self, stop: int | None = None) -> None:
+        new_rows: List[str] = []
+        with self.data_path.open("rb") as f:
+            if self._end == 0 or self.codec is None:
+                self.codec, header_len = read_header(f, self.codec)
+                if self._end == 0 and header_len:
+                    new_rows.append(self._filler_row(0, header_len))
+            f.seek(self._end)
+            # A partially written last frame is not yielded: it is indexed once complete.
+            for offset, frame in self.codec.frames(f, self._end):
+                if stop is not None and offset >= stop:
+                    break
+                raw = _decode(self.codec, frame)
+                if raw is not None:
+                    entry = self._track(raw, offset, len(frame))
+                    new_rows.append(json.dumps(entry.to_row()))
+                else:
+                    # Keep blank and corrupt frames covered so the index stays contiguous.
+                    new_rows.append(self._filler_row(offset, len(frame)))
+
+        if new_rows:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("\n".join(new_rows) + "\n")
+
+    def _filler_row(self, offset: int, length: int) -> str:
+        self._end = offset + length
+        return json.dumps(["", "", None, offset, length, 0, 0])
+
+    def _track(self, raw: dict, offset: int, length: int) -> IndexEntry:
+        key = raw.get("id")
+        prev_len = self.message_count(key) if key in self._entries else 0
+        entry = IndexEntry.from_record(raw, offset, length, prev_len)
+        self._entries.setdefault(entry.key, []).append(entry)
+        self._end = offset + length
+        return entry
+
+
+def _decode(codec: Codec, frame: bytes) -> dict | None:
+    """Parse one record frame; None for blank or corrupt frames."""
+    if not frame.strip():
+        return None
+    try:
+        raw = codec.unframe(frame)
+    except codec.errors:
+        return None
+    return raw if isinstance(raw, dict) else None
@@ -0,0 +1,84 @@
+"""
+Advisory inter-process file locks.
+
+Every process that touches a history file takes the lock on its
+``.lock`` sidecar: exclusive for appends and rotation, shared for reads.
+Uses ``fcntl.flock`` on POSIX and ``msvcrt.locking`` on Windows (where
+shared locks are taken as exclusive).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Re-entrant advisory lock on ``path`` (created if missing).
+
+    Threads of one process are serialized by an RLock; other processes by
+    the OS lock. Nested acquisitions keep the outermost mode.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd: int | None = None
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._held(shared=False):
+            yield
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._held(shared=True):
+            yield
+
+    @contextmanager
+    def _held(self, shared: bool) -> Iterator[None]:
+        with self._rlock:
+            if self._depth == 0:
+                self._acquire(shared)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._release()
+
+    def _acquire(self, shared: bool) -> None:
+        fd = os.open(str(self.path), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def _release(self) -> None:
+        fd, self._fd = self._fd, None
+        if fd is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
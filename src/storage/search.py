@@ -0,0 +1,198 @@
+"""
+Full-text search over stored conversations.
+
+Messages are indexed in an SQLite FTS5 table kept next to the history
+file. ``SearchableHistory`` wraps any HistoryPort and indexes the new
+messages of a conversation on every save, so searching never rescans the
+history file.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+
+from src.core.app import HistoryPort
+from src.core.models import Conversation
+
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content,
+    conversation_id UNINDEXED,
+    position UNINDEXED,
+    role UNINDEXED,
+    mode UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE TABLE IF NOT EXISTS indexed (
+    conversation_id TEXT PRIMARY KEY,
+    message_count   INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class SearchHit:
+    """One matching message, best matches first."""
+    conversation_id: str
+    position: int
+    role: str
+    mode: str
+    snippet: str
+    score: float
+
+
+class SearchIndex:
+    """Incrementally maintained FTS5 index of message contents."""
+
+    def __init__(self, db_path: str | Path):
+        self.path = Path(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def indexed_count(self, conversation_id: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message_count FROM indexed WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def add(self, conversation: Conversation) -> int:
+        """Index messages not seen before; returns how many were added."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message_count FROM indexed WHERE conversation_id = ?", (conversation.id,)
+            ).fetchone()
+            done = row[0] if row else 0
+            total = conversation.transcript_length
+            # Messages dropped from memory (compaction) were indexed when saved.
+            first = max(done, conversation.archived)
+            if first >= total:
+                return 0
+
+            rows = [
+                (msg.content, conversation.id, pos, msg.role.value, conversation.mode)
+                for pos, msg in enumerate(
+                    conversation.messages[first - conversation.archived:], start=first
+                )
+            ]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO messages_fts (content, conversation_id, position, role, mode) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO indexed (conversation_id, message_count) VALUES (?, ?)",
+                    (conversation.id, total),
+                )
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return len(rows)
+
+    def search(self, terms: str, limit: int = 10, mode: str | None = None) -> List[SearchHit]:
+        query = self._match_query(terms)
+        if not query:
+            return []
+
+        sql = (
+            "SELECT conversation_id, position, role, mode, "
+            "snippet(messages_fts, 0, '[', ']', '…', 12), bm25(messages_fts) "
+            "FROM messages_fts WHERE messages_fts MATCH ?"
+        )
+        params: list = [query]
+        if mode is not None:
+            sql += " AND mode = ?"
+            params.append(mode)
+        sql += " ORDER BY bm25(messages_fts) LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            SearchHit(
+                conversation_id=cid,
+                position=int(pos),
+                role=role,
+                mode=m,
+                snippet=snippet,
+                score=-score,  # bm25() is lower-is-better
+            )
+            for cid, pos, role, m, snippet, score in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _match_query(terms: str) -> str:
+        # Quote every term so user input never hits FTS5 query syntax.
+        words = [w.replace('"', '""') for w in terms.split()]
+        return " ".join(f'"{w}"' for w in words if w)
+
+
+class SearchableHistory:
+    """HistoryPort wrapper that keeps a SearchIndex current on every save.
+
+    ``catch_up`` indexes conversations the index has not seen yet (e.g. a
+    history written before search existed); it uses ``list_summaries``/``get``
+    when the wrapped storage offers them, so only lagging conversations
+    are read. It runs automatically before the first search.
+    """
+
+    def __init__(self, history: HistoryPort, index: SearchIndex):
+        self.history = history
+        self.index = index
+        self._caught_up = False
+
+    def save(self, conversation: Conversation) -> None:
+        self.history.save(conversation)
+        self.index.add(conversation)
+
+    def save_many(self, conversations: List[Conversation]) -> None:
+        save_many = getattr(self.history, "save_many", None)
+        if save_many is not None:
+            save_many(conversations)
+        else:
+            for conv in conversations:
+                self.history.save(conv)
+        for conv in conversations:
+            self.index.add(conv)
+
+    def load_all(self) -> List[Conversation]:
+        return self.history.load_all()
+
+    def search(self, terms: str, limit: int = 10, mode: str | None = None) -> List[SearchHit]:
+        if not self._caught_up:
+            self.catch_up()
+        return self.index.search(terms, limit=limit, mode=mode)
+
+    def catch_up(self) -> int:
+        added = 0
+        list_summaries = getattr(self.history, "list_summaries", None)
+        get = getattr(self.history, "get", None)
+        if list_summaries is not None and get is not None:
+            for summary in list_summaries():
+                if summary.message_count > self.index.indexed_count(summary.id):
+                    conv = get(summary.id)
+                    if conv is not None:
+                        added += self.index.add(conv)
+        else:
+            for conv in self.history.load_all():
+                added += self.index.add(conv)
+        self._caught_up = True
+        return added
+
+    def __getattr__(self, name: str):
+        # Expose the wrapped storage's extra API (get, iter_conversations, ...).
+        return getattr(self.history, name)
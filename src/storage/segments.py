@@ -0,0 +1,189 @@
+"""
+Closed segments of a rotated history file.
+
+When ``FileHistoryStorage`` rotates, the active ``history.jsonl`` is renamed
+to ``history.jsonl.000001`` (then ``.000002``, ...) together with its
+sidecar index, which becomes ``history.jsonl.000001.idx``. Closed segments
+never change again, so their indexes are read once. They may be
+compressed afterwards to ``.gz`` (stdlib) or ``.zst`` (needs the optional
+``zstandard`` package); index offsets always refer to the uncompressed
+bytes.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import re
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Tuple
+
+from .codecs import iter_records
+from .index import HistoryIndex, IndexEntry
+
+
+def _zstandard():
+    """The optional ``zstandard`` module, imported when first needed."""
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+COMPRESSIONS = ("gzip", "zstd")
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def snapshot_key(seq: int, offset: int) -> str:
+    """Key of a legacy snapshot line inside closed segment ``seq``."""
+    return f"@{seq}:{offset}"
+
+
+class SegmentSet:
+    """The closed segments next to ``data_path``, oldest first."""
+
+    def __init__(self, data_path: str | Path):
+        self.data_path = Path(data_path)
+        self._pattern = re.compile(rf"^{re.escape(self.data_path.name)}\.(\d{{6}})(\.gz|\.zst)?$")
+        self._paths: Dict[int, Path] = {}
+        self._entries: Dict[str, List[Tuple[int, IndexEntry]]] = {}
+        self._indexed: set[int] = set()
+
+    # ──────────────────────────────────────────────────────────────
+    # Queries
+    def seqs(self) -> List[int]:
+        return sorted(self._paths)
+
+    def path(self, seq: int) -> Path:
+        return self._paths[seq]
+
+    def entries(self, key: str) -> List[Tuple[int, IndexEntry]]:
+        return self._entries.get(key, [])
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def open(self, seq: int) -> BinaryIO:
+        """Open a segment for reading, decompressing transparently."""
+        path = self._paths[seq]
+        if not path.exists():
+            # Compressed (and the plain copy removed) since we last looked.
+            self.refresh()
+            path = self._paths[seq]
+        if path.suffix == ".gz":
+            import gzip
+
+            return gzip.open(path, "rb")
+        if path.suffix == ".zst":
+            zstandard = _zstandard()
+            if zstandard is None:
+                raise RuntimeError(f"{path.name} is zstd-compressed; install 'zstandard' to read it")
+            raw = zstandard.ZstdDecompressor().stream_reader(path.open("rb"), closefd=True)
+            return io.BufferedReader(raw)
+        return path.open("rb")
+
+    # ──────────────────────────────────────────────────────────────
+    # Maintenance
+    def refresh(self) -> None:
+        """Re-list segments on disk and read the indexes of new ones."""
+        found: Dict[int, Path] = {}
+        for path in self.data_path.parent.glob(self.data_path.name + ".*"):
+            match = self._pattern.match(path.name)
+            if match is None:
+                continue
+            seq = int(match.group(1))
+            # A plain file wins: its compressed copy may still be in progress.
+            if seq not in found or not match.group(2):
+                found[seq] = path
+        self._paths = found
+        for seq in sorted(found):
+            if seq not in self._indexed:
+                self._load_index(seq)
+                self._indexed.add(seq)
+
+    def close_active(self, index: HistoryIndex | None) -> int:
+        """Rename the active file (and its sidecar) into the next segment.
+
+        The caller holds the history's exclusive lock. Returns the new seq.
+        """
+        self.refresh()
+        seq = max(self._paths, default=0) + 1
+        target = self._plain_path(seq)
+        if index is not None:
+            index.refresh()  # the sidecar must cover every line being closed
+        os.replace(self.data_path, target)
+        sidecar = self.data_path.with_name(self.data_path.name + HistoryIndex.SUFFIX)
+        if sidecar.exists():
+            os.replace(sidecar, self._index_path(seq))
+        # Validates (or rebuilds) the moved index against the closed data;
+        # its sidecar is exactly ``_index_path(seq)``.
+        HistoryIndex(target).load()
+        self.refresh()
+        return seq
+
+    def compress(self, seq: int, method: str) -> Path:
+        """Compress closed segment ``seq``; safe to run without the lock."""
+        if method not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}, not {method!r}")
+        plain = self._plain_path(seq)
+        target = plain.with_name(plain.name + _SUFFIXES[method])
+        if not plain.exists():
+            return target  # another process got here first
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        with plain.open("rb") as src:
+            if method == "gzip":
+                import gzip
+                import shutil
+
+                with gzip.open(tmp, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            else:
+                zstandard = _zstandard()
+                if zstandard is None:
+                    raise RuntimeError("zstd compression needs the 'zstandard' package")
+                with tmp.open("wb") as out:
+                    zstandard.ZstdCompressor().copy_stream(src, out)
+        os.replace(tmp, target)
+        try:
+            plain.unlink()
+        except FileNotFoundError:
+            pass
+        self._paths[seq] = target
+        return target
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _plain_path(self, seq: int) -> Path:
+        return self.data_path.with_name(f"{self.data_path.name}.{seq:06d}")
+
+    def _index_path(self, seq: int) -> Path:
+        # Named after the plain segment so compressing keeps it valid.
+        return self.data_path.with_name(f"{self.data_path.name}.{seq:06d}{HistoryIndex.SUFFIX}")
+
+    def _load_index(self, seq: int) -> None:
+        path = self._index_path(seq)
+        if not path.exists():
+            self._rebuild_index(seq)
+        with path.open("r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = IndexEntry.from_row(json.loads(line))
+                if not entry.key:
+                    continue
+                if entry.key.startswith("@"):
+                    entry.key = snapshot_key(seq, entry.offset)
+                self._entries.setdefault(entry.key, []).append((seq, entry))
+
+    def _rebuild_index(self, seq: int) -> None:
+        # Closed segments are immutable, so one pass over the data is enough.
+        counts: Dict[str, int] = {}
+        rows = []
+        with self.open(seq) as f:
+            for offset, length, raw in iter_records(f):
+                entry = IndexEntry.from_record(raw, offset, length, counts.get(raw.get("id"), 0))
+                counts[entry.key] = entry.start + entry.count
+                rows.append(json.dumps(entry.to_row()) + "\n")
+        self._index_path(seq).write_text("".join(rows), encoding="utf-8")
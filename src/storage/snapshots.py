@@ -0,0 +1,48 @@
+"""
+Legacy snapshot records.
+
+The legacy snapshot history format stored the whole conversation after
+every turn under an "@<offset>" key. These helpers recognise such records
+and merge the runs of ever-longer copies one chat left behind.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Iterator, Union
+
+if TYPE_CHECKING:
+    from src.core.models import Conversation
+
+    from .index import ConversationSummary
+
+    Entry = Union[Conversation, ConversationSummary]
+
+
+def is_snapshot(conversation: "Entry") -> bool:
+    """True for conversations read from legacy snapshot lines ("@<offset>" ids)."""
+    return conversation.id.startswith("@")
+
+
+def dedupe_snapshots(conversations: Iterable["Entry"]) -> Iterator["Entry"]:
+    """Collapse runs of legacy snapshots where each one extends the previous.
+
+    Conversations with real ids are never merged. Only one conversation of
+    lookahead is kept.
+    """
+    prev: "Entry | None" = None
+    for conv in conversations:
+        if prev is not None and _extends(prev, conv):
+            prev.messages = conv.messages
+            continue
+        if prev is not None:
+            yield prev
+        prev = conv
+    if prev is not None:
+        yield prev
+
+
+def _extends(prev: "Entry", nxt: "Entry") -> bool:
+    if not (is_snapshot(prev) and is_snapshot(nxt)):
+        return False
+    n = len(prev.messages)
+    return prev.mode == nxt.mode and len(nxt.messages) >= n and nxt.messages[:n] == prev.messages
@@ -0,0 +1,242 @@
+"""
+SQLite-backed history storage.
+
+Conversations and messages live in two normalized tables, so saving a
+conversation only inserts the messages that are new since the last save.
+The database runs in WAL mode, which lets several assistant processes
+read and write the same store concurrently.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List
+
+from src.core.models import Conversation, MessageStore, Role
+from src.storage.history import FileHistoryStorage, HistoryGapError, collapse_snapshots
+from src.storage.index import ConversationSummary
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    id            TEXT PRIMARY KEY,
+    mode          TEXT NOT NULL,
+    created       REAL NOT NULL,
+    updated       REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL REFERENCES conversations(id) ON DELETE CASCADE,
+    position        INTEGER NOT NULL,
+    role            TEXT NOT NULL,
+    content         TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_conversations_mode_updated ON conversations(mode, updated);
+CREATE INDEX IF NOT EXISTS idx_conversations_created ON conversations(created);
+"""
+
+
+class SqliteHistoryStorage:
+    """HistoryPort implementation on top of a single SQLite database file."""
+
+    def __init__(self, db_path: str | Path, busy_timeout: float = 5.0):
+        self.path = Path(db_path)
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=busy_timeout,
+            isolation_level=None,  # we manage transactions explicitly
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+
+    # ──────────────────────────────────────────────────────────────
+    # HistoryPort
+    def save(self, conversation: Conversation) -> None:
+        with self.batch():
+            self._save(conversation)
+
+    def load_all(self) -> List[Conversation]:
+        return list(self.iter_conversations())
+
+    def persisted(self, conversation_id: str) -> int:
+        """Messages of the conversation's transcript already stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT message_count FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    # ──────────────────────────────────────────────────────────────
+    # Queries
+    def iter_conversations(self, mode: str | None = None) -> Iterator[Conversation]:
+        for summary in self.list_summaries(mode=mode):
+            conv = self.get(summary.id)
+            if conv is not None:
+                yield conv
+
+    def get(self, conversation_id: str) -> Conversation | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mode FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT role, content FROM messages WHERE conversation_id = ? ORDER BY position",
+                (conversation_id,),
+            ).fetchall()
+
+        return Conversation(
+            mode=row[0],
+            id=conversation_id,
+            messages=MessageStore.from_columns((Role(r) for r, _ in rows), (c for _, c in rows)),
+        )
+
+    def list_summaries(
+        self,
+        mode: str | None = None,
+        limit: int | None = None,
+        offset: int = 0,
+    ) -> List[ConversationSummary]:
+        sql = "SELECT id, mode, created, updated, message_count FROM conversations"
+        params: list = []
+        if mode is not None:
+            sql += " WHERE mode = ?"
+            params.append(mode)
+        sql += " ORDER BY created, rowid LIMIT ? OFFSET ?"
+        params += [-1 if limit is None else limit, offset]
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            ConversationSummary(
+                id=cid,
+                mode=m,
+                created=created,
+                updated=updated,
+                message_count=count,
+                records=1,
+            )
+            for cid, m, created, updated, count in rows
+        ]
+
+    def load_page(
+        self,
+        limit: int,
+        offset: int = 0,
+        mode: str | None = None,
+    ) -> List[Conversation]:
+        """Return one page of conversations, oldest first."""
+        return [
+            conv
+            for conv in (self.get(s.id) for s in self.list_summaries(mode, limit, offset))
+            if conv is not None
+        ]
+
+    def count(self, mode: str | None = None) -> int:
+        with self._lock:
+            if mode is None:
+                row = self._conn.execute("SELECT COUNT(*) FROM conversations").fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM conversations WHERE mode = ?", (mode,)
+                ).fetchone()
+        return row[0]
+
+    # ──────────────────────────────────────────────────────────────
+    # Transactions and maintenance
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group every save inside the block into one transaction."""
+        with self._lock:
+            outer = self._batch_depth == 0
+            if outer:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._batch_depth += 1
+            try:
+                yield
+            except BaseException:
+                self._batch_depth -= 1
+                if outer:
+                    self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._batch_depth -= 1
+                if outer:
+                    self._conn.execute("COMMIT")
+
+    def import_jsonl(self, jsonl_path: str | Path) -> int:
+        """One-shot import of a FileHistoryStorage file; returns conversations imported.
+
+        Runs of legacy snapshots are collapsed first. Delta conversations keep
+        their ids and snapshots get "@<offset>" ids, so re-running the import
+        on an unchanged file is a no-op.
+        """
+        conversations = collapse_snapshots(
+            FileHistoryStorage(jsonl_path, index=False).load_all()
+        )
+        with self.batch():
+            for conv in conversations:
+                self._save(conv)
+        return len(conversations)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ──────────────────────────────────────────────────────────────
+    # Internal helpers
+    def _save(self, conversation: Conversation) -> None:
+        now = time.time()
+        row = self._conn.execute(
+            "SELECT message_count FROM conversations WHERE id = ?", (conversation.id,)
+        ).fetchone()
+        total = conversation.transcript_length
+        archived = conversation.archived
+
+        saved = 0 if row is None else row[0]
+        if saved < archived:
+            raise HistoryGapError(
+                f"conversation {conversation.id}: messages {saved}..{archived - 1} "
+                "were compacted before they were saved"
+            )
+        if row is None:
+            self._conn.execute(
+                "INSERT INTO conversations (id, mode, created, updated, message_count) "
+                "VALUES (?, ?, ?, ?, 0)",
+                (conversation.id, conversation.mode, now, now),
+            )
+        elif saved > total:
+            # Conversation was shortened in memory: store what we still hold,
+            # unless compaction put its summary where stored messages were.
+            if archived:
+                raise HistoryGapError(
+                    f"conversation {conversation.id}: shortened below its {saved} stored "
+                    "messages after compaction"
+                )
+            self._conn.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation.id,))
+            saved = 0
+        elif saved == total:
+            return
+
+        self._conn.executemany(
+            "INSERT INTO messages (conversation_id, position, role, content) VALUES (?, ?, ?, ?)",
+            [
+                (conversation.id, pos, msg.role.value, msg.content)
+                for pos, msg in enumerate(conversation.messages[saved - archived:], start=saved)
+            ],
+        )
+        self._conn.execute(
+            "UPDATE conversations SET mode = ?, updated = ?, message_count = ? WHERE id = ?",
+            (conversation.mode, now, total, conversation.id),
+        )
@@ -0,0 +1,255 @@
+"""
+Write-behind history persistence.
+
+``WriteBehindHistory`` wraps a HistoryPort so ``save`` only snapshots the
+conversation and queues it; a background thread writes queued saves in
+groups (one ``save_many`` call, i.e. one append, per group) and fsyncs
+according to the configured policy:
+
+- "never":    leave flushing to the OS.
+- "interval": fsync at most every ``fsync_interval`` seconds.
+- "always":   fsync after every group commit.
+
+A crash loses at most the saves that were still queued (up to
+``commit_delay`` plus the time of one write) plus, unless the policy is
+"always", whatever the OS had not yet written back since the last fsync
+(up to ``fsync_interval`` for "interval"). ``close`` drains the queue and
+fsyncs, so a clean shutdown loses nothing.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List
+
+from src.core.models import Conversation
+
+if TYPE_CHECKING:
+    from src.core.app import HistoryPort
+
+
+FSYNC_POLICIES = ("never", "interval", "always")
+
+
+class WriteBehindHistory:
+    """HistoryPort wrapper that moves saves off the caller's thread.
+
+    Saves of the same conversation that are still queued are coalesced,
+    keeping only the newest snapshot. ``max_pending`` bounds the queue:
+    when it is full ``save`` blocks until the writer catches up. Reads
+    (``load_all`` and any other wrapped method) flush first, so callers
+    always see their own writes.
+
+    A failed write is retried. ``save`` still queues every snapshot (a
+    caller's turn never fails or loses data because an earlier write did);
+    until a write succeeds, the error is re-raised by the next ``flush`` or
+    ``close`` and kept in ``last_error``.
+    """
+
+    def __init__(
+        self,
+        history: HistoryPort,
+        max_pending: int = 256,
+        max_batch: int = 64,
+        commit_delay: float = 0.005,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        retry_delay: float = 0.5,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, not {fsync!r}")
+        self.history = history
+        self.max_pending = max(1, max_pending)
+        self.max_batch = max(1, max_batch)
+        self.commit_delay = commit_delay
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.retry_delay = retry_delay
+
+        self.commits = 0  # group commits done so far
+        self.syncs = 0
+        self._pending: "OrderedDict[str, Conversation]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # writer vs. flushed reads on the wrapped storage
+        self._writing = False
+        self._dirty = False  # written but not yet fsynced
+        self._last_sync = time.monotonic()
+        self._error: BaseException | None = None
+        self.last_error: BaseException | None = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    # ──────────────────────────────────────────────────────────────
+    # HistoryPort
+    def save(self, conversation: Conversation) -> None:
+        snapshot = self._snapshot(conversation)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteBehindHistory is closed")
+            while conversation.id not in self._pending and len(self._pending) >= self.max_pending:
+                if self.last_error is not None:
+                    raise self.last_error  # queue full and the writer is failing
+                self._cond.wait()
+            self._pending[conversation.id] = snapshot
+            self._cond.notify_all()
+
+    def persisted(self, conversation_id: str) -> int:
+        """Messages the wrapped storage has written; queued saves don't count."""
+        persisted = getattr(self.history, "persisted", None)
+        return 0 if persisted is None else persisted(conversation_id)
+
+    def load_all(self) -> List[Conversation]:
+        self.flush()
+        with self._io_lock:
+            return self.history.load_all()
+
+    # ──────────────────────────────────────────────────────────────
+    # Lifecycle
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued save is written; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._writing:
+                self._raise_error()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.notify_all()
+                self._cond.wait(remaining)
+            self._raise_error()
+        return True
+
+    def close(self, timeout: float | None = None) -> None:
+        """Write everything still queued, fsync, and stop the writer thread."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        with self._cond:
+            self._raise_error()
+
+    def __enter__(self) -> "WriteBehindHistory":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __getattr__(self, name: str):
+        # Other read API of the wrapped storage (get, search, ...) sees all saves.
+        attr = getattr(self.history, name)
+        if not callable(attr):
+            return attr
+
+        def flushed(*args, **kwargs):
+            self.flush()
+            with self._io_lock:
+                return attr(*args, **kwargs)
+
+        return flushed
+
+    # ──────────────────────────────────────────────────────────────
+    # Writer thread
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    timeout = self._sync_timeout()
+                    if timeout is not None and timeout <= 0:
+                        break
+                    self._cond.wait(timeout)
+                if (
+                    self._pending
+                    and not self._closed
+                    and self.commit_delay > 0
+                    and len(self._pending) < self.max_batch
+                ):
+                    # Linger briefly so saves arriving together share one write.
+                    self._cond.wait(self.commit_delay)
+                batch = [
+                    self._pending.popitem(last=False)[1]
+                    for _ in range(min(self.max_batch, len(self._pending)))
+                ]
+                self._writing = bool(batch)
+                stopping = self._closed
+                self._cond.notify_all()
+
+            failed = False
+            if batch:
+                failed = not self._write(batch)
+            if not failed:
+                self._maybe_sync(force=stopping and not self._pending)
+
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+                if failed:
+                    if stopping:
+                        return  # close() re-raises the error
+                    self._cond.wait(self.retry_delay)
+                    continue
+                if stopping and not self._pending:
+                    return
+
+    def _write(self, batch: List[Conversation]) -> bool:
+        try:
+            with self._io_lock:
+                save_many = getattr(self.history, "save_many", None)
+                if save_many is not None:
+                    save_many(batch)
+                else:
+                    for conv in batch:
+                        self.history.save(conv)
+        except Exception as exc:
+            with self._cond:
+                self._error = self.last_error = exc
+                # Requeue unless a newer snapshot was saved meanwhile.
+                for conv in reversed(batch):
+                    if conv.id not in self._pending:
+                        self._pending[conv.id] = conv
+                        self._pending.move_to_end(conv.id, last=False)
+            return False
+        self.commits += 1
+        self._dirty = True
+        with self._cond:
+            self._error = self.last_error = None  # retried successfully
+        return True
+
+    def _maybe_sync(self, force: bool = False) -> None:
+        if not self._dirty or self.fsync == "never":
+            return
+        if self.fsync == "interval" and not force:
+            if time.monotonic() - self._last_sync < self.fsync_interval:
+                return
+        sync = getattr(self.history, "sync", None)
+        if sync is not None:
+            with self._io_lock:
+                sync()
+            self.syncs += 1
+        self._dirty = False
+        self._last_sync = time.monotonic()
+
+    def _sync_timeout(self) -> float | None:
+        if self.fsync != "interval" or not self._dirty:
+            return None
+        return self._last_sync + self.fsync_interval - time.monotonic()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    @staticmethod
+    def _snapshot(conversation: Conversation) -> Conversation:
+        # Messages are immutable, so copying the list is enough to freeze the
+        # conversation against turns that happen before the writer gets to it.
+        return Conversation(
+            mode=conversation.mode,
+            messages=conversation.messages[:],
+            id=conversation.id,
+            archived=conversation.archived,
+        )
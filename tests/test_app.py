@@ -1,3 +1,4 @@
+from src.ai.provider import AICore, FakeAIProvider
 from src.core.models import Conversation, Role
 from src.core.app import AssistantSession
 
@@ -67,4 +68,32 @@ def test_session_history_command_shows_previous_messages():
     out = session.handle_user_input("/history")
 
     assert "hello history" in out.lower()
-    assert "user" in out.lower()
\ No newline at end of file
+    assert "user" in out.lower()
+
+def test_session_streams_reply_and_saves_when_done():
+    history = FakeHistory()
+    session = AssistantSession.start(
+        core=AICore(FakeAIProvider(chunk_size=2)), history=history, mode="chat"
+    )
+
+    chunks = session.stream_user_input("Hello stream")
+    first = next(chunks)
+    assert history.saved == []
+
+    text = first + "".join(chunks)
+    assert "Hello stream" in text
+    assert len(history.saved) == 1
+    assert session.conversation.messages[-1].content == text
+
+
+def test_session_stream_falls_back_for_commands_and_plain_cores():
+    session = AssistantSession.start(core=DummyCore(), history=FakeHistory(), mode="chat")
+
+    assert list(session.stream_user_input("/exit")) == [session.EXIT_TOKEN]
+    assert list(session.stream_user_input("Hi")) == ["AI: Hi"]
+
+
+def test_session_search_command_without_search_support():
+    session = AssistantSession.start(core=DummyCore(), history=FakeHistory(), mode="chat")
+
+    assert "not available" in session.handle_user_input("/search anything")
@@ -0,0 +1,158 @@
+import asyncio
+import time
+
+from src.ai.async_provider import AsyncAICore, AsyncFakeAIProvider, SyncProviderAdapter
+from src.ai.provider import FakeAIProvider
+from src.core.async_app import AsyncAssistantSession, ThreadedHistory, TurnScheduler
+from src.core.metrics import Metrics
+from src.core.models import Conversation, Role
+from src.storage.history import FileHistoryStorage
+from src.storage.search import SearchableHistory, SearchIndex
+
+
+class FakeAsyncHistory:
+    """In-memory async history store for tests."""
+    def __init__(self) -> None:
+        self.saved: list[Conversation] = []
+
+    async def save(self, conversation: Conversation) -> None:
+        self.saved.append(conversation)
+
+    async def load_all(self) -> list[Conversation]:
+        return list(self.saved)
+
+
+class SyncHistory:
+    def __init__(self) -> None:
+        self.saved: list[Conversation] = []
+
+    def save(self, conversation: Conversation) -> None:
+        self.saved.append(conversation)
+
+    def load_all(self) -> list[Conversation]:
+        return list(self.saved)
+
+
+def test_async_session_handles_message_and_history():
+    async def scenario():
+        history = FakeAsyncHistory()
+        session = AsyncAssistantSession.start(
+            core=AsyncAICore(AsyncFakeAIProvider()), history=history
+        )
+        reply = await session.handle_user_input("Hello async")
+        out = await session.handle_user_input("/history")
+        return reply, out, history, session
+
+    reply, out, history, session = asyncio.run(scenario())
+
+    assert "Hello async" in reply
+    assert "User: Hello async" in out
+    assert len(history.saved) == 1
+    assert session.conversation.messages[-1].role is Role.ASSISTANT
+
+
+def test_async_stream_assembles_reply():
+    async def scenario():
+        session = AsyncAssistantSession.start(
+            core=AsyncAICore(AsyncFakeAIProvider(chunk_size=3)), history=FakeAsyncHistory()
+        )
+        chunks = [c async for c in session.stream_user_input("Stream")]
+        return chunks, session
+
+    chunks, session = asyncio.run(scenario())
+
+    assert len(chunks) > 1
+    assert session.conversation.messages[-1].content == "".join(chunks)
+
+
+def test_sync_provider_and_history_adapters():
+    async def scenario():
+        history = SyncHistory()
+        session = AsyncAssistantSession.start(
+            core=AsyncAICore(SyncProviderAdapter(FakeAIProvider(chunk_size=2))),
+            history=ThreadedHistory(history),
+        )
+        chunks = [c async for c in session.stream_user_input("threads")]
+        return chunks, history
+
+    chunks, history = asyncio.run(scenario())
+
+    assert "threads" in "".join(chunks)
+    assert len(history.saved) == 1
+
+
+def test_scheduler_overlaps_latency_and_limits_concurrency():
+    async def scenario():
+        core = AsyncAICore(AsyncFakeAIProvider(delay=0.05))
+        sessions = [
+            AsyncAssistantSession.start(core=core, history=FakeAsyncHistory())
+            for _ in range(20)
+        ]
+        scheduler = TurnScheduler(max_concurrency=10)
+        started = time.perf_counter()
+        replies = await scheduler.run_all((s, f"hi {i}") for i, s in enumerate(sessions))
+        return replies, time.perf_counter() - started
+
+    replies, elapsed = asyncio.run(scenario())
+
+    assert replies[3].endswith("hi 3")
+    # 20 turns of 50 ms with 10 in flight: two waves, not twenty.
+    assert elapsed < 0.5
+
+
+def test_scheduler_keeps_turns_of_one_session_ordered():
+    async def scenario():
+        session = AsyncAssistantSession.start(
+            core=AsyncAICore(AsyncFakeAIProvider(delay=0.01)), history=FakeAsyncHistory()
+        )
+        scheduler = TurnScheduler(max_concurrency=5)
+        await scheduler.run_all([(session, "one"), (session, "two"), (session, "three")])
+        return session
+
+    session = asyncio.run(scenario())
+
+    users = [m.content for m in session.conversation.messages if m.role is Role.USER]
+    assert users == ["one", "two", "three"]
+
+
+def test_async_commands_match_the_sync_session(tmp_path):
+    storage = SearchableHistory(
+        FileHistoryStorage(tmp_path / "history.jsonl", delta=True),
+        SearchIndex(tmp_path / "history.search.db"),
+    )
+
+    async def scenario():
+        history = ThreadedHistory(storage)
+        session = None
+        for i in range(12):
+            session = AsyncAssistantSession.start(
+                core=AsyncAICore(AsyncFakeAIProvider()), history=history, metrics=Metrics()
+            )
+            await session.handle_user_input(f"chat number {i} zucchini")
+        commands = ["/history 2", "/history 3", "/search zucchini", "/stats", "/nope"]
+        return [await session.handle_user_input(c) for c in commands]
+
+    page2, page3, found, stats, unknown = asyncio.run(scenario())
+
+    assert "chat number 11" in page2 and "chat number 0" not in page2
+    assert page3 == "(no history on page 3)"
+    assert "User: " in found and "[zucchini]" in found
+    assert "Metrics are off" not in stats
+    assert "/search <terms>" in unknown
+
+
+def test_async_only_history_gets_paging_but_no_search():
+    async def scenario():
+        session = AsyncAssistantSession.start(
+            core=AsyncAICore(AsyncFakeAIProvider()), history=FakeAsyncHistory()
+        )
+        await session.handle_user_input("Hello async")
+        commands = ["/history 2", "/history --last", "/search hello", "/stats"]
+        return [await session.handle_user_input(c) for c in commands]
+
+    page2, usage, search, stats = asyncio.run(scenario())
+
+    assert page2 == "(no history on page 2)"
+    assert usage.startswith("Usage")
+    assert "not available" in search
+    assert stats == "Metrics are off for this session."
@@ -0,0 +1,113 @@
+import threading
+import time
+
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.app import AssistantSession
+from src.core.background import BackgroundSession
+from src.core.models import Conversation
+
+
+class FakeHistory:
+    def __init__(self) -> None:
+        self.saved: list[Conversation] = []
+
+    def save(self, conversation: Conversation) -> None:
+        self.saved.append(conversation)
+
+    def load_all(self) -> list[Conversation]:
+        return list(self.saved)
+
+
+class GatedProvider(FakeAIProvider):
+    """Streams one chunk, then waits until the test opens the gate."""
+    def __init__(self) -> None:
+        super().__init__(chunk_size=2)
+        self.gate = threading.Event()
+
+    def stream(self, conversation):
+        chunks = super().stream(conversation)
+        yield next(chunks)
+        self.gate.wait(2)
+        yield from chunks
+
+
+def _events_until(worker: BackgroundSession, kinds: set[str], timeout: float = 2.0):
+    seen = []
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        seen.extend(worker.poll())
+        if seen and seen[-1].kind in kinds:
+            return seen
+        time.sleep(0.005)
+    raise AssertionError(f"no {kinds} event, got {seen}")
+
+
+def test_background_session_streams_events_and_saves():
+    history = FakeHistory()
+    session = AssistantSession.start(core=AICore(FakeAIProvider(chunk_size=3)), history=history)
+    worker = BackgroundSession(session)
+
+    job = worker.submit("Hello worker")
+    events = _events_until(worker, {"done"})
+    worker.close()
+
+    assert events[0].kind == "start"
+    assert all(e.job == job for e in events)
+    chunks = "".join(e.text for e in events if e.kind == "chunk")
+    assert events[-1].text == chunks
+    assert "Hello worker" in chunks
+    assert len(history.saved) == 1
+
+
+def test_background_session_cancel_stops_in_flight_reply():
+    provider = GatedProvider()
+    history = FakeHistory()
+    session = AssistantSession.start(core=AICore(provider), history=history)
+    worker = BackgroundSession(session)
+
+    worker.submit("Please cancel me")
+    _events_until(worker, {"chunk"})
+    worker.cancel()
+    provider.gate.set()
+    events = _events_until(worker, {"cancelled"})
+    worker.close()
+
+    assert events[-1].kind == "cancelled"
+    assert history.saved == []
+    assert session.conversation.messages == []  # the unanswered question is gone
+
+
+def test_turn_after_a_cancelled_one_does_not_repeat_the_user_role():
+    provider = GatedProvider()
+    history = FakeHistory()
+    session = AssistantSession.start(core=AICore(provider), history=history)
+    worker = BackgroundSession(session)
+
+    worker.submit("Cancel me")
+    _events_until(worker, {"chunk"})
+    worker.cancel()
+    provider.gate.set()
+    _events_until(worker, {"cancelled"})
+    worker.submit("Answer me")
+    _events_until(worker, {"done"})
+    worker.close()
+
+    roles = [m.role.value for m in history.saved[-1].messages]
+    assert roles == ["user", "assistant"]
+    assert history.saved[-1].messages[0].content == "Answer me"
+
+
+def test_background_session_reports_errors():
+    class Broken:
+        def start_conversation(self, mode):
+            return Conversation(mode=mode)
+
+        def generate_reply(self, conversation):
+            raise RuntimeError("provider down")
+
+    worker = BackgroundSession(AssistantSession.start(core=Broken(), history=FakeHistory()))
+    worker.submit("hi")
+    events = _events_until(worker, {"error"})
+    worker.close()
+
+    assert "provider down" in events[-1].text
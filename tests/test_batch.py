@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import main
+from src.ai.async_provider import AsyncAICore, AsyncFakeAIProvider
+from src.ai.provider import AICore, FakeAIProvider, generate_batch
+from src.core.models import Conversation, Role
+
+
+class LoopOnlyProvider:
+    def generate(self, conversation: Conversation) -> str:
+        return conversation.last_user_message().upper()
+
+
+class FlakyProvider(FakeAIProvider):
+    def generate_batch(self, conversations):
+        if any("boom" in c.last_user_message() for c in conversations):
+            raise RuntimeError("backend exploded")
+        return super().generate_batch(conversations)
+
+
+def _convs(n: int) -> list[Conversation]:
+    convs = []
+    for i in range(n):
+        conv = Conversation(mode="chat")
+        conv.add_user_message(f"prompt {i}")
+        convs.append(conv)
+    return convs
+
+
+def test_generate_batch_falls_back_to_loop():
+    assert generate_batch(LoopOnlyProvider(), _convs(2)) == ["PROMPT 0", "PROMPT 1"]
+
+
+def test_generate_replies_runs_in_parallel_and_keeps_order():
+    core = AICore(FakeAIProvider(delay=0.05))
+    convs = _convs(16)
+
+    started = time.perf_counter()
+    replies = core.generate_replies(convs, max_workers=8)
+    elapsed = time.perf_counter() - started
+
+    assert [r.content for r in replies] == [f"🤖 I hear you said: prompt {i}" for i in range(16)]
+    assert all(c.messages[-1].role is Role.ASSISTANT for c in convs)
+    assert elapsed < 0.5
+
+
+def test_iter_replies_batches_and_reports_errors():
+    convs = _convs(4)
+    convs[2].add_user_message("boom")
+    core = AICore(FlakyProvider())
+
+    results = list(core.iter_replies(convs, batch_size=2, return_exceptions=True))
+    assert [type(r).__name__ for r in results] == ["Message", "Message", "RuntimeError", "RuntimeError"]
+
+    with pytest.raises(RuntimeError):
+        core.generate_replies(convs, batch_size=2)
+
+
+def test_short_batch_reply_is_an_error_for_every_conversation():
+    class ShortProvider(FakeAIProvider):
+        def generate_batch(self, conversations):
+            return super().generate_batch(conversations)[:-1]
+
+    convs = _convs(3)
+    results = list(AICore(ShortProvider()).iter_replies(convs, batch_size=3, return_exceptions=True))
+    assert [type(r).__name__ for r in results] == ["ValueError"] * 3
+    assert all(len(c.messages) == 1 for c in convs)
+
+
+def test_async_generate_replies_uses_gather():
+    core = AsyncAICore(AsyncFakeAIProvider(delay=0.05))
+    convs = _convs(10)
+
+    started = time.perf_counter()
+    replies = asyncio.run(core.generate_replies(convs, max_concurrency=10))
+
+    assert time.perf_counter() - started < 0.4
+    assert replies[9].content.endswith("prompt 9")
+
+
+def test_batch_cli_streams_jsonl(tmp_path):
+    src = tmp_path / "in.jsonl"
+    out = tmp_path / "out.jsonl"
+    src.write_text(
+        "\n".join([
+            json.dumps({"id": "a", "prompt": "hello"}),
+            json.dumps({"messages": [{"role": "user", "content": "from messages"}], "mode": "coder"}),
+            "",
+        ]),
+        encoding="utf-8",
+    )
+
+    main.main(["--batch", str(src), "--out", str(out), "--workers", "2"])
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert rows[0] == {"id": "a", "reply": "🤖 I hear you said: hello"}
+    assert rows[1]["id"] == "2"
+    assert rows[1]["reply"].endswith("from messages")
+
+
+def test_batch_cli_reports_bad_lines_and_keeps_going(tmp_path):
+    src = tmp_path / "in.jsonl"
+    out = tmp_path / "out.jsonl"
+    src.write_text(
+        "\n".join([
+            "{not json",
+            json.dumps({"id": "a", "prompt": "hello"}),
+            json.dumps({"id": "b", "messages": [{"role": "robot", "content": "x"}]}),
+            json.dumps({"id": "c", "prompt": "still here"}),
+            "[1, 2]",
+        ]),
+        encoding="utf-8",
+    )
+
+    main.main(["--batch", str(src), "--out", str(out), "--workers", "2"])
+
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [r["id"] for r in rows] == ["1", "a", "b", "c", "5"]
+    assert [("reply" in r, "error" in r) for r in rows] == [
+        (False, True), (True, False), (False, True), (True, False), (False, True)
+    ]
+    assert rows[0]["error"].startswith("line 1:")
+
@@ -0,0 +1,49 @@
+import json
+
+from benchmarks.harness import compare, percentile
+from benchmarks.suite import main, run
+
+
+def test_quick_suite_covers_every_benchmark():
+    results = run(quick=True)
+    names = {r["name"] for r in results}
+    assert {
+        "session_turn",
+        "history_save",
+        "history_load_all",
+        "to_ai_payload",
+        "memory_conversation",
+        "memory_load_all",
+        "memory_to_ai_payload",
+    } <= names
+    assert all(r["peak_bytes"] > 0 for r in results if r["name"].startswith("memory_"))
+
+
+def test_main_writes_json_and_flags_regressions(tmp_path, capsys):
+    out = tmp_path / "results.json"
+    assert main(["--quick", "--out", str(out)]) == 0
+    data = json.loads(out.read_text())
+    assert data["environment"]["python"]
+    assert data["results"]
+
+    # A baseline that was 10x faster everywhere must be reported.
+    for record in data["results"]:
+        for metric in ("p50", "peak_bytes"):
+            if record.get(metric):
+                record[metric] /= 10
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(data))
+    assert main(["--quick", "--out", str(tmp_path / "again.json"), "--compare", str(baseline)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+
+
+def test_compare_ignores_small_changes_and_unknown_results():
+    base = [{"name": "x", "params": {"n": 1}, "p50": 1.0}]
+    assert compare([{"name": "x", "params": {"n": 1}, "p50": 1.1}], base) == []
+    assert compare([{"name": "y", "params": {"n": 1}, "p50": 9.0}], base) == []
+    assert len(compare([{"name": "x", "params": {"n": 1}, "p50": 2.0}], base)) == 1
+
+
+def test_percentile_interpolates():
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile([], 95) == 0.0
@@ -0,0 +1,95 @@
+import time
+
+from src.ai.cache import CachingProvider, cache_key
+from src.ai.provider import FakeAIProvider
+from src.core.models import Conversation
+
+
+class CountingProvider(FakeAIProvider):
+    def __init__(self) -> None:
+        super().__init__(chunk_size=4)
+        self.calls = 0
+
+    def generate(self, conversation: Conversation) -> str:
+        self.calls += 1
+        return super().generate(conversation)
+
+
+def _conv(text: str, mode: str = "chat") -> Conversation:
+    conv = Conversation(mode=mode)
+    conv.add_user_message(text)
+    return conv
+
+
+def test_cache_key_depends_on_mode_and_normalized_payload():
+    assert cache_key(_conv("help me")) == cache_key(_conv(" help me \n"))
+    assert cache_key(_conv("if x:\n    y()")) != cache_key(_conv("if x:\n  y()"))
+    assert cache_key(_conv("help")) != cache_key(_conv("help", mode="coder"))
+
+    long = _conv("first")
+    long.add_assistant_message("reply")
+    long.add_user_message("help")
+    assert cache_key(long, last_n=1) == cache_key(_conv("help"), last_n=1)
+
+
+def test_hits_skip_the_provider():
+    inner = CountingProvider()
+    provider = CachingProvider(inner)
+
+    first = provider.generate(_conv("help"))
+    second = provider.generate(_conv("help"))
+
+    assert first == second
+    assert inner.calls == 1
+    assert (provider.stats.hits, provider.stats.misses) == (1, 1)
+    assert provider.stats.hit_rate == 0.5
+
+
+def test_lru_evicts_oldest_and_ttl_expires():
+    inner = CountingProvider()
+    provider = CachingProvider(inner, max_entries=2, ttl=0.05)
+
+    for text in ["a", "b", "a", "c"]:
+        provider.generate(_conv(text))
+    assert provider.stats.evictions == 1
+    provider.generate(_conv("a"))
+    assert inner.calls == 3  # "b" was evicted, "a" stayed hot
+
+    time.sleep(0.06)
+    provider.generate(_conv("a"))
+    assert provider.stats.expirations == 1
+    assert inner.calls == 4
+
+
+def test_stream_caches_complete_replies():
+    inner = CountingProvider()
+    provider = CachingProvider(inner)
+
+    streamed = "".join(provider.stream(_conv("stream")))
+    assert list(provider.stream(_conv("stream"))) == [streamed]
+    assert provider.stats.hits == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    db = tmp_path / "cache.db"
+    CachingProvider(CountingProvider(), disk_path=db).generate(_conv("persist"))
+
+    inner = CountingProvider()
+    provider = CachingProvider(inner, disk_path=db)
+    assert "persist" in provider.generate(_conv("persist"))
+    assert inner.calls == 0
+    assert provider.stats.disk_hits == 1
+
+
+def test_disk_hit_keeps_the_disk_expiry(tmp_path):
+    db = tmp_path / "cache.db"
+    CachingProvider(CountingProvider(), ttl=0.2, disk_path=db).generate(_conv("soon"))
+    time.sleep(0.1)
+
+    inner = CountingProvider()
+    provider = CachingProvider(inner, ttl=0.2, disk_path=db)
+    provider.generate(_conv("soon"))  # promoted with ~0.1s left, not a fresh 0.2s
+    time.sleep(0.15)
+    provider.generate(_conv("soon"))
+    assert inner.calls == 1
+    assert provider.stats.expirations == 1
@@ -0,0 +1,55 @@
+import pytest
+
+import main
+from src.storage.codecs import get_codec
+from src.storage.write_behind import FSYNC_POLICIES
+
+
+@pytest.mark.parametrize("stop", [EOFError, KeyboardInterrupt])
+def test_interactive_exit_without_command_writes_queued_history(tmp_path, monkeypatch, stop):
+    monkeypatch.chdir(tmp_path)
+    lines = iter(["hello"])
+
+    def fake_input(prompt):
+        try:
+            return next(lines)
+        except StopIteration:
+            raise stop from None
+
+    monkeypatch.setattr("builtins.input", fake_input)
+    main.main([])
+
+    assert b"hello" in (tmp_path / main.HISTORY_FILE).read_bytes()
+
+
+def test_unknown_codec_is_rejected_before_startup(capsys):
+    with pytest.raises(SystemExit):
+        main.parse_args(["--codec", "bogus"])
+    assert "invalid choice" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("name", main.CODECS)
+def test_codec_choices_are_known_codecs(name):
+    try:
+        get_codec(name)
+    except RuntimeError:
+        pass  # known, but its package isn't installed here
+
+
+def test_fsync_choices_match_write_behind():
+    assert main.FSYNC_POLICIES == FSYNC_POLICIES
+
+
+def test_history_that_fails_to_open_is_reported_before_the_first_turn(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+
+    def broken(args, metrics=None):
+        raise PermissionError("history.jsonl is read-only")
+
+    monkeypatch.setattr(main, "open_history", broken)
+    monkeypatch.setattr("builtins.input", lambda prompt: "hello")
+
+    assert main.main([]) == 1
+    out = capsys.readouterr().out
+    assert out.count("Could not open the history: history.jsonl is read-only") == 1
+    assert "AI:" not in out
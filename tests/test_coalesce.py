@@ -0,0 +1,237 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.ai.async_provider import AsyncFakeAIProvider
+from src.ai.coalesce import AsyncCoalescingProvider, CoalescingProvider
+from src.ai.provider import AICore
+from src.core.models import Conversation
+
+
+class GatedProvider:
+    """Blocks every call until ``release`` is set; counts upstream calls."""
+    def __init__(self, fail: bool = False):
+        self.release = threading.Event()
+        self.calls = 0
+        self.streams_closed = 0
+        self.fail = fail
+
+    def generate(self, conversation: Conversation) -> str:
+        self.calls += 1
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return f"echo: {conversation.last_user_message()}"
+
+    def stream(self, conversation: Conversation):
+        self.calls += 1
+        try:
+            self.release.wait(5)
+            for part in ("one ", "two ", "three"):
+                yield part
+        finally:
+            self.streams_closed += 1
+
+
+def _conv(text: str = "help", mode: str = "chat") -> Conversation:
+    conv = Conversation(mode=mode)
+    conv.add_user_message(text)
+    return conv
+
+
+def _wait_for(predicate) -> None:
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def _run_threads(target, count: int) -> list:
+    results = [None] * count
+
+    def run(i):
+        results[i] = target()
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    return results, threads
+
+
+def test_identical_concurrent_requests_share_one_upstream_call():
+    upstream = GatedProvider()
+    provider = CoalescingProvider(upstream)
+    # Same normalized payload: whitespace differences don't matter.
+    results, threads = _run_threads(lambda: provider.generate(_conv("  help ")), 10)
+    _wait_for(lambda: provider.stats.calls == 10)
+    other = threading.Thread(target=provider.generate, args=(_conv("help", mode="coder"),))
+    other.start()
+    _wait_for(lambda: provider.stats.calls == 11)
+    upstream.release.set()
+    for t in threads + [other]:
+        t.join()
+
+    assert len(set(results)) == 1 and results[0].startswith("echo:")
+    assert upstream.calls == 2
+    assert provider.stats.merged == 9
+    assert provider.usage()["inflight"] == 0
+
+    provider.generate(_conv())  # nothing is cached once the flight landed
+    assert upstream.calls == 3
+
+
+def test_errors_reach_every_waiter():
+    upstream = GatedProvider(fail=True)
+    provider = CoalescingProvider(upstream)
+    errors = []
+
+    def call():
+        try:
+            provider.generate(_conv())
+        except ConnectionError as exc:
+            errors.append(exc)
+
+    _, threads = _run_threads(call, 4)
+    _wait_for(lambda: provider.stats.calls == 4)
+    upstream.release.set()
+    for t in threads:
+        t.join()
+    assert len(errors) == 4
+    assert upstream.calls == 1
+
+
+def test_concurrent_streams_replay_and_follow_one_upstream_stream():
+    upstream = GatedProvider()
+    provider = CoalescingProvider(upstream)
+    core = AICore(provider)
+    convs = [_conv() for _ in range(5)]
+    texts = [None] * 5
+
+    def run(i):
+        texts[i] = "".join(core.stream_reply(convs[i]))
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(5)]
+    for t in threads:
+        t.start()
+    _wait_for(lambda: provider.stats.calls == 5)
+    upstream.release.set()
+    for t in threads:
+        t.join()
+
+    assert texts == ["one two three"] * 5
+    assert all(c.messages[-1].content == "one two three" for c in convs)
+    assert upstream.calls == 1
+    assert upstream.streams_closed == 1
+
+
+def test_stream_survives_the_first_subscriber_leaving():
+    upstream = GatedProvider()
+    upstream.release.set()
+    provider = CoalescingProvider(upstream)
+    first = provider.stream(_conv())
+    assert next(first) == "one "
+    second = provider.stream(_conv())
+    assert next(second) == "one "  # replayed
+    first.close()
+    assert upstream.streams_closed == 0  # still has a subscriber
+    assert list(second) == ["two ", "three"]
+    assert upstream.calls == 1
+    assert upstream.streams_closed == 1
+
+
+def test_async_callers_share_calls_and_survive_cancellation():
+    class CountingProvider(AsyncFakeAIProvider):
+        calls = 0
+
+        async def generate(self, conversation):
+            CountingProvider.calls += 1
+            return await super().generate(conversation)
+
+    async def scenario():
+        provider = AsyncCoalescingProvider(CountingProvider(delay=0.05))
+        cancelled = asyncio.ensure_future(provider.generate(_conv()))
+        waiters = [asyncio.ensure_future(provider.generate(_conv())) for _ in range(9)]
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        replies = await asyncio.gather(*waiters)
+        return replies, provider.stats
+
+    replies, stats = asyncio.run(scenario())
+    assert replies == ["🤖 I hear you said: help"] * 9
+    assert CountingProvider.calls == 1
+    assert (stats.calls, stats.upstream, stats.merged) == (10, 1, 9)
+
+
+def test_async_streams_share_one_upstream_stream():
+    async def scenario():
+        provider = AsyncCoalescingProvider(AsyncFakeAIProvider(chunk_size=4, delay=0.005))
+
+        async def consume():
+            return [part async for part in provider.stream(_conv())]
+
+        results = await asyncio.gather(*(consume() for _ in range(5)))
+        return results, provider
+
+    results, provider = asyncio.run(scenario())
+    assert all("".join(r) == "🤖 I hear you said: help" for r in results)
+    assert all(r == results[0] for r in results)
+    assert provider.stats.upstream == 1
+    assert provider.stats.merged == 4
+    assert provider.usage()["inflight"] == 0
+
+
+def test_async_stream_error_reaches_every_subscriber():
+    class Broken(AsyncFakeAIProvider):
+        async def stream(self, conversation):
+            yield "partial"
+            await asyncio.sleep(0.01)
+            raise ConnectionError("dropped")
+
+    async def scenario():
+        provider = AsyncCoalescingProvider(Broken())
+
+        async def consume():
+            parts = []
+            with pytest.raises(ConnectionError):
+                async for part in provider.stream(_conv()):
+                    parts.append(part)
+            return parts
+
+        return await asyncio.gather(consume(), consume())
+
+    assert asyncio.run(scenario()) == [["partial"], ["partial"]]
+
+
+def test_async_stream_survives_a_cancelled_subscriber():
+    class Slow(AsyncFakeAIProvider):
+        async def stream(self, conversation):
+            for part in "abcd":
+                await asyncio.sleep(0.01)
+                yield part
+
+    async def scenario():
+        provider = AsyncCoalescingProvider(Slow())
+        seen = []
+
+        async def first():
+            async for part in provider.stream(_conv()):
+                seen.append(part)
+
+        async def second():
+            return [part async for part in provider.stream(_conv())]
+
+        leaver = asyncio.ensure_future(first())
+        await asyncio.sleep(0)
+        stayer = asyncio.ensure_future(second())
+        while not seen:
+            await asyncio.sleep(0.001)
+        leaver.cancel()  # while it waits for "b"
+        return seen, await stayer, provider
+
+    seen, parts, provider = asyncio.run(scenario())
+    assert seen == ["a"]
+    assert parts == ["a", "b", "c", "d"]
+    assert provider.stats.upstream == 1
+    assert provider.usage()["inflight"] == 0
@@ -0,0 +1,111 @@
+import io
+
+import pytest
+
+from src.core.models import Conversation
+from src.storage.codecs import Codec, available, get_codec, header, iter_records, read_header
+from src.storage.history import FileHistoryStorage
+
+
+def _chat(storage: FileHistoryStorage, turns: int, conv: Conversation | None = None) -> Conversation:
+    conv = conv or Conversation(mode="chat")
+    for i in range(turns):
+        conv.add_user_message(f"question {i}")
+        conv.add_assistant_message(f"answer {i}")
+        storage.save(conv)
+    return conv
+
+
+@pytest.mark.parametrize("name", available())
+def test_codec_round_trip(name):
+    codec = get_codec(name)
+    record = {"id": "a", "mode": "chat", "ts": 1.5, "messages": [{"role": "user", "content": "hi ünïcode"}]}
+    frame = codec.frame(record)
+    assert codec.unframe(frame) == record
+
+    stream = io.BytesIO(header(codec) + frame + codec.frame({"id": "b"}))
+    assert [r["id"] for _, _, r in iter_records(stream, codec)] == ["a", "b"]
+
+
+def test_auto_prefers_fastest_installed_json_codec():
+    assert get_codec("auto").format == "jsonl"
+    assert get_codec("auto").name in ("msgspec", "orjson", "json")
+    with pytest.raises(ValueError):
+        get_codec("yaml")
+
+
+@pytest.mark.parametrize("name", [n for n in available() if get_codec(n).format == "jsonl"])
+def test_json_codecs_share_the_legacy_file_format(tmp_path, name):
+    path = tmp_path / "history.jsonl"
+    writer = FileHistoryStorage(path, delta=True, codec="json")
+    conv = _chat(writer, 2)
+    assert not path.read_bytes().startswith(b'{"format"')  # jsonl stays header-less
+
+    reader = FileHistoryStorage(path, delta=True, codec=name)
+    loaded = reader.get(conv.id)
+    assert [m.content for m in loaded.messages] == [m.content for m in conv.messages]
+    _chat(reader, 1, conv)
+    assert len(FileHistoryStorage(path, delta=True, codec="json").get(conv.id).messages) == 6
+
+
+def test_msgpack_history_keeps_its_format(tmp_path):
+    pytest.importorskip("msgpack")
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, delta=True, codec="msgpack")
+    conv = _chat(storage, 3)
+    with path.open("rb") as f:
+        assert read_header(f)[0].name == "msgpack"
+
+    # A reader configured for JSON still follows the header.
+    reader = FileHistoryStorage(path, delta=True, codec="json")
+    assert len(reader.get(conv.id).messages) == 6
+    _chat(reader, 1, conv)
+    assert len(FileHistoryStorage(path, delta=True).load_all()[0].messages) == 8
+    with path.open("rb") as f:
+        assert read_header(f)[0].name == "msgpack"
+
+
+def test_torn_msgpack_frame_is_truncated_before_appending(tmp_path):
+    pytest.importorskip("msgpack")
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, delta=True, codec="msgpack")
+    conv = _chat(storage, 2)
+    with path.open("ab") as f:
+        f.write(b"\x00\x00\x01\x00partial")  # writer died mid-frame
+
+    fresh = FileHistoryStorage(path, delta=True, codec="msgpack")
+    assert len(fresh.get(conv.id).messages) == 4
+    _chat(fresh, 1, conv)
+    again = FileHistoryStorage(path, delta=True, codec="msgpack")
+    assert len(again.get(conv.id).messages) == 6
+    assert [s.message_count for s in again.list_summaries()] == [6]
+
+
+def test_bad_msgpack_frame_is_quarantined_and_later_frames_kept(tmp_path):
+    pytest.importorskip("msgpack")
+    other = tmp_path / "other.jsonl"
+    survivor = _chat(FileHistoryStorage(other, delta=True, codec="msgpack"), 1)
+    with other.open("rb") as f:
+        read_header(f)
+        later_frame = f.read()  # a complete frame, written after the bad one below
+
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, delta=True, codec="msgpack")
+    conv = _chat(storage, 1)
+    bad = b"\xff\xff\x00\x10garbage"  # corrupt length prefix
+    with path.open("ab") as f:
+        f.write(bad + later_frame)
+
+    fresh = FileHistoryStorage(path, delta=True, codec="msgpack")
+    _chat(fresh, 1, conv)
+    again = FileHistoryStorage(path, delta=True, codec="msgpack")
+    assert len(again.get(conv.id).messages) == 4
+    assert [m.content for m in again.get(survivor.id).messages] == ["question 0", "answer 0"]
+    assert (tmp_path / "history.jsonl.corrupt").read_bytes() == bad
+    assert len(again.load_all()) == 2
+
+
+def test_corrupt_json_line_is_skipped():
+    codec = Codec()
+    stream = io.BytesIO(b'{"id": "a"}\nnot json\n\n{"id": "b"}\n{"id": "c"')
+    assert [r["id"] for _, _, r in iter_records(stream, codec)] == ["a", "b"]
@@ -0,0 +1,169 @@
+import threading
+
+import pytest
+
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.app import AssistantSession
+from src.core.compaction import SUMMARY_PREFIX, Compactor, is_summary
+from src.core.models import Conversation, Role
+from src.storage.history import FileHistoryStorage, HistoryGapError
+from src.storage.sqlite_history import SqliteHistoryStorage
+from src.storage.write_behind import WriteBehindHistory
+
+
+def test_compactor_replaces_older_turns_with_summary():
+    conv = Conversation(mode="chat")
+    conv.add_system_message("You are helpful.")
+    for i in range(6):
+        conv.add_user_message(f"q{i}")
+        conv.add_assistant_message(f"a{i}")
+
+    compactor = Compactor(FakeAIProvider(), max_messages=8, keep_last=4)
+    assert compactor.maybe_compact(conv)
+
+    assert conv.messages[0].content == "You are helpful."
+    assert is_summary(conv.messages[1])
+    # FakeAIProvider echoes the transcript, which makes the summary deterministic
+    assert "user: q0" in conv.messages[1].content
+    assert [m.content for m in conv.messages[2:]] == ["q4", "a4", "q5", "a5"]
+    assert conv.archived == 7
+    assert conv.transcript_length == 13
+    assert not compactor.maybe_compact(conv)
+
+
+def test_rolling_summary_folds_previous_summary():
+    conv = Conversation(mode="chat")
+    compactor = Compactor(FakeAIProvider(), max_messages=4, keep_last=2)
+    for i in range(4):
+        conv.add_user_message(f"m{i}")
+        conv.add_assistant_message(f"r{i}")
+        compactor.maybe_compact(conv)
+
+    summaries = [m for m in conv.messages if is_summary(m)]
+    assert len(summaries) == 1
+    assert conv.messages[0] is summaries[0]
+    assert summaries[0].content.startswith(SUMMARY_PREFIX)
+
+
+def test_token_threshold():
+    conv = Conversation(mode="chat")
+    for i in range(4):
+        conv.add_user_message("x" * 40)
+    compactor = Compactor(FakeAIProvider(), max_messages=None, max_tokens=30, keep_last=1)
+    assert compactor.maybe_compact(conv)
+    assert conv.messages[0].role is Role.SYSTEM
+
+
+def _chat(storage, turns: int) -> AssistantSession:
+    session = AssistantSession.start(
+        core=AICore(FakeAIProvider()),
+        history=storage,
+        compactor=Compactor(FakeAIProvider(), max_messages=6, keep_last=2),
+    )
+    for i in range(turns):
+        session.handle_user_input(f"turn {i}")
+    return session
+
+
+def test_history_keeps_full_transcript_after_compaction(tmp_path):
+    storage = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    session = _chat(storage, 10)
+
+    assert len(session.conversation.messages) <= 7
+    stored = FileHistoryStorage(tmp_path / "history.jsonl").load_all()
+    assert len(stored) == 1
+    contents = [m.content for m in stored[0].messages]
+    assert len(contents) == 20
+    assert contents[0] == "turn 0"
+    assert contents[-2] == "turn 9"
+    assert not any(c.startswith(SUMMARY_PREFIX) for c in contents)
+
+
+def test_sqlite_history_keeps_full_transcript_after_compaction(tmp_path):
+    storage = SqliteHistoryStorage(tmp_path / "history.db")
+    session = _chat(storage, 10)
+
+    stored = storage.get(session.conversation.id)
+    assert [m.content for m in stored.messages][::2] == [f"turn {i}" for i in range(10)]
+
+
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+def test_save_after_compacting_unsaved_messages_raises_instead_of_skipping(tmp_path, backend):
+    if backend == "file":
+        storage = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    else:
+        storage = SqliteHistoryStorage(tmp_path / "history.db")
+    conv = Conversation(mode="chat")
+    conv.add_user_message("m0")
+    conv.add_assistant_message("r0")
+    storage.save(conv)
+    for i in range(1, 8):
+        conv.add_user_message(f"m{i}")
+        conv.add_assistant_message(f"r{i}")
+    Compactor(FakeAIProvider(), max_messages=4, keep_last=4).maybe_compact(conv)
+    assert conv.archived == 11  # m1..r5 were never saved
+
+    with pytest.raises(HistoryGapError):
+        storage.save(conv)
+    assert [m.content for m in storage.get(conv.id).messages] == ["m0", "r0"]
+
+
+@pytest.mark.parametrize("backend", ["file", "sqlite"])
+def test_shortening_a_compacted_conversation_never_stores_the_summary(tmp_path, backend):
+    if backend == "file":
+        storage = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    else:
+        storage = SqliteHistoryStorage(tmp_path / "history.db")
+    conv = Conversation(mode="chat")
+    conv.add_system_message("be brief")
+    for i in range(8):
+        conv.add_user_message(f"m{i}")
+        conv.add_assistant_message(f"r{i}")
+    storage.save(conv)
+    Compactor(FakeAIProvider(), max_messages=4, keep_last=4).maybe_compact(conv)
+    conv.replace_messages(len(conv.messages) - 2, len(conv.messages), [])
+
+    with pytest.raises(HistoryGapError):
+        storage.save(conv)
+    contents = [m.content for m in storage.get(conv.id).messages]
+    assert len(contents) == 17
+    assert not any(c.startswith(SUMMARY_PREFIX) for c in contents)
+
+
+def test_compactor_only_folds_stored_messages():
+    conv = Conversation(mode="chat")
+    for i in range(6):
+        conv.add_user_message(f"q{i}")
+        conv.add_assistant_message(f"a{i}")
+    compactor = Compactor(FakeAIProvider(), max_messages=4, keep_last=2)
+
+    assert not compactor.maybe_compact(conv, stored=1)  # nothing worth folding yet
+    assert compactor.maybe_compact(conv, stored=6)
+    assert conv.archived == 5
+    assert [m.content for m in conv.messages[1:3]] == ["q3", "a3"]
+
+
+class SlowDisk(FileHistoryStorage):
+    """Writes block until the test opens the gate."""
+    def __init__(self, path):
+        super().__init__(path, delta=True)
+        self.gate = threading.Event()
+
+    def save_many(self, conversations):
+        self.gate.wait(5)
+        super().save_many(conversations)
+
+
+def test_session_does_not_compact_past_queued_write_behind_saves(tmp_path):
+    path = tmp_path / "history.jsonl"
+    storage = SlowDisk(path)
+    history = WriteBehindHistory(storage)
+    session = _chat(history, 10)
+    assert session.conversation.archived == 0  # nothing confirmed yet
+    storage.gate.set()
+    history.close()
+
+    session = _chat(FileHistoryStorage(path, delta=True), 10)
+    assert session.conversation.archived > 0  # confirmed saves do compact
+    stored = FileHistoryStorage(path, delta=True).load_all()
+    assert sorted(len(c.messages) for c in stored) == [20, 20]
@@ -0,0 +1,98 @@
+from src.core.context import ContextManager, ContextWindow, estimate_tokens
+from src.core.models import Conversation, Message, Role
+
+
+def word_tokenizer(text: str) -> int:
+    return len(text.split())
+
+
+def test_estimate_tokens_is_roughly_chars_over_four():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_window_keeps_system_and_newest_messages_within_budget():
+    conv = Conversation(mode="chat")
+    conv.add_system_message("be nice")
+    for i in range(10):
+        conv.add_user_message(f"question number {i}")
+        conv.add_assistant_message(f"answer number {i}")
+
+    # every message costs 3 words + 4 overhead, system 2 + 4
+    window = ContextWindow(conv, budget=6 + 7 * 4, tokenizer=word_tokenizer)
+    payload = window.payload()
+
+    assert payload[0] == {"role": "system", "content": "be nice"}
+    assert [m["content"] for m in payload[1:]] == [
+        "question number 8", "answer number 8", "question number 9", "answer number 9",
+    ]
+    assert window.total_tokens <= window.budget
+    assert window.dropped == 16
+
+
+def test_payload_is_cached_and_extended_incrementally():
+    conv = Conversation(mode="chat")
+    conv.add_user_message("hi")
+    window = ContextWindow(conv, budget=1000)
+
+    first = window.payload()
+    assert window.payload() is first
+
+    conv.add_assistant_message("hello")
+    second = window.payload()
+    assert second is first
+    assert second[-1] == {"role": "assistant", "content": "hello"}
+    assert second == conv.to_ai_payload()
+
+
+def test_window_resets_when_conversation_shrinks():
+    conv = Conversation(mode="chat")
+    for i in range(5):
+        conv.add_user_message(f"m{i}")
+    window = ContextWindow(conv, budget=1000)
+    window.payload()
+
+    del conv.messages[:3]
+    assert [m["content"] for m in window.payload()] == ["m3", "m4"]
+
+
+def test_window_resets_on_same_length_rewrites():
+    conv = Conversation(mode="chat")
+    for i in range(3):
+        conv.add_user_message(f"m{i}")
+    window = ContextWindow(conv, budget=1000)
+    window.payload()
+
+    conv.replace_messages(0, 1, [Message(Role.SYSTEM, "summary")])
+    assert window.payload()[0] == {"role": "system", "content": "summary"}
+
+    conv.compact()
+    window.payload()
+    conv.messages[2] = Message(Role.USER, "edited")
+    assert window.payload()[-1]["content"] == "edited"
+
+
+def test_larger_budget_brings_trimmed_messages_back():
+    conv = Conversation(mode="chat")
+    for i in range(6):
+        conv.add_user_message(f"message number {i}")
+    window = ContextWindow(conv, budget=20, tokenizer=word_tokenizer)
+    assert window.dropped > 0
+
+    window.budget = 1000
+    assert window.dropped == 0
+    assert len(window.payload()) == 6
+
+
+def test_manager_uses_per_mode_budgets():
+    manager = ContextManager(budgets={"coder": 10}, default_budget=1000, tokenizer=word_tokenizer)
+    coder = Conversation(mode="coder")
+    chat = Conversation(mode="chat")
+    for conv in (coder, chat):
+        for i in range(5):
+            conv.add_user_message(f"message {i}")
+
+    assert len(manager.payload(coder)) == 1
+    assert len(manager.payload(chat)) == 5
+    assert manager.window(coder) is manager.window(coder)
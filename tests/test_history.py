@@ -2,6 +2,7 @@ import json
 from pathlib import Path
 from typing import List
 from src.core.models import Conversation, Message, Role
+from src.storage.history import FileHistoryStorage
 
 
 class HistoryStorage:
@@ -44,4 +45,72 @@ class HistoryStorage:
                     )
                 conversations.append(conv)
 
-        return conversations
\ No newline at end of file
+        return conversations
+
+# ──────────────────────────────────────────────────────────────
+# FileHistoryStorage (real implementation)
+
+
+def test_delta_save_appends_only_new_messages(tmp_path):
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, delta=True)
+    conv = Conversation(mode="chat")
+
+    conv.add_user_message("Hi")
+    conv.add_assistant_message("Hello")
+    storage.save(conv)
+    conv.add_user_message("How are you?")
+    conv.add_assistant_message("Fine")
+    storage.save(conv)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [len(r["messages"]) for r in records] == [2, 2]
+    assert records[1]["start"] == 2
+    assert {r["id"] for r in records} == {conv.id}
+
+
+def test_delta_load_folds_records_into_conversations(tmp_path):
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, delta=True)
+    first = Conversation(mode="chat")
+    second = Conversation(mode="coder")
+
+    first.add_user_message("one")
+    storage.save(first)
+    second.add_user_message("two")
+    storage.save(second)
+    first.add_assistant_message("three")
+    storage.save(first)
+
+    loaded = FileHistoryStorage(path, delta=True).load_all()
+
+    assert [c.id for c in loaded] == [first.id, second.id]
+    assert [m.content for m in loaded[0].messages] == ["one", "three"]
+    assert loaded[1].mode == "coder"
+
+
+def test_delta_storage_reads_and_migrates_snapshot_files(tmp_path):
+    path = tmp_path / "history.jsonl"
+    legacy = FileHistoryStorage(path)
+    conv = Conversation(mode="chat")
+    conv.add_user_message("Hi")
+    conv.add_assistant_message("Hello")
+    legacy.save(conv)
+    conv.add_user_message("Again")
+    conv.add_assistant_message("Hello again")
+    legacy.save(conv)
+
+    storage = FileHistoryStorage(path, delta=True)
+    assert len(storage.load_all()) == 2
+
+    assert storage.migrate() == 1
+    loaded = storage.load_all()
+    assert len(loaded) == 1
+    assert loaded[0].messages[-1].content == "Hello again"
+
+    # Saving a rehydrated conversation only appends the new messages.
+    loaded[0].add_user_message("New")
+    storage.save(loaded[0])
+    last = json.loads(path.read_text().splitlines()[-1])
+    assert last["start"] == 4
+    assert [m["content"] for m in last["messages"]] == ["New"]
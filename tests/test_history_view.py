@@ -0,0 +1,99 @@
+import pytest
+
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.app import AssistantSession
+from src.core.history_view import HistoryQuery, parse_history_args, render_history
+from src.core.models import Conversation
+from src.storage.history import FileHistoryStorage
+from src.storage.snapshots import dedupe_snapshots
+
+
+def _conv(mode: str, *texts: str, conv_id: str | None = None) -> Conversation:
+    conv = Conversation(mode=mode) if conv_id is None else Conversation(mode=mode, id=conv_id)
+    for text in texts:
+        conv.add_user_message(text)
+    return conv
+
+
+def test_parse_history_args():
+    assert parse_history_args("") == HistoryQuery()
+    assert parse_history_args("2 --mode coder --last 5") == HistoryQuery(page=2, mode="coder", last=5)
+    for bad in ["0", "x", "--mode", "--last 0"]:
+        with pytest.raises(ValueError):
+            parse_history_args(bad)
+
+
+def test_dedupe_only_merges_legacy_snapshot_runs():
+    snapshots = [
+        _conv("chat", "a", conv_id="@0"),
+        _conv("chat", "a", "b", conv_id="@10"),
+        _conv("chat", "x", conv_id="@20"),
+    ]
+    merged = list(dedupe_snapshots(snapshots))
+    assert [len(c.messages) for c in merged] == [2, 1]
+
+    real = [_conv("chat", "a"), _conv("chat", "a", "b")]
+    assert len(list(dedupe_snapshots(real))) == 2
+
+
+def test_render_history_pages_lazily():
+    produced = []
+
+    def source():
+        for i in range(25):
+            produced.append(i)
+            yield _conv("chat", f"message {i}")
+
+    chunks = list(render_history(source(), HistoryQuery(page=2, page_size=10), lambda r: r.value))
+
+    assert len(chunks) == 11
+    assert "message 10" in chunks[0]
+    assert "/history 3" in chunks[-1]
+    # Page 2 reads items 0..21 (one extra to detect a next page, one of
+    # snapshot de-duplication lookahead), not all 25.
+    assert len(produced) == 22
+
+
+def test_render_history_mode_and_last():
+    convs = [_conv("chat" if i % 2 else "coder", f"m{i}") for i in range(6)]
+    out = "".join(render_history(convs, HistoryQuery(mode="chat", last=2), lambda r: r.value))
+
+    assert "m1" not in out
+    assert "m3" in out and "m5" in out
+    assert "coder" not in out
+
+
+def test_history_command_streams_pages_from_storage(tmp_path):
+    storage = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    for i in range(12):
+        session = AssistantSession.start(core=AICore(FakeAIProvider()), history=storage)
+        session.handle_user_input(f"chat number {i}")
+
+    chunks = list(session.stream_user_input("/history"))
+    assert len(chunks) == 11
+    assert "chat number 0" in chunks[0]
+
+    page2 = session.handle_user_input("/history 2")
+    assert "chat number 11" in page2
+    assert "chat number 0" not in page2
+    assert session.handle_user_input("/history 3") == "(no history on page 3)"
+    assert session.handle_user_input("/history --last").startswith("Usage")
+
+
+def test_history_command_only_loads_the_requested_page(tmp_path):
+    class CountingStorage(FileHistoryStorage):
+        loaded = 0
+
+        def get(self, conversation_id):
+            self.loaded += 1
+            return super().get(conversation_id)
+
+    storage = CountingStorage(tmp_path / "history.jsonl", delta=True)
+    for i in range(25):
+        session = AssistantSession.start(core=AICore(FakeAIProvider()), history=storage)
+        session.handle_user_input(f"chat number {i}")
+
+    storage.loaded = 0
+    page2 = session.handle_user_input("/history 2")
+    assert "chat number 10" in page2 and "chat number 19" in page2
+    assert storage.loaded == 10
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from src.ai.http_provider import (
+    AsyncOpenAICompatibleProvider,
+    OpenAICompatibleProvider,
+    ProviderError,
+)
+from src.ai.stub_server import StubServer
+from src.core.models import Conversation
+
+
+def _conversation(text: str = "Hello HTTP") -> Conversation:
+    conv = Conversation(mode="chat")
+    conv.add_system_message("You are helpful.")
+    conv.add_user_message(text)
+    return conv
+
+
+def test_generate_reuses_one_pooled_connection():
+    with StubServer() as server:
+        with OpenAICompatibleProvider(server.base_url, model="stub") as provider:
+            replies = [provider.generate(_conversation(f"msg {i}")) for i in range(10)]
+
+    assert replies[4].endswith("msg 4")
+    assert server.requests == 10
+    assert server.connections == 1
+
+
+def test_stream_yields_sse_chunks():
+    with StubServer(chunk_size=4) as server:
+        with OpenAICompatibleProvider(server.base_url, model="stub") as provider:
+            chunks = list(provider.stream(_conversation("stream please")))
+
+    assert len(chunks) > 1
+    assert "".join(chunks).endswith("stream please")
+
+
+def test_retries_transient_failures_with_backoff():
+    with StubServer(fail_first=2) as server:
+        with OpenAICompatibleProvider(
+            server.base_url, model="stub", backoff_base=0.001
+        ) as provider:
+            reply = provider.generate(_conversation())
+
+    assert reply.endswith("Hello HTTP")
+    assert server.requests == 3
+
+
+def test_gives_up_after_max_retries():
+    with StubServer(fail_first=10) as server:
+        with OpenAICompatibleProvider(
+            server.base_url, model="stub", max_retries=1, backoff_base=0.001
+        ) as provider:
+            with pytest.raises(ProviderError):
+                provider.generate(_conversation())
+
+    assert server.requests == 2
+
+
+def test_async_provider_generate_and_stream():
+    async def scenario(base_url):
+        async with AsyncOpenAICompatibleProvider(base_url, model="stub") as provider:
+            replies = await asyncio.gather(
+                *(provider.generate(_conversation(f"async {i}")) for i in range(5))
+            )
+            chunks = [c async for c in provider.stream(_conversation("async stream"))]
+        return replies, chunks
+
+    with StubServer(chunk_size=5) as server:
+        replies, chunks = asyncio.run(scenario(server.base_url))
+
+    assert replies[2].endswith("async 2")
+    assert "".join(chunks).endswith("async stream")
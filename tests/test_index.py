@@ -0,0 +1,67 @@
+import json
+
+from src.core.models import Conversation
+from src.storage.history import FileHistoryStorage
+from src.storage.index import HistoryIndex
+
+
+def _fill(storage: FileHistoryStorage) -> tuple[Conversation, Conversation]:
+    chat = Conversation(mode="chat")
+    coder = Conversation(mode="coder")
+    chat.add_user_message("Hi")
+    storage.save(chat)
+    coder.add_user_message("Explain generators")
+    storage.save(coder)
+    chat.add_assistant_message("Hello")
+    storage.save(chat)
+    return chat, coder
+
+
+def test_sidecar_index_written_on_save(tmp_path):
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, delta=True)
+    chat, coder = _fill(storage)
+
+    rows = [json.loads(line) for line in (tmp_path / "history.jsonl.idx").read_text().splitlines()]
+    assert [row[0] for row in rows] == [chat.id, coder.id, chat.id]
+    assert rows[0][3] == 0
+    assert rows[1][3] == rows[0][3] + rows[0][4]
+
+
+def test_get_and_summaries_use_index(tmp_path):
+    path = tmp_path / "history.jsonl"
+    chat, coder = _fill(FileHistoryStorage(path, delta=True))
+
+    storage = FileHistoryStorage(path, delta=True)
+    summaries = storage.list_summaries()
+    assert [(s.id, s.mode, s.message_count) for s in summaries] == [
+        (chat.id, "chat", 2),
+        (coder.id, "coder", 1),
+    ]
+
+    loaded = storage.get(chat.id)
+    assert [m.content for m in loaded.messages] == ["Hi", "Hello"]
+    assert storage.get("missing") is None
+    assert [c.id for c in storage.iter_conversations(mode="coder")] == [coder.id]
+
+
+def test_index_rebuilt_when_missing_and_extended_when_stale(tmp_path):
+    path = tmp_path / "history.jsonl"
+    legacy = FileHistoryStorage(path, index=False)
+    conv = Conversation(mode="chat")
+    conv.add_user_message("old snapshot")
+    legacy.save(conv)
+
+    storage = FileHistoryStorage(path, delta=True)
+    summaries = storage.list_summaries()
+    assert len(summaries) == 1
+    assert summaries[0].id.startswith("@")
+    assert storage.get(summaries[0].id).messages[0].content == "old snapshot"
+
+    # Another writer appends without updating the sidecar.
+    other = Conversation(mode="chat")
+    other.add_user_message("from elsewhere")
+    FileHistoryStorage(path, delta=True, index=False).save(other)
+
+    index = HistoryIndex(path)
+    assert index.keys()[-1] == other.id
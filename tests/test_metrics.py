@@ -0,0 +1,111 @@
+import pstats
+
+from src.ai.cache import CachingProvider
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.app import AssistantSession
+from src.core.metrics import (
+    Histogram,
+    InstrumentedCore,
+    InstrumentedHistory,
+    InstrumentedProvider,
+    Metrics,
+    to_prometheus,
+)
+from src.storage.history import FileHistoryStorage
+
+
+def make_session(tmp_path, metrics, provider=None):
+    provider = InstrumentedProvider(provider if provider is not None else FakeAIProvider(), metrics)
+    core = InstrumentedCore(AICore(provider), metrics)
+    history = InstrumentedHistory(FileHistoryStorage(tmp_path / "history.jsonl", delta=True), metrics)
+    return AssistantSession.start(core=core, history=history, metrics=metrics)
+
+
+def test_histogram_quantiles_over_recent_window():
+    h = Histogram(window=100)
+    for i in range(1, 201):
+        h.observe(i / 1000)
+    q = h.quantiles()
+    assert h.count == 200
+    assert 0.149 <= q[0.5] <= 0.151  # only the last 100 samples count
+    assert q[0.99] == 0.2
+
+
+def test_turns_record_layered_timings_and_bytes(tmp_path):
+    metrics = Metrics()
+    session = make_session(tmp_path, metrics)
+
+    session.handle_user_input("hello")
+    "".join(session.stream_user_input("again"))
+
+    hist = metrics.histograms
+    assert hist["session_turn_seconds"].count == 2
+    assert hist["core_generate_reply_seconds"].count == 1
+    assert hist["provider_generate_seconds"].count == 1
+    assert hist["provider_ttft_seconds"].count == 1
+    assert hist["core_ttft_seconds"].count == 1
+    assert hist["session_ttft_seconds"].count == 1
+    assert hist["history_save_seconds"].count == 2
+    assert metrics.counters["history_bytes_written_total"] == (tmp_path / "history.jsonl").stat().st_size
+
+
+def test_history_metrics_inside_write_behind_time_the_writes(tmp_path):
+    from src.storage.write_behind import WriteBehindHistory
+
+    metrics = Metrics()
+    path = tmp_path / "history.jsonl"
+    history = WriteBehindHistory(InstrumentedHistory(FileHistoryStorage(path, delta=True), metrics))
+    session = AssistantSession.start(core=AICore(FakeAIProvider()), history=history, metrics=metrics)
+    session.handle_user_input("hello")
+    session.handle_user_input("again")
+    history.close()
+
+    assert metrics.histograms["history_save_seconds"].count >= 1  # one per group commit
+    assert metrics.counters["history_bytes_written_total"] == path.stat().st_size
+
+
+def test_stats_command(tmp_path):
+    metrics = Metrics()
+    session = make_session(tmp_path, metrics)
+    session.handle_user_input("hello")
+
+    stats = session.handle_user_input("/stats")
+    assert "session_turn_seconds: n=1" in stats
+    assert "p99=" in stats
+
+    plain = AssistantSession.start(
+        core=AICore(FakeAIProvider()), history=FileHistoryStorage(tmp_path / "other.jsonl")
+    )
+    assert plain.handle_user_input("/stats") == "Metrics are off for this session."
+
+
+def test_prometheus_export_includes_cache_gauges(tmp_path):
+    metrics = Metrics()
+    cache = CachingProvider(FakeAIProvider())
+    metrics.watch_cache(cache)
+    session = make_session(tmp_path, metrics, provider=cache)
+    session.handle_user_input("same")
+    session.conversation.messages.clear()
+    session.handle_user_input("same")
+
+    text = to_prometheus(metrics)
+    assert "# TYPE assistant_session_turn_seconds summary" in text
+    assert 'assistant_session_turn_seconds{quantile="0.95"}' in text
+    assert "assistant_session_turn_seconds_count 2" in text
+    assert "# TYPE assistant_history_bytes_written_total counter" in text
+    assert "assistant_cache_hit_rate 0.5" in text
+
+
+def test_profiling_is_opt_in(tmp_path):
+    metrics = Metrics()
+    session = make_session(tmp_path, metrics)
+    session.handle_user_input("hello")
+    assert metrics.profiler is None
+
+    metrics.enable_profiling()
+    session.handle_user_input("profiled")
+    out = tmp_path / "turns.prof"
+    metrics.dump_profile(out)
+    stats = pstats.Stats(str(out))
+    assert any("generate_reply" in func[2] for func in stats.stats)
+    assert "cumulative" in metrics.profile_report()
@@ -1,4 +1,4 @@
-from src.core.models import Role, Message, Conversation
+from src.core.models import Role, Message, Conversation, MessageStore
 
 def test_message_holds_role_and_content():
   msg = Message(role=Role.USER, content="Hello AI!")
@@ -28,4 +28,117 @@ def test_conversation_as_payload_for_ai():
   assert payload[0]["role"] == "system"
   assert "coding assistant" in payload[0]["content"]
   assert payload[1]["role"] == "user"
-  assert "list comprehensions" in payload[1]["content"]
\ No newline at end of file
+  assert "list comprehensions" in payload[1]["content"]
+def test_message_is_slotted_and_frozen():
+  import dataclasses
+  import pytest
+
+  msg = Message(role=Role.USER, content="Hi")
+  assert not hasattr(msg, "__dict__")
+  with pytest.raises(dataclasses.FrozenInstanceError):
+    msg.content = "changed"
+
+def test_message_store_behaves_like_list_of_messages():
+  from src.core.models import MessageStore
+
+  store = MessageStore([Message(Role.SYSTEM, "s"), Message(Role.USER, "u")])
+  store.append(Message(Role.ASSISTANT, "a"))
+
+  assert len(store) == 3
+  assert store[1] == Message(Role.USER, "u")
+  assert store[-1].role is Role.ASSISTANT
+  assert store[1:] == [Message(Role.USER, "u"), Message(Role.ASSISTANT, "a")]
+  assert [m.content for m in reversed(store)] == ["a", "u", "s"]
+
+  store[0:2] = [Message(Role.SYSTEM, "summary")]
+  del store[5:]
+  assert store.roles() == [Role.SYSTEM, Role.ASSISTANT]
+  assert list(store.roles_from(1)) == [Role.ASSISTANT]
+  assert store == [Message(Role.SYSTEM, "summary"), Message(Role.ASSISTANT, "a")]
+
+def test_compact_conversation_keeps_api():
+  conv = Conversation(mode="chat")
+  conv.add_user_message("Hi")
+  conv.compact()
+  conv.add_assistant_message("Hello")
+
+  assert conv.last_user_message() == "Hi"
+  assert conv.to_ai_payload() == [
+    {"role": "user", "content": "Hi"},
+    {"role": "assistant", "content": "Hello"},
+  ]
+
+def test_message_store_uses_less_memory_than_message_list():
+  from benchmarks.bench_models_memory import run
+
+  result = run(5_000)["bytes"]
+  assert result["message_store"] < result["slotted_message"] < result["legacy_dataclass"]
+
+def test_role_index_tracks_appends():
+  conv = Conversation(mode="chat")
+  conv.add_system_message("sys")
+  conv.add_user_message("u1")
+  conv.add_assistant_message("a1")
+  conv.add_user_message("u2")
+  for i in range(5):
+    conv.add_assistant_message(f"a{i + 2}")
+
+  assert conv.last_user_message() == "u2"
+  assert conv.count(Role.ASSISTANT) == 6
+  assert conv.user_turn_positions() == [1, 3]
+  assert conv.last_message(Role.SYSTEM).content == "sys"
+  assert conv.last_message(Role.AI) is None
+  assert [m.content for m in conv.last_user_turns(1)][:2] == ["u2", "a2"]
+  assert len(conv.last_user_turns(5)) == 8
+
+  conv.add_user_message("u3")
+  assert conv.last_user_message() == "u3"
+  assert conv.count(Role.USER) == 3
+
+def test_role_index_survives_direct_list_changes():
+  conv = Conversation(mode="chat")
+  conv.add_user_message("first")
+  assert conv.last_user_message() == "first"
+
+  # Code outside the model may still append/replace directly.
+  conv.messages.append(Message(Role.USER, "appended directly"))
+  assert conv.last_user_message() == "appended directly"
+
+  conv.messages = [Message(Role.ASSISTANT, "only reply")]
+  assert conv.last_user_message() == ""
+  assert conv.count(Role.ASSISTANT) == 1
+
+  conv.replace_messages(0, 1, [Message(Role.USER, "replaced")])
+  assert conv.last_user_message() == "replaced"
+
+def test_role_index_notices_same_length_rewrites_of_a_message_store():
+  conv = Conversation(mode="chat", messages=MessageStore())
+  conv.add_user_message("u1")
+  conv.add_assistant_message("a1")
+  assert conv.last_user_message() == "u1"
+
+  # Same length, different roles: only the version shows the change.
+  conv.messages[0:2] = [Message(Role.ASSISTANT, "summary"), Message(Role.USER, "u2")]
+  assert conv.last_user_message() == "u2"
+  assert conv.user_turn_positions() == [1]
+
+  conv.messages[1] = Message(Role.SYSTEM, "sys")
+  assert conv.count(Role.USER) == 0
+
+  version = conv.messages.version
+  conv.add_user_message("u3")  # appends are followed without a rebuild
+  index = conv._index
+  assert conv.last_user_message() == "u3" and conv._index is index
+  assert conv.messages.version == version + 1
+
+def test_role_index_catch_up_reads_only_new_roles():
+  class NoFullCopy(MessageStore):
+    __slots__ = ()
+
+    def roles(self):
+      raise AssertionError("copied the whole role column")
+
+  conv = Conversation(mode="chat", messages=NoFullCopy([Message(Role.USER, f"u{i}") for i in range(3)]))
+  assert conv.count(Role.USER) == 3
+  conv.add_assistant_message("a")
+  assert conv.count(Role.ASSISTANT) == 1
@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from src.core.prewarm import Deferred, Prewarm
+
+
+class Store:
+    def __init__(self):
+        self.saved = []
+
+    def save(self, item):
+        self.saved.append(item)
+
+
+def test_tasks_run_in_order_in_the_background():
+    release = threading.Event()
+    order = []
+
+    def first():
+        release.wait(5)
+        order.append("first")
+
+    warm = Prewarm()
+    warm.add("first", first)
+    warm.add("second", lambda: order.append("second") or len(order))
+    warm.start()
+
+    assert not warm.ready("first")  # start() didn't wait
+    release.set()
+    assert warm.get("second") == 2
+    assert order == ["first", "second"]
+
+
+def test_deferred_waits_for_the_object_on_first_use():
+    def slow_store():
+        time.sleep(0.05)
+        return Store()
+
+    warm = Prewarm()
+    store = warm.add("store", slow_store)
+    assert isinstance(store, Deferred)
+    warm.start()
+    store.save("x")
+    assert warm.get("store").saved == ["x"]
+    assert getattr(store, "missing", None) is None
+    assert "ready" in repr(store)
+
+
+def test_errors_are_raised_where_the_result_is_used():
+    warm = Prewarm()
+    broken = warm.add("broken", lambda: 1 / 0)
+    warm.add("after", lambda: "still runs")
+    warm.start()
+    with pytest.raises(ZeroDivisionError):
+        broken.save("x")
+    assert warm.get("after") == "still runs"
+
+
+def test_get_starts_the_tasks_and_later_tasks_can_use_earlier_ones():
+    warm = Prewarm()
+    warm.add("a", lambda: 20)
+    warm.add("b", lambda: warm.get("a") + 1)
+    assert warm.get("b") == 21  # never explicitly started
+
+    warm.add("c", lambda: warm.get("b") * 2)  # added after the thread finished
+    assert warm.get("c") == 42
+    assert warm.wait(1)
+
+
+def test_waiting_on_a_later_task_fails_instead_of_deadlocking():
+    warm = Prewarm()
+    warm.add("early", lambda: warm.get("late"))
+    warm.add("late", lambda: 1)
+    with pytest.raises(RuntimeError, match="queued after"):
+        warm.get("early")
+    with pytest.raises(ValueError):
+        warm.add("late", lambda: 2)
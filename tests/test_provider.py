@@ -0,0 +1,53 @@
+import time
+
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.models import Conversation, Role
+
+
+class PlainProvider:
+    """Provider without a stream() method."""
+    def generate(self, conversation: Conversation) -> str:
+        return "plain reply"
+
+
+def test_fake_provider_streams_in_chunks():
+    provider = FakeAIProvider(chunk_size=4)
+    conv = Conversation(mode="chat")
+    conv.add_user_message("Hello")
+
+    chunks = list(provider.stream(conv))
+
+    assert all(len(c) <= 4 for c in chunks)
+    assert "".join(chunks) == provider.generate(conv)
+
+
+def test_fake_provider_delay_controls_time_to_first_token():
+    provider = FakeAIProvider(chunk_size=2, delay=0.02)
+    conv = Conversation(mode="chat")
+    conv.add_user_message("Hi")
+
+    started = time.perf_counter()
+    next(iter(provider.stream(conv)))
+    assert time.perf_counter() - started >= 0.02
+
+
+def test_stream_reply_assembles_final_message():
+    core = AICore(FakeAIProvider(chunk_size=3))
+    conv = core.start_conversation("chat")
+    conv.add_user_message("Stream me")
+
+    stream = core.stream_reply(conv)
+    text = "".join(stream)
+
+    assert stream.message is not None
+    assert stream.message.content == text
+    assert conv.messages[-1] is stream.message
+    assert conv.messages[-1].role is Role.ASSISTANT
+
+
+def test_stream_reply_falls_back_to_generate():
+    core = AICore(PlainProvider())
+    conv = core.start_conversation("chat")
+
+    assert list(core.stream_reply(conv)) == ["plain reply"]
+    assert conv.messages[-1].content == "plain reply"
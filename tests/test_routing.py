@@ -0,0 +1,153 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.ai.provider import AICore
+from src.ai.routing import Backend, CircuitBreaker, RoutingError, RoutingProvider
+from src.core.models import Conversation
+
+
+class FakeBackend:
+    """Provider with an injected delay and failures."""
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.closed_streams = 0
+        self._lock = threading.Lock()
+
+    def generate(self, conversation: Conversation) -> str:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return self.name
+
+    def stream(self, conversation: Conversation):
+        try:
+            yield self.generate(conversation)
+            yield "!"
+        finally:
+            self.closed_streams += 1
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _conv() -> Conversation:
+    conv = Conversation(mode="chat")
+    conv.add_user_message("hi")
+    return conv
+
+
+def test_least_outstanding_spreads_concurrent_requests():
+    backends = [FakeBackend(f"b{i}", delay=0.05) for i in range(3)]
+    router = RoutingProvider(backends, hedge_percentile=None)
+    with ThreadPoolExecutor(6) as pool:
+        list(pool.map(lambda _: router.generate(_conv()), range(6)))
+    assert [b.calls for b in backends] == [2, 2, 2]
+
+
+def test_weighted_strategy_follows_weights():
+    heavy, light = FakeBackend("heavy"), FakeBackend("light")
+    router = RoutingProvider(
+        [("heavy", heavy, 3), ("light", light, 1)],
+        strategy="weighted", hedge_percentile=None, rng=random.Random(1),
+    )
+    for _ in range(400):
+        router.generate(_conv())
+    assert 250 < heavy.calls < 350
+    assert heavy.calls + light.calls == 400
+
+
+def test_latency_strategy_prefers_the_fast_backend():
+    slow, fast = FakeBackend("slow", delay=0.02), FakeBackend("fast")
+    router = RoutingProvider([slow, fast], strategy="latency", hedge_percentile=None)
+    replies = [router.generate(_conv()) for _ in range(20)]
+    assert replies.count("fast") >= 18  # each is tried once, then the fast one wins
+
+
+def test_slow_primary_is_hedged_and_the_fast_answer_wins():
+    slow, fast = FakeBackend("slow", delay=0.5), FakeBackend("fast")
+    router = RoutingProvider([slow, fast], strategy="weighted", hedge_delay=0.02,
+                             rng=random.Random(0))
+    router.backends[1].weight = 1e-9  # make "slow" the primary
+    started = time.perf_counter()
+    assert router.generate(_conv()) == "fast"
+    assert time.perf_counter() - started < 0.3
+    assert router.hedged == 1
+    assert router.backends[1].wins == 1
+
+
+def test_hedge_delay_follows_the_backend_latency_percentile():
+    backend = FakeBackend("b")
+    router = RoutingProvider([backend, FakeBackend("other")], hedge_min_samples=5)
+    b = router.backends[0]
+    for seconds in (0.01, 0.01, 0.02, 0.02, 0.5):
+        b._started()
+        b._finished(seconds, ok=True)
+    assert router._hedge_after(b) == 0.5
+    router.hedge_percentile = 0.5
+    assert router._hedge_after(b) == 0.02
+
+
+def test_failure_fails_over_and_opens_the_circuit():
+    down, up = FakeBackend("down", fail=True), FakeBackend("up")
+    clock = FakeClock()
+    router = RoutingProvider([down, up], failure_threshold=2, reset_timeout=10,
+                             hedge_percentile=None, clock=clock, strategy="weighted",
+                             rng=random.Random(0))
+    router.backends[1].weight = 1e-9  # "down" is always tried first while it's healthy
+    assert [router.generate(_conv()) for _ in range(5)] == ["up"] * 5
+    assert down.calls == 2
+    assert router.backends[0].breaker.state == "open"
+
+    clock.now = 11  # half-open: one probe; it succeeds and closes the circuit
+    down.fail = False
+    assert router.generate(_conv()) == "down"
+    assert router.backends[0].breaker.state == "closed"
+
+
+def test_circuit_breaker_half_open_allows_one_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    assert not breaker.allow()
+    clock.now = 5
+    assert breaker.allow()
+    assert not breaker.allow()  # probe in flight
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+
+def test_all_backends_down_raises_routing_error():
+    router = RoutingProvider([FakeBackend("a", fail=True), FakeBackend("b", fail=True)],
+                             failure_threshold=1, hedge_percentile=None)
+    with pytest.raises(RoutingError):
+        router.generate(_conv())
+    with pytest.raises(RoutingError, match="circuit"):
+        router.generate(_conv())
+
+
+def test_stream_is_hedged_on_first_chunk_and_loser_closed():
+    slow, fast = FakeBackend("slow", delay=0.2), FakeBackend("fast")
+    router = RoutingProvider(
+        [Backend("slow", slow, weight=1.0), Backend("fast", fast, weight=1e-9)],
+        strategy="weighted", hedge_delay=0.02, rng=random.Random(0),
+    )
+    core = AICore(router)
+    conv = _conv()
+    assert "".join(core.stream_reply(conv)) == "fast!"
+    assert conv.messages[-1].content == "fast!"
+    time.sleep(0.3)
+    assert slow.closed_streams == 1
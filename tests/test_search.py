@@ -0,0 +1,68 @@
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.app import AssistantSession
+from src.core.models import Conversation
+from src.storage.history import FileHistoryStorage
+from src.storage.search import SearchableHistory, SearchIndex
+
+
+def _history(tmp_path) -> SearchableHistory:
+    return SearchableHistory(
+        FileHistoryStorage(tmp_path / "history.jsonl", delta=True),
+        SearchIndex(tmp_path / "history.search.db"),
+    )
+
+
+def test_save_indexes_only_new_messages(tmp_path):
+    history = _history(tmp_path)
+    conv = Conversation(mode="coder")
+    conv.add_user_message("How do Python generators work?")
+    history.save(conv)
+    conv.add_assistant_message("Generators yield values lazily.")
+    history.save(conv)
+    history.save(conv)
+
+    assert history.index.indexed_count(conv.id) == 2
+    hits = history.search("generators")
+    assert len(hits) == 2
+    assert {h.position for h in hits} == {0, 1}
+    assert all(h.conversation_id == conv.id for h in hits)
+    assert "[" in hits[0].snippet
+
+
+def test_search_ranks_and_filters(tmp_path):
+    history = _history(tmp_path)
+    a = Conversation(mode="chat")
+    a.add_user_message("pizza recipe with basil and basil oil")
+    b = Conversation(mode="coder")
+    b.add_user_message("basil")
+    c = Conversation(mode="chat")
+    c.add_user_message("nothing relevant")
+    for conv in (a, b, c):
+        history.save(conv)
+
+    assert [h.conversation_id for h in history.search("basil", mode="chat")] == [a.id]
+    assert len(history.search("basil")) == 2
+    assert history.search('"unbalanced') == []
+    assert history.search("   ") == []
+
+
+def test_catch_up_indexes_existing_history(tmp_path):
+    storage = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    conv = Conversation(mode="chat")
+    conv.add_user_message("written before search existed")
+    storage.save(conv)
+
+    history = _history(tmp_path)
+    hits = history.search("existed")
+    assert [h.conversation_id for h in hits] == [conv.id]
+
+
+def test_search_command(tmp_path):
+    session = AssistantSession.start(core=AICore(FakeAIProvider()), history=_history(tmp_path))
+    session.handle_user_input("remember the word zucchini")
+
+    out = session.handle_user_input("/search zucchini")
+    assert session.conversation.id[:8] in out
+    assert "User: " in out and "[zucchini]" in out
+    assert session.handle_user_input("/search").startswith("Usage")
+    assert "No messages" in session.handle_user_input("/search eggplant")
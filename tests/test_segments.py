@@ -0,0 +1,114 @@
+import gzip
+import multiprocessing
+
+import pytest
+
+from src.core.models import Conversation
+from src.storage.history import FileHistoryStorage
+
+
+def _chat(storage: FileHistoryStorage, turns: int, conv: Conversation | None = None) -> Conversation:
+    conv = conv or Conversation(mode="chat")
+    for i in range(turns):
+        conv.add_user_message(f"question {i} " + "x" * 40)
+        storage.save(conv)
+    return conv
+
+
+def _worker(path: str, name: str, turns: int) -> None:
+    storage = FileHistoryStorage(path, delta=True)
+    conv = Conversation(mode="chat", id=name)
+    _chat(storage, turns, conv)
+
+
+def test_torn_trailing_line_is_skipped_and_repaired(tmp_path):
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, delta=True)
+    conv = _chat(storage, 2)
+    with path.open("ab") as f:
+        f.write(b'{"id": "crashed", "mode": "ch')  # writer died mid-line
+
+    fresh = FileHistoryStorage(path, delta=True)
+    assert [len(c.messages) for c in fresh.load_all()] == [2]
+
+    conv.add_user_message("after the crash")
+    fresh.save(conv)
+    again = FileHistoryStorage(path, delta=True)
+    assert [len(c.messages) for c in again.load_all()] == [3]
+    assert [s.message_count for s in again.list_summaries()] == [3]
+    assert again.get(conv.id).messages[-1].content == "after the crash"
+
+
+def test_concurrent_processes_do_not_interleave(tmp_path):
+    path = str(tmp_path / "history.jsonl")
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_worker, args=(path, f"p{i}", 40)) for i in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+        assert p.exitcode == 0
+
+    storage = FileHistoryStorage(path, delta=True)
+    convs = {c.id: c for c in storage.load_all()}
+    assert sorted(convs) == ["p0", "p1", "p2", "p3"]
+    assert all(len(c.messages) == 40 for c in convs.values())
+    assert {s.id: s.message_count for s in storage.list_summaries()} == {f"p{i}": 40 for i in range(4)}
+
+
+def test_size_rotation_keeps_a_consistent_view(tmp_path):
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, delta=True, max_bytes=500, compression="gzip")
+    a = _chat(storage, 10)
+    b = _chat(storage, 3, Conversation(mode="coder"))
+    _chat(storage, 2, a)
+
+    segments = sorted(tmp_path.glob("history.jsonl.0*.gz"))
+    assert len(segments) >= 3
+    assert not list(tmp_path.glob("history.jsonl.0?????"))  # plain copies removed
+    with gzip.open(segments[0], "rb") as f:
+        assert f.readline().startswith(b'{"id"')
+
+    for reader in (storage, FileHistoryStorage(path, delta=True)):
+        convs = {c.id: c for c in reader.load_all()}
+        assert len(convs[a.id].messages) == 12
+        assert len(convs[b.id].messages) == 3
+        assert reader.get(a.id).messages == a.messages
+        assert {s.id: s.message_count for s in reader.list_summaries()} == {a.id: 12, b.id: 3}
+        assert [c.id for c in reader.iter_conversations(mode="coder")] == [b.id]
+
+
+def test_rotation_by_another_instance_is_noticed(tmp_path):
+    path = tmp_path / "history.jsonl"
+    mine = FileHistoryStorage(path, delta=True)
+    other = FileHistoryStorage(path, delta=True)
+    conv = _chat(mine, 2)
+    assert mine.list_summaries()[0].message_count == 2
+
+    assert other.rotate() == tmp_path / "history.jsonl.000001"
+    _chat(mine, 1, conv)
+    assert len(other.get(conv.id).messages) == 3
+    assert [s.message_count for s in mine.list_summaries()] == [3]
+    assert [len(c.messages) for c in FileHistoryStorage(path).load_all()] == [3]
+
+
+def test_age_rotation_and_snapshot_keys_in_segments(tmp_path):
+    path = tmp_path / "history.jsonl"
+    storage = FileHistoryStorage(path, max_age=0)  # rotate after every save
+    for text in ("one", "two"):
+        conv = Conversation(mode="chat")
+        conv.add_user_message(text)
+        storage.save(conv)
+
+    ids = [s.id for s in storage.list_summaries()]
+    assert ids == ["@1:0", "@2:0"]
+    assert storage.get("@2:0").messages[0].content == "two"
+    assert [c.id for c in storage.load_all()] == ids
+
+    with pytest.raises(RuntimeError):
+        storage.migrate()
+
+
+def test_bad_compression_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        FileHistoryStorage(tmp_path / "h.jsonl", compression="bz2")
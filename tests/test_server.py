@@ -0,0 +1,181 @@
+import asyncio
+import json
+
+from benchmarks.load_test import TRANSPORTS, Client, run_local
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.sessions import SessionManager
+from src.server.app import AssistantServer
+from src.server.protocol import CONTINUATION, PING, PONG, TEXT, encode_frame, read_frame, read_message
+from src.storage.history import FileHistoryStorage
+
+
+def _server(tmp_path, provider=None, **kwargs) -> AssistantServer:
+    history = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    sessions = SessionManager(AICore(provider or FakeAIProvider()), history)
+    return AssistantServer(sessions, port=0, **kwargs)
+
+
+async def _client(server: AssistantServer) -> Client:
+    client = Client(server.host, server.port)
+    await client.connect()
+    return client
+
+
+def test_http_turns_share_a_session_and_are_saved(tmp_path):
+    async def scenario():
+        server = await _server(tmp_path).start()
+        client = await _client(server)
+        status, _, body = await client.request("POST", "/sessions/alice/messages", {"text": "hello"})
+        assert status == 200
+        assert json.loads(body)["reply"] == "🤖 I hear you said: hello"
+        await client.request("POST", "/sessions/alice/messages", {"text": "again"})
+
+        status, _, body = await client.request("GET", "/stats")
+        assert json.loads(body)["sessions"]["live"] == 1
+        status, _, _ = await client.request("GET", "/sessions/alice/messages")
+        assert status == 405
+        status, _, _ = await client.request("POST", "/sessions/alice/messages", {"nope": 1})
+        assert status == 400
+        await client.close()
+        await server.shutdown()
+        return server
+
+    server = asyncio.run(scenario())
+    assert len(server.sessions.history.get("alice").messages) == 4
+
+
+def test_sse_streams_chunks_then_done(tmp_path):
+    async def scenario():
+        server = await _server(tmp_path).start()
+        client = await _client(server)
+        status, headers, body = await client.request(
+            "POST", "/sessions/bob/messages", {"text": "stream me"}, accept="text/event-stream"
+        )
+        await client.close()
+        await server.shutdown()
+        return status, headers, body
+
+    status, headers, body = asyncio.run(scenario())
+    assert status == 200
+    assert headers["content-type"] == "text/event-stream"
+    events = body.decode("utf-8").strip().split("\n\n")
+    text = "".join(json.loads(e[len("data: "):])["text"] for e in events[:-1])
+    assert text == "🤖 I hear you said: stream me"
+    assert events[-1].startswith("event: done")
+
+
+def test_websocket_turns_and_exit(tmp_path):
+    async def scenario():
+        server = await _server(tmp_path).start()
+        client = await _client(server)
+        await client.websocket("/sessions/carol/ws")
+        ok, first = await client.ws_turn("hi there")
+        assert ok and first is not None
+        client.writer.write(encode_frame(TEXT, b"/exit", mask=True))
+        _, opcode, _ = await read_frame(client.reader, 1024)
+        await client.close()
+        await server.shutdown()
+        return opcode
+
+    assert asyncio.run(scenario()) == 0x8  # close frame
+
+
+def test_busy_server_sheds_load_with_503(tmp_path):
+    async def scenario():
+        server = await _server(
+            tmp_path, FakeAIProvider(delay=0.3), max_inflight=1, queue_timeout=0.05
+        ).start()
+        a, b = await _client(server), await _client(server)
+        results = await asyncio.gather(
+            a.request("POST", "/sessions/a/messages", {"text": "x"}),
+            b.request("POST", "/sessions/b/messages", {"text": "y"}),
+        )
+        await a.close()
+        await b.close()
+        await server.shutdown()
+        return sorted(status for status, _, _ in results), server.rejected
+
+    statuses, rejected = asyncio.run(scenario())
+    assert statuses == [200, 503]
+    assert rejected == 1
+
+
+def test_slow_client_is_disconnected_without_stalling_the_server(tmp_path):
+    async def scenario():
+        provider = FakeAIProvider(chunk_size=64 * 1024)
+        server = await _server(
+            tmp_path, provider, write_timeout=0.2, stream_buffer=1, max_body=32 * 1024 * 1024
+        ).start()
+        slow = await _client(server)
+        data = json.dumps({"text": "z" * (16 * 1024 * 1024)}).encode()
+        slow.writer.write(
+            b"POST /sessions/slow/messages?stream=1 HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(data)
+            + data
+        )  # ...and never read the reply
+        for _ in range(100):
+            if server.slow_clients:
+                break
+            await asyncio.sleep(0.05)
+
+        fast = await _client(server)
+        status, _, _ = await fast.request("POST", "/sessions/fast/messages", {"text": "ok?"})
+        await fast.close()
+        await slow.close()
+        await asyncio.wait_for(server.shutdown(), 5)
+        return server.slow_clients, status
+
+    assert asyncio.run(scenario()) == (1, 200)
+
+
+def test_shutdown_drains_running_turns(tmp_path):
+    async def scenario():
+        server = await _server(tmp_path, FakeAIProvider(delay=0.2)).start()
+        client = await _client(server)
+        turn = asyncio.ensure_future(client.request("POST", "/sessions/d/messages", {"text": "slow"}))
+        await asyncio.sleep(0.05)
+        await server.shutdown()
+        status, headers, _ = await turn
+        await client.close()
+        try:
+            await asyncio.open_connection(server.host, server.port)
+            refused = False
+        except OSError:
+            refused = True
+        return status, headers["connection"], refused, server
+
+    status, connection, refused, server = asyncio.run(scenario())
+    assert (status, connection, refused) == (200, "close", True)
+    assert len(server.sessions) == 0
+    assert len(server.sessions.history.get("d").messages) == 2
+
+
+def test_websocket_messages_reassemble_fragments_and_answer_pings():
+    async def scenario():
+        reader = asyncio.StreamReader()
+        first = bytearray(encode_frame(TEXT, b"hel", mask=True))
+        first[0] &= 0x7F  # not final
+        reader.feed_data(bytes(first))
+        reader.feed_data(encode_frame(PING, b"p", mask=True))
+        reader.feed_data(encode_frame(CONTINUATION, b"lo", mask=True))
+
+        sent = []
+
+        class Writer:
+            def write(self, data):
+                sent.append(data)
+
+        opcode, payload = await read_message(reader, Writer(), 1024)
+        return opcode, payload, sent
+
+    opcode, payload, sent = asyncio.run(scenario())
+    assert (opcode, payload) == (TEXT, b"hello")
+    assert sent == [encode_frame(PONG, b"p")]
+
+
+def test_load_test_client_reports_throughput_and_tail_latency():
+    for transport in TRANSPORTS:
+        result = asyncio.run(run_local(users=4, turns=3, transport=transport, delay=0.0, workers=4))
+        assert result["errors"] == 0
+        assert result["samples"] == 12
+        assert result["p99"] >= result["p50"] > 0
+        assert result["turns_per_second"] > 0
@@ -0,0 +1,196 @@
+import threading
+import time
+
+from src.ai.provider import AICore, FakeAIProvider
+from src.core.metrics import Metrics
+from src.core.sessions import SESSION_OVERHEAD, SessionManager, estimate_bytes
+from src.storage.history import FileHistoryStorage
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _manager(tmp_path, **kwargs) -> SessionManager:
+    storage = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    return SessionManager(AICore(FakeAIProvider()), storage, **kwargs)
+
+
+def test_lru_bound_evicts_and_rehydrates_from_history(tmp_path):
+    manager = _manager(tmp_path, max_sessions=2)
+    for user in ("alice", "bob", "carol"):
+        manager.handle(user, f"hello from {user}")
+
+    assert manager.keys() == ["bob", "carol"]
+    assert manager.stats.evictions == 1
+
+    manager.handle("alice", "still there?")
+    assert manager.stats.rehydrated == 1
+    with manager.session("alice") as session:
+        contents = [m.content for m in session.conversation.messages]
+    assert contents[0] == "hello from alice"
+    assert contents[2] == "still there?"
+    assert len(manager) == 2
+
+
+def test_memory_ceiling_evicts_least_recently_used(tmp_path):
+    manager = _manager(tmp_path, max_bytes=3 * SESSION_OVERHEAD)
+    for i in range(10):
+        manager.handle(f"user-{i}", "x" * 500)
+        assert manager.usage()["bytes"] <= 3 * SESSION_OVERHEAD
+
+    live = manager.keys()
+    assert live[-1] == "user-9"
+    assert manager.stats.evictions == 10 - len(live)
+    assert manager.usage()["bytes"] == sum(manager._entries[k].size for k in live)
+
+
+def test_idle_sessions_are_evicted(tmp_path):
+    clock = FakeClock()
+    manager = _manager(tmp_path, idle_timeout=60, clock=clock)
+    manager.handle("alice", "hi")
+    clock.now = 30
+    manager.handle("bob", "hi")
+
+    clock.now = 70
+    assert manager.evict_idle() == 1
+    assert manager.keys() == ["bob"]
+    assert manager.stats.idle_evictions == 1
+
+
+def test_idle_sessions_are_swept_periodically_on_acquire(tmp_path):
+    clock = FakeClock()
+    manager = _manager(tmp_path, idle_timeout=60, clock=clock)
+    manager.handle("alice", "hi")
+    clock.now = 2
+    manager.handle("carol", "hi")
+
+    clock.now = 61
+    manager.handle("bob", "hi")  # sweep due: alice has been idle 61s
+    assert manager.keys() == ["carol", "bob"]
+    assert manager.history.get("alice").messages[0].content == "hi"
+
+    clock.now = 63
+    manager.handle("bob", "again")  # carol is idle too, but the next sweep is at 91
+    assert manager.keys() == ["carol", "bob"]
+    clock.now = 91
+    manager.handle("bob", "later")
+    assert manager.keys() == ["bob"]
+    assert manager.stats.idle_evictions == 2
+
+
+def test_loading_one_key_does_not_block_others(tmp_path):
+    class SlowGet(FileHistoryStorage):
+        gate = threading.Event()
+        loads = 0
+
+        def get(self, conversation_id):
+            if conversation_id == "slow":
+                SlowGet.loads += 1
+                self.gate.wait(5)
+            return super().get(conversation_id)
+
+    storage = SlowGet(tmp_path / "history.jsonl", delta=True)
+    manager = SessionManager(AICore(FakeAIProvider()), storage)
+    replies = []
+    slow = [threading.Thread(target=lambda: replies.append(manager.handle("slow", "hi"))) for _ in range(2)]
+    for t in slow:
+        t.start()
+    while not SlowGet.loads:
+        time.sleep(0.001)
+
+    started = time.perf_counter()
+    assert manager.handle("fast", "hi")
+    assert time.perf_counter() - started < 1  # not held up by the load in progress
+    storage.gate.set()
+    for t in slow:
+        t.join()
+
+    assert len(replies) == 2
+    assert SlowGet.loads == 1  # the second caller waited for the first load
+    assert manager.stats.created == 2
+
+
+def test_pinned_sessions_are_not_evicted(tmp_path):
+    manager = _manager(tmp_path, max_sessions=1)
+    with manager.session("alice") as alice:
+        manager.handle("bob", "hi")
+        assert "alice" in manager  # in use: may exceed the cap
+        alice.handle_user_input("hello")
+        assert manager.keys() == ["alice"]  # bob gave way once his turn ended
+    assert manager.keys() == ["alice"]
+    assert manager.history.get("bob").messages[0].content == "hi"
+
+
+def test_unsaved_messages_are_saved_on_eviction(tmp_path):
+    manager = _manager(tmp_path)
+    chunks = manager.stream("alice", "tell me a story")
+    next(chunks)
+    chunks.close()  # client went away mid-reply: the turn was never saved
+    manager.close()
+
+    assert len(manager) == 0
+    restored = manager.history.get("alice")
+    assert restored.messages[0].content == "tell me a story"
+
+
+def test_failed_eviction_save_keeps_the_session_and_spares_the_caller(tmp_path):
+    class FlakyDisk(FileHistoryStorage):
+        failing = False
+
+        def save(self, conversation):
+            if self.failing and conversation.id == "a":
+                raise OSError("disk full")
+            super().save(conversation)
+
+    storage = FlakyDisk(tmp_path / "history.jsonl", delta=True)
+    manager = SessionManager(AICore(FakeAIProvider()), storage, max_sessions=1)
+    storage.failing = True
+    chunks = manager.stream("a", "not saved yet")
+    next(chunks)
+    chunks.close()  # abandoned turn: only eviction saves it
+
+    assert manager.handle("b", "hi")  # evicting "a" fails, b's turn doesn't
+    assert manager.usage()["pinned"] == 0
+    assert manager.stats.save_errors >= 1
+    assert "a" in manager  # kept for a later retry
+
+    storage.failing = False
+    manager.handle("c", "hi")
+    assert "a" not in manager
+    assert storage.get("a").messages[0].content == "not saved yet"
+
+
+def test_concurrent_turns_on_one_session_are_serialized(tmp_path):
+    manager = _manager(tmp_path, max_sessions=4)
+
+    def chat(user: str) -> None:
+        for i in range(20):
+            manager.handle(user, f"{user} {i}")
+
+    threads = [threading.Thread(target=chat, args=(f"u{i % 3}",)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for user in ("u0", "u1", "u2"):
+        with manager.session(user) as session:
+            assert len(session.conversation.messages) == 80
+
+
+def test_usage_is_exported_as_metrics_gauges(tmp_path):
+    metrics = Metrics()
+    manager = _manager(tmp_path, max_sessions=4, metrics=metrics)
+    manager.handle("alice", "hi")
+    manager.handle("alice", "again")
+
+    gauges = metrics.gauges()
+    assert gauges["sessions_live"] == 1
+    assert gauges["sessions_occupancy"] == 0.25
+    assert gauges["sessions_hits"] == 1
+    assert gauges["sessions_created"] == 1
@@ -0,0 +1,72 @@
+import sqlite3
+
+from src.core.models import Conversation, Role
+from src.storage.history import FileHistoryStorage
+from src.storage.sqlite_history import SqliteHistoryStorage
+
+
+def _message_rows(db_path) -> int:
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+
+def test_save_inserts_only_new_messages(tmp_path):
+    db = tmp_path / "history.db"
+    storage = SqliteHistoryStorage(db)
+    conv = Conversation(mode="chat")
+
+    conv.add_user_message("Hi")
+    conv.add_assistant_message("Hello")
+    storage.save(conv)
+    storage.save(conv)
+    conv.add_user_message("More")
+    storage.save(conv)
+
+    assert _message_rows(db) == 3
+    loaded = storage.load_all()
+    assert len(loaded) == 1
+    assert loaded[0].id == conv.id
+    assert [m.role for m in loaded[0].messages] == [Role.USER, Role.ASSISTANT, Role.USER]
+
+
+def test_wal_mode_and_shared_store(tmp_path):
+    db = tmp_path / "history.db"
+    first = SqliteHistoryStorage(db)
+    second = SqliteHistoryStorage(db)
+
+    conv = Conversation(mode="chat")
+    conv.add_user_message("from first")
+    first.save(conv)
+
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert second.get(conv.id).messages[0].content == "from first"
+
+
+def test_pagination_and_mode_filter(tmp_path):
+    storage = SqliteHistoryStorage(tmp_path / "history.db")
+    with storage.batch():
+        for i in range(5):
+            conv = Conversation(mode="coder" if i % 2 else "chat")
+            conv.add_user_message(f"msg {i}")
+            storage.save(conv)
+
+    page = storage.load_page(limit=2, offset=1)
+    assert [c.messages[0].content for c in page] == ["msg 1", "msg 2"]
+    assert storage.count(mode="coder") == 2
+    assert [s.message_count for s in storage.list_summaries(mode="chat")] == [1, 1, 1]
+
+
+def test_import_from_jsonl(tmp_path):
+    jsonl = tmp_path / "history.jsonl"
+    legacy = FileHistoryStorage(jsonl)
+    conv = Conversation(mode="chat")
+    conv.add_user_message("Hi")
+    legacy.save(conv)
+    conv.add_assistant_message("Hello")
+    legacy.save(conv)
+
+    storage = SqliteHistoryStorage(tmp_path / "history.db")
+    assert storage.import_jsonl(jsonl) == 1
+    loaded = storage.load_all()
+    assert [m.content for m in loaded[0].messages] == ["Hi", "Hello"]
@@ -0,0 +1,35 @@
+import pytest
+
+from benchmarks.startup import BUDGETS, DEFERRED, available_modules, check, run
+
+
+@pytest.fixture(scope="module")
+def results():
+    return run(repeat=5, modules=available_modules())
+
+
+def test_entry_points_stay_within_their_import_budget(results):
+    measured = {r["params"]["module"]: r for r in results if r["name"] == "import_time"}
+    assert "main" in measured
+    for module, record in measured.items():
+        assert record["p50"] * 1000 <= BUDGETS[module], check(results)
+
+
+def test_heavy_modules_are_not_imported_at_startup(results):
+    for record in results:
+        if record["name"] == "import_time":
+            assert record["eager"] == [], f"{record['params']['module']} imports {record['eager']}"
+    assert "sqlite3" in DEFERRED["main"] and "httpx" in DEFERRED["main"]
+
+
+def test_cli_shows_its_prompt(results):
+    prompt = next(r for r in results if r["name"] == "time_to_prompt")
+    assert prompt["samples"] == 5 and prompt["p50"] > 0
+
+
+def test_check_reports_budget_and_eager_imports():
+    record = {"name": "import_time", "params": {"module": "main"}, "p50": 1.0,
+              "budget_ms": 75.0, "eager": ["sqlite3"]}
+    problems = check([record])
+    assert len(problems) == 2
+    assert "budget" in problems[0] and "sqlite3" in problems[1]
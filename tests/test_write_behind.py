@@ -0,0 +1,154 @@
+import threading
+import time
+
+import pytest
+
+from src.core.models import Conversation
+from src.storage.history import FileHistoryStorage
+from src.storage.write_behind import WriteBehindHistory
+
+
+class SlowStorage:
+    """In-memory storage whose writes block until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches = []
+        self.synced = 0
+        self.fail = False
+
+    def save_many(self, conversations):
+        self.release.wait(5)
+        if self.fail:
+            raise OSError("disk full")
+        self.batches.append([(c.id, len(c.messages)) for c in conversations])
+
+    def save(self, conversation):
+        self.save_many([conversation])
+
+    def load_all(self):
+        return []
+
+    def sync(self):
+        self.synced += 1
+
+
+def chat(n: int) -> Conversation:
+    conv = Conversation(mode="chat")
+    for i in range(n):
+        conv.add_user_message(f"hello {i}")
+    return conv
+
+
+def test_saves_are_written_in_the_background_and_readable(tmp_path):
+    storage = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    with WriteBehindHistory(storage, fsync="always") as history:
+        conv = chat(1)
+        history.save(conv)
+        conv.add_assistant_message("hi")
+        history.save(conv)
+
+        loaded = history.load_all()  # flushes first
+        assert [m.content for m in loaded[0].messages] == ["hello 0", "hi"]
+        assert history.get(conv.id).messages == loaded[0].messages
+        assert history.syncs >= 1
+
+
+def test_snapshot_is_taken_at_save_time():
+    storage = SlowStorage()
+    history = WriteBehindHistory(storage, commit_delay=0)
+    conv = chat(1)
+    history.save(conv)
+    conv.add_user_message("later, not saved")
+    storage.release.set()
+    history.close()
+    assert storage.batches == [[(conv.id, 1)]]
+
+
+def test_queued_saves_are_coalesced_and_group_committed():
+    storage = SlowStorage()
+    history = WriteBehindHistory(storage, commit_delay=0)
+    blocker = chat(1)
+    history.save(blocker)  # writer picks this up and blocks
+    while not history._writing:
+        pass
+
+    a, b = chat(1), chat(1)
+    for conv in (a, b, a):
+        history.save(conv)
+    a.add_user_message("again")
+    history.save(a)
+
+    storage.release.set()
+    history.close()
+    assert storage.batches == [[(blocker.id, 1)], [(a.id, 2), (b.id, 1)]]
+    assert history.commits == 2
+
+
+def test_close_fsyncs_and_rejects_further_saves():
+    storage = SlowStorage()
+    storage.release.set()
+    history = WriteBehindHistory(storage, fsync="interval", fsync_interval=60)
+    history.save(chat(1))
+    history.close()
+    assert storage.synced == 1
+    with pytest.raises(RuntimeError):
+        history.save(chat(1))
+
+
+def test_never_policy_does_not_fsync():
+    storage = SlowStorage()
+    storage.release.set()
+    history = WriteBehindHistory(storage, fsync="never")
+    history.save(chat(1))
+    history.close()
+    assert storage.batches and storage.synced == 0
+
+
+def test_write_errors_surface_and_saves_are_retried():
+    storage = SlowStorage()
+    storage.release.set()
+    storage.fail = True
+    history = WriteBehindHistory(storage, commit_delay=0, retry_delay=0.2)
+    conv = chat(1)
+    history.save(conv)
+    with pytest.raises(OSError):
+        history.flush()
+
+    storage.fail = False
+    assert history.flush(timeout=5)
+    history.close()
+    assert storage.batches == [[(conv.id, 1)]]
+
+
+def test_turns_after_a_failed_write_are_queued_not_failed():
+    storage = SlowStorage()
+    storage.release.set()
+    storage.fail = True
+    history = WriteBehindHistory(storage, commit_delay=0, retry_delay=0.05)
+    conv = chat(1)
+    history.save(conv)
+    while history.last_error is None:
+        time.sleep(0.001)
+
+    conv.add_user_message("next turn")
+    history.save(conv)  # doesn't raise, and the snapshot is kept
+    storage.fail = False
+    history.close()
+    assert storage.batches[-1] == [(conv.id, 2)]
+    assert history.last_error is None
+
+
+def test_unknown_fsync_policy_is_rejected():
+    with pytest.raises(ValueError):
+        WriteBehindHistory(SlowStorage(), fsync="sometimes")
+
+
+def test_file_storage_save_many_appends_once(tmp_path):
+    storage = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    a, b = chat(2), chat(3)
+    storage.save_many([a, b, a])
+    assert storage.bytes_written == (tmp_path / "history.jsonl").stat().st_size
+    reloaded = FileHistoryStorage(tmp_path / "history.jsonl", delta=True)
+    assert [len(c.messages) for c in reloaded.load_all()] == [2, 3]
+    assert [s.message_count for s in reloaded.list_summaries()] == [2, 3]